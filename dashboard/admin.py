@@ -1,7 +1,12 @@
 from django.contrib import admin
 
-from .models import Note, Profile, UploadDataset
+from .models import Alert, Job, LoggerState, Note, Profile, ReadingRollup, RequestProfile, UploadDataset
 
 admin.site.register(Profile)
 admin.site.register(Note)
 admin.site.register(UploadDataset)
+admin.site.register(LoggerState)
+admin.site.register(Alert)
+admin.site.register(ReadingRollup)
+admin.site.register(Job)
+admin.site.register(RequestProfile)
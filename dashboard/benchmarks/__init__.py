@@ -0,0 +1,4 @@
+"""Reproducible benchmarks for the parsing and API hot paths.
+
+Run with ``python manage.py run_benchmarks``; see that command for options.
+"""
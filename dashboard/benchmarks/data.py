@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import csv
+import random
+from datetime import datetime, timedelta
+from io import BytesIO, StringIO
+
+try:
+    import openpyxl  # type: ignore
+except Exception:  # pragma: no cover
+    openpyxl = None
+
+DEVICE_TYPES = ("tdl", "htdl", "ltdl")
+INTERVAL_SECONDS = 300
+EXPORT_HEADERS = ["Date/Time", "Temperature (°C)", "Humidity (%RH)", "Logger"]
+
+
+def make_fleet(devices: int, points: int, end_utc: int, seed: int = 0) -> list[dict]:
+    """Deterministic fleet of loggers, each with ``points`` readings every five minutes up to ``end_utc``."""
+    rng = random.Random(seed)
+    fleet = []
+    start = end_utc - (points - 1) * INTERVAL_SECONDS
+    for i in range(devices):
+        dtype = DEVICE_TYPES[i % len(DEVICE_TYPES)]
+        temp = rng.uniform(1.0, 4.0)
+        humidity = rng.uniform(60.0, 90.0)
+        readings = []
+        for n in range(points):
+            # Slow random walk with the occasional door-open spike.
+            temp += rng.gauss(0, 0.08) + (0.5 if rng.random() < 0.002 else 0.0)
+            temp = min(max(temp, -2.0), 12.0)
+            humidity = min(max(humidity + rng.gauss(0, 0.3), 30.0), 99.0)
+            readings.append((start + n * INTERVAL_SECONDS, round(temp, 2), round(humidity, 1)))
+        fleet.append(
+            {
+                "id": str(100000 + i),
+                "type": dtype,
+                "label": f"Logger {i + 1}",
+                "org": f"Plant {i % 4 + 1}",
+                "min_temp": 0.0,
+                "max_temp": 4.0,
+                "battery": round(rng.uniform(5, 100), 1),
+                "readings": readings,
+            }
+        )
+    return fleet
+
+
+def _m(utc: int, temp: float, humidity: float, dtype: str) -> str:
+    h = f"<h>{humidity}</h>" if dtype == "htdl" else ""
+    return f"<m><t>{temp}</t>{h}<utc>{utc}</utc></m>"
+
+
+def device_xml(device: dict, readings: list[tuple[int, float, float]] | None) -> str:
+    dtype = device["type"]
+    parts = [
+        f"<{dtype}>",
+        f"<id>{device['id']}</id>",
+        f"<label>{device['label']}</label>",
+        f"<org>{device['org']}</org>",
+        f"<min_temp>{device['min_temp']}</min_temp>",
+        f"<max_temp>{device['max_temp']}</max_temp>",
+        f"<battery>{device['battery']}</battery>",
+    ]
+    if readings:
+        parts.append("<ms>")
+        parts.extend(_m(utc, t, h, dtype) for utc, t, h in readings)
+        parts.append("</ms>")
+    parts.append(f"</{dtype}>")
+    return "".join(parts)
+
+
+def fleet_xml(fleet: list[dict], history: bool = False) -> str:
+    """Devices response; ``history`` embeds every reading instead of just the latest."""
+    body = "".join(device_xml(d, d["readings"] if history else d["readings"][-1:]) for d in fleet)
+    return f'<?xml version="1.0" encoding="UTF-8"?><devices>{body}</devices>'
+
+
+def _export_rows(rows: int, seed: int) -> list[list]:
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    temp = 3.0
+    out = []
+    for n in range(rows):
+        temp = min(max(temp + rng.gauss(0, 0.08), -2.0), 12.0)
+        out.append([start + timedelta(seconds=n * INTERVAL_SECONDS), round(temp, 2), round(rng.uniform(60, 90), 1), "100000"])
+    return out
+
+
+def make_xlsx(rows: int, seed: int = 0) -> bytes:
+    """A logger export shaped like the ones people upload: a header row, then readings."""
+    if openpyxl is None:
+        raise RuntimeError("openpyxl is required to build XLSX fixtures.")
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Readings")
+    ws.append(EXPORT_HEADERS)
+    for row in _export_rows(rows, seed):
+        ws.append(row)
+    out = BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+def make_csv(rows: int, seed: int = 0) -> bytes:
+    """The same export as :func:`make_xlsx`, saved as CSV."""
+    out = StringIO()
+    writer = csv.writer(out)
+    writer.writerow(EXPORT_HEADERS)
+    for row in _export_rows(rows, seed):
+        writer.writerow([row[0].strftime("%Y-%m-%d %H:%M:%S"), *row[1:]])
+    return out.getvalue().encode("utf-8")
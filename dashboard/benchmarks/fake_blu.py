@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, bisect_right
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .data import device_xml, fleet_xml
+
+DEVICES_PATH = "/bluconsolerest/1.0/resources/devices"
+
+
+class FakeBluConsole:
+    """Local stand-in for the BluConsole REST endpoint, serving a synthetic fleet.
+
+    Responses are rendered once per distinct query and reused, so the server
+    thread costs little CPU while the client side is being timed.
+    """
+
+    def __init__(self, fleet: list[dict], latency: float = 0.0):
+        self.fleet = fleet
+        self.by_id = {d["id"]: d for d in fleet}
+        self.utcs = {d["id"]: [r[0] for r in d["readings"]] for d in fleet}
+        self.latency = latency
+        self.calls = 0
+        self._rendered: dict[tuple, str] = {}
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def render(self, params: dict[str, str]) -> tuple[int, str]:
+        if params.get("uname") == "bad":
+            return 200, "<error>Bad username or password</error>"
+        key = tuple(sorted((k, v) for k, v in params.items() if k not in {"uname", "upass"}))
+        with self._lock:
+            cached = self._rendered.get(key)
+        if cached is not None:
+            return 200, cached
+        device_id = params.get("id")
+        from_time = int(params["fromTime"]) if params.get("fromTime") else None
+        to_time = int(params["toTime"]) if params.get("toTime") else None
+        if device_id or from_time or params.get("includeAll") == "true":
+            devices = [self.by_id[device_id]] if device_id in self.by_id else ([] if device_id else self.fleet)
+            parts = []
+            for device in devices:
+                utcs = self.utcs[device["id"]]
+                lo = bisect_left(utcs, from_time) if from_time else 0
+                hi = bisect_right(utcs, to_time) if to_time else len(utcs)
+                parts.append(device_xml(device, device["readings"][lo:hi]))
+            body = f'<?xml version="1.0" encoding="UTF-8"?><devices>{"".join(parts)}</devices>'
+        else:
+            body = fleet_xml(self.fleet)
+        with self._lock:
+            self._rendered[key] = body
+        return 200, body
+
+    def start(self) -> "FakeBluConsole":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != DEVICES_PATH:
+                    self.send_error(404)
+                    return
+                fake.calls += 1
+                if fake.latency:
+                    threading.Event().wait(fake.latency)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                status, body = fake.render(params)
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/xml; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
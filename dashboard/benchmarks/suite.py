@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import Callable
+
+import django
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, override_settings
+
+from .data import INTERVAL_SECONDS, fleet_xml, make_csv, make_fleet, make_xlsx
+from .fake_blu import FakeBluConsole
+
+OWNER = "bench@example.com"
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 1) -> dict:
+    """Wall-clock timings for ``fn`` in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return _stats(samples)
+
+
+def _stats(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min": round(samples[0], 3),
+        "median": round(statistics.median(samples), 3),
+        "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "mean": round(statistics.fmean(samples), 3),
+        "max": round(samples[-1], 3),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except Exception:  # noqa: BLE001
+        return None
+    return out.stdout.strip() or None
+
+
+def _selected(name: str, only: list[str] | None) -> bool:
+    return not only or any(name.startswith(prefix) for prefix in only)
+
+
+def _parser_cases(fleet: list[dict], xlsx: bytes, csv: bytes) -> dict[str, Callable[[], object]]:
+    from ..services import ingest
+    from ..utils.blu_xml import parse_devices, parse_measurements
+
+    devices_xml = fleet_xml(fleet)
+    history_xml = fleet_xml(fleet, history=True)
+    first_id = fleet[0]["id"]
+    return {
+        "parse.devices": lambda: parse_devices(devices_xml),
+        "parse.measurements.fleet": lambda: parse_measurements(history_xml),
+        "parse.measurements.device": lambda: parse_measurements(history_xml, device_id=first_id),
+        "xlsx.parse_dataset": lambda: ingest.parse_dataset("bench.xlsx", xlsx),
+        "xlsx.summarize": lambda: ingest.summarize("bench.xlsx", xlsx),
+        "csv.parse_dataset": lambda: ingest.parse_dataset("bench.csv", csv),
+        "csv.summarize": lambda: ingest.summarize("bench.csv", csv),
+    }
+
+
+def _json_cases(fleet: list[dict], xlsx: bytes) -> dict[str, Callable[[], object]]:
+    import json
+
+    from django.core.serializers.json import DjangoJSONEncoder
+
+    from ..utils.blu_xml import parse_measurements
+    from ..services import ingest
+    from ..utils.responses import dumps
+
+    payloads = {
+        "measurements": {"points": parse_measurements(fleet_xml(fleet, history=True))},
+        "upload": {"upload": {**ingest.parse_dataset("bench.xlsx", xlsx), "created_at": datetime.now(dt_timezone.utc)}},
+    }
+    cases = {}
+    for name, payload in payloads.items():
+        cases[f"json.stdlib.{name}"] = lambda p=payload: json.dumps(p, cls=DjangoJSONEncoder).encode("utf-8")
+        cases[f"json.fast.{name}"] = lambda p=payload: dumps(p)
+    return cases
+
+
+def _compression_cases(fleet: list[dict], xlsx: bytes) -> dict[str, tuple[Callable[[], object], int, int]]:
+    """Compression timing cases as name -> (fn, raw_bytes, compressed_bytes)."""
+    from ..utils.blu_xml import parse_measurements
+    from ..utils.compression import brotli, compress
+    from ..services import ingest
+    from ..utils.responses import dumps
+
+    device_day = parse_measurements(fleet_xml(fleet[:1], history=True))[-288:]
+    bodies = {
+        "device_day": dumps({"points": device_day}),
+        "fleet_history": dumps({"points": parse_measurements(fleet_xml(fleet, history=True))}),
+        "upload": dumps({"upload": ingest.parse_dataset("bench.xlsx", xlsx)}),
+    }
+    settings_by_name = {"gzip6": ("gzip", {"gzip_level": 6}), "gzip1": ("gzip", {"gzip_level": 1})}
+    if brotli is not None:
+        settings_by_name["br4"] = ("br", {"br_quality": 4})
+    cases = {}
+    for body_name, body in bodies.items():
+        for label, (encoding, kwargs) in settings_by_name.items():
+            fn = lambda b=body, e=encoding, k=kwargs: compress(b, e, **k)  # noqa: E731
+            cases[f"compress.{label}.{body_name}"] = (fn, len(body), len(fn()))
+    return cases
+
+
+def _view_cases(client: Client, fleet: list[dict], xlsx: bytes) -> dict[str, Callable[[], object]]:
+    first = fleet[0]
+    last_utc = first["readings"][-1][0]
+    day_ago = last_utc - 86400
+
+    def get(url: str):
+        def call():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {url} returned {response.status_code}: {response.content[:200]!r}")
+            return response
+
+        return call
+
+    def post_upload():
+        upload = SimpleUploadedFile("bench.xlsx", xlsx, content_type="application/vnd.ms-excel")
+        response = client.post("/api/uploads/", {"file": upload})
+        if response.status_code != 200:
+            raise RuntimeError(f"Upload failed: {response.content[:200]!r}")
+        return response
+
+    post_upload()
+    upload_id = client.get("/api/uploads/").json()["uploads"][0]["id"]
+    return {
+        "view.blu.devices": get("/api/blu/devices/"),
+        "view.blu.measurements.device_day": get(f"/api/blu/measurements/?id={first['id']}&fromTime={day_ago}"),
+        "view.blu.measurements.device_all": get(f"/api/blu/measurements/?id={first['id']}&includeAll=true"),
+        "view.blu.measurements.fleet_all": get("/api/blu/measurements/?includeAll=true"),
+        "view.uploads.post": post_upload,
+        "view.uploads.list": get("/api/uploads/"),
+        "view.uploads.detail": get(f"/api/uploads/{upload_id}/"),
+    }
+
+
+# Runs in a fresh interpreter: import the WSGI app the way gunicorn does,
+# optionally warm it like the post_fork hook, then serve one request.
+STARTUP_SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "poultry_dashboard.settings")
+from poultry_dashboard.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+out = {"import": time.perf_counter() - start}
+from django.test import Client
+from django.test.utils import setup_test_environment
+setup_test_environment()
+if sys.argv[1] == "warm":
+    from dashboard import warmup
+    mark = time.perf_counter()
+    warmup.preload_modules()
+    warmup.warm_worker()
+    out["warmup"] = time.perf_counter() - mark
+mark = time.perf_counter()
+assert Client().get("/faq/").status_code == 200
+out["first_request"] = time.perf_counter() - mark
+print(json.dumps(out))
+"""
+
+
+def _cold_start(repeat: int) -> dict[str, dict]:
+    """Startup phases of a new web worker, cold and with the gunicorn warmup, in milliseconds."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{Path(tmp) / 'startup.sqlite3'}"}
+        samples: dict[str, list[float]] = {}
+        for mode in ("cold", "warm"):
+            for _ in range(repeat):
+                start = time.perf_counter()
+                out = subprocess.run(
+                    [sys.executable, "-c", STARTUP_SCRIPT, mode],
+                    cwd=settings.BASE_DIR,
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    timeout=120,
+                    check=True,
+                )
+                total = (time.perf_counter() - start) * 1000
+                phases = json.loads(out.stdout.strip().splitlines()[-1])
+                samples.setdefault(f"startup.{mode}.process", []).append(total)
+                for phase, seconds in phases.items():
+                    samples.setdefault(f"startup.{mode}.{phase}", []).append(seconds * 1000)
+    return {name: _stats(values) for name, values in samples.items()}
+
+
+def run(
+    devices: int = 50,
+    points: int = 2016,
+    xlsx_rows: int = 5000,
+    repeat: int = 10,
+    latency_ms: float = 0.0,
+    only: list[str] | None = None,
+    seed: int = 0,
+) -> dict:
+    """Run the suite against the current database connection (use a throwaway database)."""
+    end_utc = int(time.time()) // INTERVAL_SECONDS * INTERVAL_SECONDS
+    fleet = make_fleet(devices, points, end_utc, seed=seed)
+    xlsx = make_xlsx(xlsx_rows, seed=seed)
+    csv = make_csv(xlsx_rows, seed=seed)
+    results: dict[str, dict] = {}
+
+    for name, fn in _parser_cases(fleet, xlsx, csv).items():
+        if _selected(name, only):
+            results[name] = measure(fn, repeat)
+
+    with override_settings(FAST_JSON_ENABLED=True):
+        for name, fn in _json_cases(fleet, xlsx).items():
+            if _selected(name, only):
+                results[name] = measure(fn, repeat)
+
+    for name, (fn, raw, compressed) in _compression_cases(fleet, xlsx).items():
+        if _selected(name, only):
+            results[name] = {**measure(fn, repeat), "bytes": raw, "compressedBytes": compressed,
+                             "ratio": round(compressed / raw, 4) if raw else None}
+
+    if not only or any(prefix.startswith("startup") for prefix in only):
+        results.update({name: stats for name, stats in _cold_start(repeat).items() if _selected(name, only)})
+
+    upstream_calls = 0
+    if not only or any(prefix.startswith("view") for prefix in only):
+        # Time the full upstream path: no cached (stale-while-revalidate)
+        # results and no per-account rate limiting.
+        with FakeBluConsole(fleet, latency=latency_ms / 1000) as fake, override_settings(
+            BLU_BASE=fake.base_url,
+            BLU_RATE_PER_SECOND=0,
+            BLU_DEVICES_MAX_STALE_SECONDS=0,
+            BLU_MEASUREMENTS_MAX_STALE_SECONDS=0,
+        ):
+            client = Client()
+            session = client.session
+            session["owner_key"] = OWNER
+            session["blu_creds"] = {"uname": "bench", "upass": "bench"}
+            session.save()
+            for name, fn in _view_cases(client, fleet, xlsx).items():
+                if _selected(name, only):
+                    results[name] = measure(fn, repeat)
+            upstream_calls = fake.calls
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(dt_timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "machine": platform.machine(),
+        },
+        "params": {
+            "devices": devices,
+            "points": points,
+            "xlsx_rows": xlsx_rows,
+            "repeat": repeat,
+            "latency_ms": latency_ms,
+            "seed": seed,
+        },
+        "upstream_calls": upstream_calls,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict) -> list[tuple[str, float | None, float | None, float | None]]:
+    """Median timings for each current case as (name, baseline_ms, current_ms, percent_change)."""
+    rows = []
+    for name in current.get("results", {}):
+        old = baseline.get("results", {}).get(name, {}).get("median")
+        new = current.get("results", {}).get(name, {}).get("median")
+        change = round((new - old) / old * 100, 1) if old and new is not None else None
+        rows.append((name, old, new, change))
+    return rows
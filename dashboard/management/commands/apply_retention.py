@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.services import purge
+
+
+class Command(BaseCommand):
+    help = "Delete chat sessions, uploads, finished jobs and request profiles past their retention limits."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Count what would be deleted.")
+        parser.add_argument("--batch-size", type=int, default=None, help="Rows per delete (default PURGE_BATCH_SIZE).")
+
+    def handle(self, *args, **options):
+        counts = purge.apply_retention(dry_run=options["dry_run"], batch_size=options["batch_size"])
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        if not counts:
+            self.stdout.write("No retention rules are enabled.")
+        for name, count in counts.items():
+            self.stdout.write(f"{verb} {count} {name.replace('_', ' ')}.")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.services import alerts
+
+
+class Command(BaseCommand):
+    help = "Re-evaluate stale check-in alerts for every known logger (no upstream calls)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--account", default=None, help="Limit to one BluConsole account.")
+
+    def handle(self, *args, **options):
+        count = alerts.sweep_stale(account=options["account"])
+        self.stdout.write(f"Evaluated {count} loggers.")
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dashboard.services import profiler
+
+
+class Command(BaseCommand):
+    help = "Print a signed X-Profile-Token header value for profiling requests on demand."
+
+    def handle(self, *args, **options):
+        if not settings.PROFILER_ENABLED:
+            self.stderr.write("PROFILER_ENABLED is off; the token is ignored until it is set.")
+        self.stdout.write(f"{profiler.HEADER}: {profiler.make_token()}")
+        self.stdout.write(f"Valid for {settings.PROFILER_TOKEN_MAX_AGE_SECONDS} seconds.")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.models import UploadDataset
+from dashboard.services import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild hourly/daily rollups for stored upload datasets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owner", default=None, help="Limit to one owner_key.")
+
+    def handle(self, *args, **options):
+        uploads = UploadDataset.objects.all()
+        if options["owner"]:
+            uploads = uploads.filter(owner_key=options["owner"])
+        count = 0
+        for upload in uploads.iterator(chunk_size=20):
+            rollups.rollup_upload(upload)
+            count += 1
+        self.stdout.write(f"Rebuilt rollups for {count} uploads.")
@@ -0,0 +1,79 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from dashboard.benchmarks import suite
+
+
+class Command(BaseCommand):
+    help = "Time parsing, web worker cold start and the BluConsole/upload API views against a local fake BluConsole."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--devices", type=int, default=50, help="Loggers in the synthetic fleet.")
+        parser.add_argument("--points", type=int, default=2016, help="Readings per logger (5 minute spacing).")
+        parser.add_argument("--xlsx-rows", type=int, default=5000, help="Rows in the synthetic XLSX and CSV exports.")
+        parser.add_argument("--repeat", type=int, default=10, help="Timed runs per case.")
+        parser.add_argument("--latency-ms", type=float, default=0.0, help="Artificial upstream latency.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--only",
+            action="append",
+            default=None,
+            help="Run cases whose name starts with this prefix (repeatable), e.g. parse. or view.blu.",
+        )
+        parser.add_argument("--output", default=None, help="Result file (default .benchmarks/<commit>-<time>.json).")
+        parser.add_argument("--compare", default=None, help="Earlier result file to compare medians against.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = json.loads(Path(options["compare"]).read_text(encoding="utf-8"))
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Unable to read {options['compare']}: {exc}") from exc
+
+        # Views write uploads, alerts and rollups, so run against a throwaway database.
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            result = suite.run(
+                devices=options["devices"],
+                points=options["points"],
+                xlsx_rows=options["xlsx_rows"],
+                repeat=options["repeat"],
+                latency_ms=options["latency_ms"],
+                only=options["only"],
+                seed=options["seed"],
+            )
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        output = options["output"]
+        if not output:
+            stamp = result["meta"]["timestamp"].replace(":", "").replace("-", "")[:15]
+            output = Path(settings.BASE_DIR) / ".benchmarks" / f"{result['meta']['commit'] or 'local'}-{stamp}.json"
+        output = Path(output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+        width = max((len(name) for name in result["results"]), default=10)
+        for name, stats in result["results"].items():
+            line = f"{name:<{width}}  median {stats['median']:>10.3f} ms  p95 {stats['p95']:>10.3f} ms"
+            if "compressedBytes" in stats:
+                line += f"  {stats['bytes']} -> {stats['compressedBytes']} bytes"
+            self.stdout.write(line)
+        if baseline:
+            self.stdout.write("")
+            self.stdout.write(f"Compared with {baseline.get('meta', {}).get('commit') or options['compare']}:")
+            for name, old, new, change in suite.compare(baseline, result):
+                old_ms = f"{old:.3f}" if old is not None else "-"
+                new_ms = f"{new:.3f}" if new is not None else "-"
+                delta = f"{change:+.1f}%" if change is not None else "n/a"
+                self.stdout.write(f"{name:<{width}}  {old_ms:>10} ms -> {new_ms:>10} ms  {delta}")
+        self.stdout.write(f"Wrote {output}")
@@ -0,0 +1,50 @@
+import os
+import signal
+import socket
+import threading
+from time import monotonic
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dashboard.services import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (upload parsing, attachment summaries) from the database queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=2, help="Jobs this process runs at once.")
+        parser.add_argument("--kind", action="append", default=None, help="Only run jobs of this kind (repeatable).")
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit instead of polling.")
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        if not options["once"]:
+            signal.signal(signal.SIGTERM, lambda *_: stop.set())
+            signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale jobs.")
+
+        name = f"{socket.gethostname()}:{os.getpid()}"
+        counts = []
+        workers = [
+            threading.Thread(
+                target=lambda n=n: counts.append(jobs.work(f"{name}:{n}", stop, options["kind"], options["once"])),
+                name=f"job-worker-{n}",
+            )
+            for n in range(max(1, options["concurrency"]))
+        ]
+        for worker in workers:
+            worker.start()
+        # Sweep for jobs abandoned by crashed workers while this one runs.
+        sweep_at = monotonic() + settings.JOB_LEASE_SECONDS / 2
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(timeout=1)
+                if monotonic() >= sweep_at:
+                    jobs.requeue_stale()
+                    sweep_at = monotonic() + settings.JOB_LEASE_SECONDS / 2
+        self.stdout.write(f"Ran {sum(counts)} jobs.")
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import logging
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils.cache import patch_vary_headers
+
+from .services import profiler
+from .utils import compression, metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _time_query(execute, sql, params, many, context):
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record("db", perf_counter() - start)
+
+
+class PerfMiddleware:
+    """Per-request Server-Timing header and latency histograms.
+
+    Disabled unless PERF_METRICS_ENABLED is set, in which case Django drops the
+    middleware entirely and the timing hooks reduce to a flag check.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERF_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        metrics.enabled = True
+        metrics.directory = settings.PERF_METRICS_DIR
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics.begin_request()
+        start = perf_counter()
+        try:
+            with connection.execute_wrapper(_time_query):
+                response = self.get_response(request)
+        finally:
+            elapsed = perf_counter() - start
+            timings = metrics.end_request()
+            match = getattr(request, "resolver_match", None)
+            endpoint = (match.url_name or match.view_name) if match else "unmatched"
+            metrics.observe_request(endpoint, request.method, elapsed)
+            metrics.flush()
+        # Streamed responses (exports) report time to first byte only.
+        response["Server-Timing"] = metrics.server_timing(timings, elapsed)
+        return response
+
+
+# Photos and other binary payloads are already compressed.
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+class ApiCompressionMiddleware:
+    """Negotiated brotli/gzip for /api/ responses above API_COMPRESSION_MIN_BYTES.
+
+    Static files are already pre-compressed by WhiteNoise. Streamed responses
+    are compressed per chunk with a flush.
+    """
+
+    def __init__(self, get_response):
+        if not settings.API_COMPRESSION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not request.path.startswith("/api/") or response.status_code != 200:
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+        content_type = response.get("Content-Type", "")
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = compression.choose_encoding(request.headers.get("Accept-Encoding", ""))
+        if not encoding:
+            return response
+        level = settings.API_GZIP_LEVEL
+        quality = settings.API_BROTLI_QUALITY
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(
+                response.streaming_content, encoding, gzip_level=level, br_quality=quality
+            )
+            del response["Content-Length"]
+        else:
+            if len(response.content) < settings.API_COMPRESSION_MIN_BYTES:
+                return response
+            with metrics.timed("compress"):
+                compressed = compression.compress(response.content, encoding, gzip_level=level, br_quality=quality)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+        # The body differs per encoding, so a strong validator would be wrong.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
+
+
+class ProfilerMiddleware:
+    """cProfile a single request on demand and store the result as a RequestProfile.
+
+    Requests opt in with a signed X-Profile-Token header, a ``?_profile``
+    flag from a staff user, or PROFILER_SAMPLE_RATE sampling of
+    PROFILER_SAMPLE_PATHS. Listed last so ``request.user`` is available and
+    the profile covers the view rather than the middleware stack.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = profiler.trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        memory = request.path.startswith(tuple(settings.PROFILER_MEMORY_PATHS))
+        with connection.execute_wrapper(count), profiler.Capture(memory=memory) as capture:
+            response = self.get_response(request)
+        match = getattr(request, "resolver_match", None)
+        endpoint = (match.url_name or match.view_name) if match else "unmatched"
+        try:
+            record = profiler.save(capture, request, response, trigger, endpoint, queries)
+        except Exception:  # noqa: BLE001
+            logger.exception("Unable to store profile for %s", request.path)
+            return response
+        response["X-Profile-Id"] = str(record.pk)
+        return response
@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_chatmessage_chatsession_chatattachment_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Alert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account', models.CharField(max_length=255)),
+                ('device_id', models.CharField(max_length=64)),
+                ('kind', models.CharField(choices=[('out_of_range', 'Out of range'), ('stale', 'Stale check-in'), ('low_battery', 'Low battery'), ('shelf_life', 'Shelf-life loss')], max_length=20)),
+                ('status', models.CharField(blank=True, max_length=20)),
+                ('message', models.CharField(max_length=255)),
+                ('value', models.FloatField(blank=True, null=True)),
+                ('details', models.JSONField(default=dict)),
+                ('active', models.BooleanField(default=True)),
+                ('first_seen_at', models.DateTimeField(auto_now_add=True)),
+                ('last_seen_at', models.DateTimeField()),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account', 'updated_at'], name='dashboard_alert_acct_upd')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('active', True)), fields=('account', 'device_id', 'kind'), name='dashboard_alert_one_active')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LoggerState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account', models.CharField(max_length=255)),
+                ('device_id', models.CharField(max_length=64)),
+                ('device_type', models.CharField(blank=True, max_length=10)),
+                ('label', models.CharField(blank=True, max_length=255)),
+                ('org', models.CharField(blank=True, max_length=255)),
+                ('min_temp', models.FloatField(blank=True, null=True)),
+                ('max_temp', models.FloatField(blank=True, null=True)),
+                ('battery', models.FloatField(blank=True, null=True)),
+                ('last_utc', models.BigIntegerField(blank=True, null=True)),
+                ('last_temp', models.FloatField(blank=True, null=True)),
+                ('last_humidity', models.FloatField(blank=True, null=True)),
+                ('shelf_life_loss', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('account', 'device_id'), name='dashboard_loggerstate_account_device')],
+            },
+        ),
+    ]
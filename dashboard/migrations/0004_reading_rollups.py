@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_alerts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account', models.CharField(max_length=255)),
+                ('series', models.CharField(max_length=96)),
+                ('bucket', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=4)),
+                ('start', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('t_min', models.FloatField(blank=True, null=True)),
+                ('t_max', models.FloatField(blank=True, null=True)),
+                ('t_sum', models.FloatField(default=0.0)),
+                ('seconds_above', models.FloatField(default=0.0)),
+                ('limit', models.FloatField(blank=True, null=True)),
+                ('upload', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='dashboard.uploaddataset')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('account', 'series', 'bucket', 'start'), name='dashboard_rollup_series_bucket_start')],
+            },
+        ),
+    ]
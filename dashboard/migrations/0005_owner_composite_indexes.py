@@ -0,0 +1,61 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_reading_rollups'),
+    ]
+
+    operations = [
+        # Composite indexes first; the single-column indexes they supersede
+        # are dropped afterwards.
+        migrations.AddIndex(
+            model_name='chatattachment',
+            index=models.Index(fields=['message', '-created_at'], name='chatattach_message_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['session', 'created_at'], name='chatmessage_session_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatsession',
+            index=models.Index(fields=['owner_key', '-updated_at'], name='chatsession_owner_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['owner_key', '-updated_at', '-created_at'], name='note_owner_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='uploaddataset',
+            index=models.Index(fields=['owner_key', '-created_at'], name='upload_owner_created_idx'),
+        ),
+        migrations.AlterField(
+            model_name='chatattachment',
+            name='message',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='attachments', to='dashboard.chatmessage'),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='session',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='dashboard.chatsession'),
+        ),
+        migrations.AlterField(
+            model_name='chatsession',
+            name='owner_key',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='note',
+            name='owner_key',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='uploaddataset',
+            name='owner_key',
+            field=models.CharField(max_length=255),
+        ),
+    ]
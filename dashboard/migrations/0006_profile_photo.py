@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_photos(apps, schema_editor):
+    Profile = apps.get_model("dashboard", "Profile")
+    ProfilePhoto = apps.get_model("dashboard", "ProfilePhoto")
+    profiles = Profile.objects.exclude(photo_data_url="").only("id", "photo_data_url")
+    for profile in profiles.iterator(chunk_size=50):
+        ProfilePhoto.objects.create(profile_id=profile.id, data_url=profile.photo_data_url)
+
+
+def restore_photos(apps, schema_editor):
+    Profile = apps.get_model("dashboard", "Profile")
+    ProfilePhoto = apps.get_model("dashboard", "ProfilePhoto")
+    for photo in ProfilePhoto.objects.iterator(chunk_size=50):
+        Profile.objects.filter(id=photo.profile_id).update(photo_data_url=photo.data_url)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_owner_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfilePhoto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_url', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='photo', to='dashboard.profile')),
+            ],
+        ),
+        migrations.RunPython(copy_photos, restore_photos),
+        migrations.RemoveField(
+            model_name='profile',
+            name='photo_data_url',
+        ),
+    ]
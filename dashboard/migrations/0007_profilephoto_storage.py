@@ -0,0 +1,104 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:00
+
+import base64
+import binascii
+import hashlib
+
+from django.db import migrations, models
+
+# Copied from services.photos as of this migration; migrations must not
+# import live app code, which is free to change later.
+EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+
+
+def decode_data_url(data_url):
+    header, sep, payload = data_url.partition(",")
+    if not sep or not header.startswith("data:") or ";base64" not in header:
+        raise ValueError("not a base64 data URL")
+    mime = header[5:].split(";")[0].lower()
+    if mime not in EXTENSIONS:
+        raise ValueError("unsupported type")
+    try:
+        return mime, base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError) as exc:
+        raise ValueError("invalid base64") from exc
+
+
+def data_url_to_bytes(apps, schema_editor):
+    # Only the database is touched: the image files and thumbnails are
+    # written on first request by services.photos.
+    ProfilePhoto = apps.get_model("dashboard", "ProfilePhoto")
+    for photo in ProfilePhoto.objects.iterator(chunk_size=50):
+        try:
+            photo.mime, photo.data = decode_data_url(photo.data_url)
+        except ValueError:
+            # Not servable, but kept verbatim (mime "") so the reverse restores it.
+            photo.mime, photo.data = "", photo.data_url.encode("utf-8")
+        photo.content_hash = hashlib.sha256(photo.data).hexdigest()
+        photo.save(update_fields=["mime", "data", "content_hash"])
+
+
+def bytes_to_data_url(apps, schema_editor):
+    ProfilePhoto = apps.get_model("dashboard", "ProfilePhoto")
+    for photo in ProfilePhoto.objects.iterator(chunk_size=50):
+        raw = bytes(photo.data)
+        if photo.mime:
+            photo.data_url = f"data:{photo.mime};base64,{base64.b64encode(raw).decode('ascii')}"
+        else:
+            photo.data_url = raw.decode("utf-8")
+        photo.save(update_fields=["data_url"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_profile_photo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profilephoto',
+            name='content_hash',
+            field=models.CharField(db_index=True, default='', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='profilephoto',
+            name='mime',
+            field=models.CharField(default='', max_length=60),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='profilephoto',
+            name='data',
+            field=models.BinaryField(default=b''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='profilephoto',
+            name='image',
+            field=models.FileField(blank=True, upload_to='profile_photos/'),
+        ),
+        migrations.AddField(
+            model_name='profilephoto',
+            name='thumbnails',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunPython(data_url_to_bytes, bytes_to_data_url),
+        # Only so unapplying can re-add the column before bytes_to_data_url fills it.
+        migrations.AlterField(
+            model_name='profilephoto',
+            name='data_url',
+            field=models.TextField(default=''),
+        ),
+        # Lossless: data (with mime) holds everything data_url did.
+        migrations.RemoveField(
+            model_name='profilephoto',
+            name='data_url',
+        ),
+    ]
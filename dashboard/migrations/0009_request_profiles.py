@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0008_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=120)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=255)),
+                ('owner_key', models.CharField(blank=True, max_length=255)),
+                ('trigger', models.CharField(choices=[('header', 'Signed header'), ('staff', 'Staff flag'), ('sample', 'Sampled')], max_length=10)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('duration_ms', models.FloatField()),
+                ('cpu_ms', models.FloatField()),
+                ('queries', models.PositiveIntegerField(default=0)),
+                ('memory_peak_bytes', models.BigIntegerField(blank=True, null=True)),
+                ('summary', models.TextField(blank=True)),
+                ('stats_file', models.FileField(upload_to='profiles/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-created_at'], name='profile_created_idx'), models.Index(fields=['endpoint', '-created_at'], name='profile_endpoint_idx')],
+            },
+        ),
+    ]
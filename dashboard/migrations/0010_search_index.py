@@ -0,0 +1,135 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:10
+
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FTS_TABLE = "dashboard_search_fts"
+
+SQLITE_FORWARD = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        owner_tag, title, body,
+        content='dashboard_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER dashboard_search_ai AFTER INSERT ON dashboard_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, owner_tag, title, body) VALUES (new.id, new.owner_tag, new.title, new.body);
+    END""",
+    f"""CREATE TRIGGER dashboard_search_ad AFTER DELETE ON dashboard_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, owner_tag, title, body)
+        VALUES ('delete', old.id, old.owner_tag, old.title, old.body);
+    END""",
+    f"""CREATE TRIGGER dashboard_search_au AFTER UPDATE ON dashboard_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, owner_tag, title, body)
+        VALUES ('delete', old.id, old.owner_tag, old.title, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, owner_tag, title, body) VALUES (new.id, new.owner_tag, new.title, new.body);
+    END""",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS dashboard_search_au",
+    "DROP TRIGGER IF EXISTS dashboard_search_ad",
+    "DROP TRIGGER IF EXISTS dashboard_search_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+POSTGRES_FORWARD = [
+    """CREATE INDEX dashboard_search_tsv_idx ON dashboard_searchdocument
+    USING gin (to_tsvector('english', title || ' ' || body))""",
+]
+POSTGRES_BACKWARD = ["DROP INDEX IF EXISTS dashboard_search_tsv_idx"]
+
+
+def _run(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def create_fulltext(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == "sqlite":
+        try:
+            _run(schema_editor, SQLITE_FORWARD)
+        except Exception:  # noqa: BLE001
+            # SQLite built without FTS5: services.search falls back to LIKE.
+            pass
+
+
+def drop_fulltext(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _run(schema_editor, POSTGRES_BACKWARD)
+    elif vendor == "sqlite":
+        _run(schema_editor, SQLITE_BACKWARD)
+
+
+def backfill(apps, schema_editor):
+    # Mirrors services.search; migrations must not import the live models.
+    SearchDocument = apps.get_model("dashboard", "SearchDocument")
+    Note = apps.get_model("dashboard", "Note")
+    ChatMessage = apps.get_model("dashboard", "ChatMessage")
+    UploadDataset = apps.get_model("dashboard", "UploadDataset")
+
+    def tag(owner):
+        return "o" + hashlib.sha256(owner.encode("utf-8")).hexdigest()[:20]
+
+    docs = []
+
+    def add(doc):
+        docs.append(doc)
+        if len(docs) >= 500:
+            SearchDocument.objects.bulk_create(docs)
+            docs.clear()
+
+    for note in Note.objects.iterator(chunk_size=500):
+        add(SearchDocument(
+            owner_key=note.owner_key, owner_tag=tag(note.owner_key), kind="note", note_id=note.pk,
+            title=note.title[:255], body=note.body, created_at=note.updated_at or note.created_at,
+        ))
+    messages = ChatMessage.objects.select_related("session").exclude(content="")
+    for msg in messages.iterator(chunk_size=500):
+        owner = msg.session.owner_key
+        add(SearchDocument(
+            owner_key=owner, owner_tag=tag(owner), kind="chat", message_id=msg.pk, session_id=msg.session_id,
+            title=msg.session.title[:255], body=msg.content, created_at=msg.created_at,
+        ))
+    uploads = UploadDataset.objects.only("owner_key", "name", "headers", "created_at")
+    for up in uploads.iterator(chunk_size=500):
+        add(SearchDocument(
+            owner_key=up.owner_key, owner_tag=tag(up.owner_key), kind="upload", upload_id=up.pk,
+            title=up.name[:255], body=" ".join(str(h) for h in up.headers or []), created_at=up.created_at,
+        ))
+    SearchDocument.objects.bulk_create(docs)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0009_request_profiles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_key', models.CharField(max_length=255)),
+                ('owner_tag', models.CharField(max_length=24)),
+                ('kind', models.CharField(choices=[('note', 'Note'), ('chat', 'Chat message'), ('upload', 'Upload')], max_length=10)),
+                ('session_id', models.BigIntegerField(blank=True, null=True)),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('body', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('message', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dashboard.chatmessage')),
+                ('note', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dashboard.note')),
+                ('upload', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dashboard.uploaddataset')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner_key', 'kind', '-created_at'], name='searchdoc_owner_kind_idx')],
+            },
+        ),
+        migrations.RunPython(create_fulltext, drop_fulltext),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
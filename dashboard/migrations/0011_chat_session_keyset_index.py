@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0010_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='chatsession',
+            name='chatsession_owner_upd_idx',
+        ),
+        migrations.AddIndex(
+            model_name='chatsession',
+            index=models.Index(fields=['owner_key', '-updated_at', '-id'], name='chatsession_owner_upd_idx'),
+        ),
+    ]
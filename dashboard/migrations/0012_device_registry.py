@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0011_chat_session_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loggerstate',
+            name='in_fleet',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='loggerstate',
+            name='vrn',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='loggerstate',
+            index=models.Index(fields=['account', 'label'], name='loggerstate_account_label_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loggerstate',
+            index=models.Index(fields=['account', 'device_type'], name='loggerstate_account_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loggerstate',
+            index=models.Index(fields=['account', 'org'], name='loggerstate_account_org_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:40
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+UNFINISHED = ("queued", "running")
+
+
+def files_to_data(apps, schema_editor):
+    # Finished jobs no longer have a file; unfinished ones bring theirs along
+    # when it is still on this machine (otherwise they fail as unreadable).
+    Job = apps.get_model("dashboard", "Job")
+    for job in Job.objects.filter(status__in=UNFINISHED).exclude(file=""):
+        try:
+            with default_storage.open(job.file.name, "rb") as fh:
+                job.data = fh.read()
+        except FileNotFoundError:
+            continue
+        job.save(update_fields=["data"])
+        default_storage.delete(job.file.name)
+
+
+def data_to_files(apps, schema_editor):
+    Job = apps.get_model("dashboard", "Job")
+    for job in Job.objects.filter(status__in=UNFINISHED, data__isnull=False):
+        job.file.name = default_storage.save(f"jobs/job-{job.pk}", ContentFile(bytes(job.data)))
+        job.save(update_fields=["file"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0012_device_registry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='data',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(files_to_data, data_to_files),
+        migrations.RemoveField(
+            model_name='job',
+            name='file',
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:20
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def files_to_stats(apps, schema_editor):
+    # Profiles whose file is already gone (e.g. lost in a redeploy) carry no
+    # data worth keeping, so they are dropped rather than left undownloadable.
+    RequestProfile = apps.get_model("dashboard", "RequestProfile")
+    for profile in RequestProfile.objects.iterator(chunk_size=50):
+        try:
+            with default_storage.open(profile.stats_file.name, "rb") as fh:
+                profile.stats = fh.read()
+        except (FileNotFoundError, ValueError):
+            profile.delete()
+            continue
+        profile.save(update_fields=["stats"])
+        default_storage.delete(profile.stats_file.name)
+
+
+def stats_to_files(apps, schema_editor):
+    RequestProfile = apps.get_model("dashboard", "RequestProfile")
+    for profile in RequestProfile.objects.iterator(chunk_size=50):
+        name = default_storage.save(f"profiles/{profile.endpoint[:60] or 'request'}.prof", ContentFile(bytes(profile.stats)))
+        RequestProfile.objects.filter(pk=profile.pk).update(stats_file=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0013_job_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requestprofile',
+            name='stats',
+            field=models.BinaryField(default=b''),
+            preserve_default=False,
+        ),
+        migrations.RunPython(files_to_stats, stats_to_files),
+        # Only so unapplying can re-add the column before stats_to_files fills it.
+        migrations.AlterField(
+            model_name='requestprofile',
+            name='stats_file',
+            field=models.FileField(default='', upload_to='profiles/'),
+        ),
+        migrations.RemoveField(
+            model_name='requestprofile',
+            name='stats_file',
+        ),
+    ]
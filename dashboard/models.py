@@ -6,62 +6,340 @@ class Profile(models.Model):
     first_name = models.CharField(max_length=120, blank=True)
     last_name = models.CharField(max_length=120, blank=True)
     email = models.EmailField(blank=True)
-    photo_data_url = models.TextField(blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return f"{self.owner_key} profile"
 
 
+class ProfilePhoto(models.Model):
+    # Kept out of Profile so name/email reads never drag the image along.
+    profile = models.OneToOneField(Profile, on_delete=models.CASCADE, related_name="photo")
+    # sha256 of the original bytes; also the file name and the public URL key.
+    content_hash = models.CharField(max_length=64, db_index=True)
+    mime = models.CharField(max_length=60)
+    # The original bytes. The files below are a cache of them that
+    # services.photos rebuilds when media storage has lost them (e.g. after
+    # a redeploy onto a fresh filesystem).
+    data = models.BinaryField()
+    image = models.FileField(upload_to="profile_photos/", blank=True)
+    # {"<size>": "<storage name>"} for each generated square thumbnail
+    thumbnails = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.profile_id} photo"
+
+
 class Note(models.Model):
-    owner_key = models.CharField(max_length=255, db_index=True)
+    owner_key = models.CharField(max_length=255)
     title = models.CharField(max_length=200)
     body = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner_key", "-updated_at", "-created_at"], name="note_owner_recent_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.owner_key}: {self.title}"
 
 
 class UploadDataset(models.Model):
-    owner_key = models.CharField(max_length=255, db_index=True)
+    owner_key = models.CharField(max_length=255)
     name = models.CharField(max_length=255)
     headers = models.JSONField(default=list)
     rows = models.JSONField(default=list)
     row_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner_key", "-created_at"], name="upload_owner_created_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.owner_key}: {self.name}"
 
 
 class ChatSession(models.Model):
-    owner_key = models.CharField(max_length=255, db_index=True)
+    owner_key = models.CharField(max_length=255)
     title = models.CharField(max_length=200, default="New chat")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # id breaks updated_at ties for the keyset-paginated session list.
+            models.Index(fields=["owner_key", "-updated_at", "-id"], name="chatsession_owner_upd_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.owner_key}: {self.title}"
 
 
 class ChatMessage(models.Model):
-    session = models.ForeignKey(ChatSession, on_delete=models.CASCADE, related_name="messages")
+    # Indexed through chatmessage_session_idx, which leads with session.
+    session = models.ForeignKey(
+        ChatSession, on_delete=models.CASCADE, related_name="messages", db_index=False
+    )
     role = models.CharField(max_length=20)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["session", "created_at"], name="chatmessage_session_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.session_id} {self.role}"
 
 
 class ChatAttachment(models.Model):
-    message = models.ForeignKey(ChatMessage, on_delete=models.CASCADE, related_name="attachments")
+    message = models.ForeignKey(
+        ChatMessage, on_delete=models.CASCADE, related_name="attachments", db_index=False
+    )
     name = models.CharField(max_length=255)
     mime = models.CharField(max_length=120, blank=True)
     summary = models.JSONField(default=dict)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["message", "-created_at"], name="chatattach_message_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.message_id}: {self.name}"
+
+
+class LoggerState(models.Model):
+    # Also the device registry: refreshed from every device list fetched for
+    # the account (see alerts.observe_devices) and queried by services.registry.
+    account = models.CharField(max_length=255)
+    device_id = models.CharField(max_length=64)
+    device_type = models.CharField(max_length=10, blank=True)
+    label = models.CharField(max_length=255, blank=True)
+    org = models.CharField(max_length=255, blank=True)
+    vrn = models.CharField(max_length=64, blank=True)
+    # False once the logger drops out of the account's device list.
+    in_fleet = models.BooleanField(default=True)
+    min_temp = models.FloatField(null=True, blank=True)
+    max_temp = models.FloatField(null=True, blank=True)
+    battery = models.FloatField(null=True, blank=True)
+    last_utc = models.BigIntegerField(null=True, blank=True)
+    last_temp = models.FloatField(null=True, blank=True)
+    last_humidity = models.FloatField(null=True, blank=True)
+    # Excess equivalent days consumed above the reference temperature.
+    shelf_life_loss = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["account", "device_id"], name="dashboard_loggerstate_account_device"),
+        ]
+        indexes = [
+            models.Index(fields=["account", "label"], name="loggerstate_account_label_idx"),
+            models.Index(fields=["account", "device_type"], name="loggerstate_account_type_idx"),
+            models.Index(fields=["account", "org"], name="loggerstate_account_org_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.account}: {self.device_id}"
+
+
+class Alert(models.Model):
+    KIND_OUT_OF_RANGE = "out_of_range"
+    KIND_STALE = "stale"
+    KIND_LOW_BATTERY = "low_battery"
+    KIND_SHELF_LIFE = "shelf_life"
+    KIND_CHOICES = [
+        (KIND_OUT_OF_RANGE, "Out of range"),
+        (KIND_STALE, "Stale check-in"),
+        (KIND_LOW_BATTERY, "Low battery"),
+        (KIND_SHELF_LIFE, "Shelf-life loss"),
+    ]
+
+    account = models.CharField(max_length=255)
+    device_id = models.CharField(max_length=64)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, blank=True)
+    message = models.CharField(max_length=255)
+    value = models.FloatField(null=True, blank=True)
+    details = models.JSONField(default=dict)
+    active = models.BooleanField(default=True)
+    first_seen_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField()
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "device_id", "kind"],
+                condition=models.Q(active=True),
+                name="dashboard_alert_one_active",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["account", "updated_at"], name="dashboard_alert_acct_upd"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.account}: {self.device_id} {self.kind}"
+
+
+class ReadingRollup(models.Model):
+    BUCKET_HOUR = "hour"
+    BUCKET_DAY = "day"
+    BUCKET_CHOICES = [(BUCKET_HOUR, "Hourly"), (BUCKET_DAY, "Daily")]
+
+    # BluConsole account for live loggers, owner_key for uploaded datasets.
+    account = models.CharField(max_length=255)
+    # "blu:<device id>" or "upload:<dataset id>"
+    series = models.CharField(max_length=96)
+    upload = models.ForeignKey(
+        UploadDataset, null=True, blank=True, on_delete=models.CASCADE, related_name="rollups"
+    )
+    bucket = models.CharField(max_length=4, choices=BUCKET_CHOICES)
+    start = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+    t_min = models.FloatField(null=True, blank=True)
+    t_max = models.FloatField(null=True, blank=True)
+    t_sum = models.FloatField(default=0.0)
+    seconds_above = models.FloatField(default=0.0)
+    limit = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "series", "bucket", "start"], name="dashboard_rollup_series_bucket_start"
+            ),
+        ]
+
+    @property
+    def mean(self) -> float | None:
+        return self.t_sum / self.count if self.count else None
+
+    def __str__(self) -> str:
+        return f"{self.account}: {self.series} {self.bucket} {self.start:%Y-%m-%d %H:%M}"
+
+
+class Job(models.Model):
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    owner_key = models.CharField(max_length=255)
+    kind = models.CharField(max_length=40)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    payload = models.JSONField(default=dict)
+    # Uploaded bytes the job works on; cleared once the job finishes. Kept in
+    # the database so a worker on another machine (no shared media) can read them.
+    data = models.BinaryField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    progress = models.FloatField(default=0.0)
+    message = models.CharField(max_length=255, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField()
+    # Worker holding the job and its last heartbeat; a lapsed lease is requeued.
+    locked_by = models.CharField(max_length=120, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="job_status_run_after_idx"),
+            models.Index(fields=["owner_key", "-created_at"], name="job_owner_created_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class RequestProfile(models.Model):
+    TRIGGER_HEADER = "header"
+    TRIGGER_STAFF = "staff"
+    TRIGGER_SAMPLE = "sample"
+    TRIGGER_CHOICES = [
+        (TRIGGER_HEADER, "Signed header"),
+        (TRIGGER_STAFF, "Staff flag"),
+        (TRIGGER_SAMPLE, "Sampled"),
+    ]
+
+    endpoint = models.CharField(max_length=120)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    owner_key = models.CharField(max_length=255, blank=True)
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    duration_ms = models.FloatField()
+    cpu_ms = models.FloatField()
+    queries = models.PositiveIntegerField(default=0)
+    # tracemalloc peak, recorded for upload paths only
+    memory_peak_bytes = models.BigIntegerField(null=True, blank=True)
+    # Top functions by cumulative time, for reading without downloading
+    summary = models.TextField(blank=True)
+    # marshal'd pstats data, loadable with pstats.Stats / snakeviz. In the
+    # database, like Job.data, so it survives redeploys and every replica sees it.
+    stats = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at"], name="profile_created_idx"),
+            models.Index(fields=["endpoint", "-created_at"], name="profile_endpoint_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.method} {self.path} {self.duration_ms:.0f} ms"
+
+
+class SearchDocument(models.Model):
+    """One searchable record (note, chat message or upload) in the owner's search index.
+
+    The full-text index itself is vendor specific (a GIN expression index on
+    PostgreSQL, an FTS5 table kept in sync by triggers on SQLite) and is
+    created by migration 0010; see services.search.
+    """
+
+    KIND_NOTE = "note"
+    KIND_CHAT = "chat"
+    KIND_UPLOAD = "upload"
+    KIND_CHOICES = [(KIND_NOTE, "Note"), (KIND_CHAT, "Chat message"), (KIND_UPLOAD, "Upload")]
+
+    owner_key = models.CharField(max_length=255)
+    # Hash of owner_key indexed as a single FTS5 token, so the owner filter
+    # is answered by the inverted index rather than a join.
+    owner_tag = models.CharField(max_length=24)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Exactly one source is set; deleting it deletes the document.
+    note = models.OneToOneField(Note, null=True, blank=True, on_delete=models.CASCADE, related_name="+")
+    message = models.OneToOneField(ChatMessage, null=True, blank=True, on_delete=models.CASCADE, related_name="+")
+    upload = models.OneToOneField(UploadDataset, null=True, blank=True, on_delete=models.CASCADE, related_name="+")
+    session_id = models.BigIntegerField(null=True, blank=True)
+    title = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner_key", "kind", "-created_at"], name="searchdoc_owner_kind_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.owner_key}: {self.kind} {self.title[:40]}"
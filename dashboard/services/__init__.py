@@ -1 +1 @@
-from .bluconsole import blu_login, get_devices, get_measurements
+from .bluconsole import blu_login, fetch_devices, fetch_measurements, get_devices, get_measurements
@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from ..models import Alert, LoggerState
+from ..utils.series import MAX_STEP_SECONDS
+from . import bluconsole, rollups
+
+
+def _now_utc() -> int:
+    return int(datetime.now(tz=dt_timezone.utc).timestamp())
+
+
+def _raise(account: str, device_id: str, kind: str, message: str, status: str = "",
+           value: float | None = None, details: dict | None = None) -> Alert:
+    now = timezone.now()
+    fields = {
+        "status": status,
+        "message": message[:255],
+        "value": value,
+        "details": details or {},
+        "last_seen_at": now,
+    }
+    alert = Alert.objects.filter(account=account, device_id=device_id, kind=kind, active=True).first()
+    if alert:
+        changed = any(getattr(alert, k) != v for k, v in fields.items() if k != "last_seen_at")
+        for k, v in fields.items():
+            setattr(alert, k, v)
+        # Only bump updated_at (which drives push delivery) when something visible changed.
+        update_fields = list(fields) + (["updated_at"] if changed else [])
+        alert.save(update_fields=update_fields)
+        return alert
+    try:
+        with transaction.atomic():
+            return Alert.objects.create(account=account, device_id=device_id, kind=kind, **fields)
+    except IntegrityError:
+        # Another worker raised the same alert first; fold into it.
+        Alert.objects.filter(account=account, device_id=device_id, kind=kind, active=True).update(**fields)
+        return Alert.objects.get(account=account, device_id=device_id, kind=kind, active=True)
+
+
+def _active_kinds(account: str, device_id: str | None = None) -> dict[str, set[str]]:
+    """The kinds each device has an active alert for; rules only resolve those."""
+    qs = Alert.objects.filter(account=account, active=True)
+    if device_id is not None:
+        qs = qs.filter(device_id=device_id)
+    kinds: dict[str, set[str]] = {}
+    for dev, kind in qs.values_list("device_id", "kind"):
+        kinds.setdefault(dev, set()).add(kind)
+    return kinds
+
+
+def _resolve(account: str, device_id: str, kind: str, active: set[str] | None = None) -> None:
+    # ``active`` (from _active_kinds) skips the UPDATE when nothing is open.
+    if active is not None and kind not in active:
+        return
+    now = timezone.now()
+    Alert.objects.filter(account=account, device_id=device_id, kind=kind, active=True).update(
+        active=False, resolved_at=now, updated_at=now
+    )
+
+
+def _state_details(state: LoggerState) -> dict:
+    return {
+        "type": state.device_type,
+        "label": state.label,
+        "org": state.org,
+        "min": state.min_temp,
+        "max": state.max_temp,
+        "battery": state.battery,
+        "currentT": state.last_temp,
+        "currentH": state.last_humidity,
+        "at": state.last_utc,
+    }
+
+
+def _evaluate_battery(state: LoggerState, active: set[str] | None = None) -> None:
+    if state.battery is not None and state.battery < settings.ALERT_LOW_BATTERY:
+        _raise(
+            state.account,
+            state.device_id,
+            Alert.KIND_LOW_BATTERY,
+            f"Battery at {state.battery:g}%",
+            status="low",
+            value=state.battery,
+            details=_state_details(state),
+        )
+    else:
+        _resolve(state.account, state.device_id, Alert.KIND_LOW_BATTERY, active)
+
+
+def _evaluate_range(state: LoggerState, active: set[str] | None = None) -> None:
+    t = state.last_temp
+    if t is not None and state.min_temp is not None and t < state.min_temp:
+        _raise(state.account, state.device_id, Alert.KIND_OUT_OF_RANGE,
+               f"{t:g} C is below min {state.min_temp:g} C", status="low", value=t,
+               details=_state_details(state))
+    elif t is not None and state.max_temp is not None and t > state.max_temp:
+        _raise(state.account, state.device_id, Alert.KIND_OUT_OF_RANGE,
+               f"{t:g} C is above max {state.max_temp:g} C", status="high", value=t,
+               details=_state_details(state))
+    else:
+        _resolve(state.account, state.device_id, Alert.KIND_OUT_OF_RANGE, active)
+
+
+def _is_stale(state: LoggerState, now: int, missing_is_stale: bool = False) -> bool | None:
+    """Whether the logger counts as stale at ``now``; None when there is nothing to judge."""
+    if state.last_utc is None:
+        return True if missing_is_stale else None
+    return (now - state.last_utc) / 60 >= settings.ALERT_STALE_MINUTES
+
+
+def _evaluate_stale(state: LoggerState, now: int, missing_is_stale: bool = False,
+                    active: set[str] | None = None) -> None:
+    stale = _is_stale(state, now, missing_is_stale)
+    if stale is None:
+        return
+    if state.last_utc is None:
+        _raise(state.account, state.device_id, Alert.KIND_STALE,
+               "No check-in in the last 48h", status="offline", details=_state_details(state))
+        return
+    minutes = (now - state.last_utc) / 60
+    if stale:
+        _raise(state.account, state.device_id, Alert.KIND_STALE,
+               f"No check-in for {int(minutes)} min", status="offline", value=round(minutes, 1),
+               details=_state_details(state))
+    else:
+        _resolve(state.account, state.device_id, Alert.KIND_STALE, active)
+
+
+def _evaluate_shelf_life(state: LoggerState, active: set[str] | None = None) -> None:
+    if state.shelf_life_loss >= settings.ALERT_SHELF_LIFE_LOSS_DAYS:
+        _raise(state.account, state.device_id, Alert.KIND_SHELF_LIFE,
+               f"{state.shelf_life_loss:.2f} extra shelf-life days consumed", status="high",
+               value=round(state.shelf_life_loss, 3), details=_state_details(state))
+    else:
+        _resolve(state.account, state.device_id, Alert.KIND_SHELF_LIFE, active)
+
+
+def _shelf_life_step(temp: float, seconds: float) -> float:
+    """Excess equivalent days (Q10 model) spent above the reference temperature."""
+    rate = settings.ALERT_SHELF_LIFE_Q10 ** ((temp - settings.ALERT_SHELF_LIFE_REF_TEMP) / 10.0)
+    return max(rate - 1.0, 0.0) * min(seconds, MAX_STEP_SECONDS) / 86400.0
+
+
+def _get_state(account: str, device_id: str) -> LoggerState:
+    # Readings can arrive for ids the device list has not shown yet (or never
+    # will); such rows join the fleet only once observe_devices lists them.
+    state, _ = LoggerState.objects.get_or_create(
+        account=account, device_id=str(device_id), defaults={"in_fleet": False}
+    )
+    return state
+
+
+def observe_devices(account: str, devices: list[dict]) -> None:
+    """Sync the account's LoggerState rows (the device registry) with a fetched device list."""
+    existing = {s.device_id: s for s in LoggerState.objects.filter(account=account)}
+    active = _active_kinds(account)
+    listed = set()
+    for d in devices:
+        device_id = d.get("id")
+        if not device_id:
+            continue
+        listed.add(str(device_id))
+        state = existing.get(str(device_id)) or LoggerState(account=account, device_id=str(device_id))
+        changed = state.pk is None
+        for field, val in (
+            ("device_type", d.get("type") or ""),
+            ("label", d.get("label") or ""),
+            ("org", d.get("org") or ""),
+            ("vrn", d.get("vrn") or ""),
+            ("in_fleet", True),
+            ("min_temp", d.get("min_temp")),
+            ("max_temp", d.get("max_temp")),
+            ("battery", d.get("battery")),
+        ):
+            if getattr(state, field) != val:
+                setattr(state, field, val)
+                changed = True
+        if not changed:
+            continue
+        state.save()
+        _evaluate_battery(state, active.get(state.device_id, set()))
+        _evaluate_range(state, active.get(state.device_id, set()))
+    gone = [device_id for device_id, state in existing.items() if state.in_fleet and device_id not in listed]
+    if gone:
+        LoggerState.objects.filter(account=account, device_id__in=gone).update(in_fleet=False)
+
+
+def ingest_readings(account: str, device_id: str, points: list[dict], now: int | None = None,
+                    missing_is_stale: bool = False) -> LoggerState:
+    now = now or _now_utc()
+    state = _get_state(account, device_id)
+    fresh = sorted(
+        (p for p in points if p.get("utc") and (state.last_utc is None or p["utc"] > state.last_utc)),
+        key=lambda p: p["utc"],
+    )
+    active = _active_kinds(account, state.device_id).get(state.device_id, set())
+    stale = _is_stale(state, now, missing_is_stale)
+    if not fresh and (stale is None or stale == (Alert.KIND_STALE in active)):
+        # A repeat fetch: no new reading, so every rule would reach the same verdict.
+        return state
+    prev_utc = state.last_utc
+    prev_temp = state.last_temp
+    for p in fresh:
+        if prev_utc is not None and prev_temp is not None:
+            state.shelf_life_loss += _shelf_life_step(prev_temp, p["utc"] - prev_utc)
+        prev_utc = p["utc"]
+        if p.get("t") is not None:
+            prev_temp = p["t"]
+    if fresh:
+        rollups.add_readings(
+            account,
+            f"blu:{state.device_id}",
+            fresh,
+            prev=(state.last_utc, state.last_temp),
+            limit=state.max_temp,
+        )
+        latest = fresh[-1]
+        state.last_utc = latest["utc"]
+        state.last_temp = latest.get("t")
+        state.last_humidity = latest.get("h")
+        state.save()
+    _evaluate_range(state, active)
+    _evaluate_stale(state, now, missing_is_stale=missing_is_stale, active=active)
+    _evaluate_shelf_life(state, active)
+    return state
+
+
+def sweep_stale(account: str | None = None, now: int | None = None) -> int:
+    now = now or _now_utc()
+    states = LoggerState.objects.all()
+    active = None
+    if account:
+        states = states.filter(account=account)
+        active = _active_kinds(account)
+    count = 0
+    for state in states.iterator():
+        _evaluate_stale(state, now, active=active.get(state.device_id, set()) if active is not None else None)
+        count += 1
+    return count
+
+
+def sweep_fleet(creds: dict) -> None:
+    account = creds["uname"]
+    devices = bluconsole.fetch_devices(creds["uname"], creds["upass"], children=False)
+    observe_devices(account, devices)
+    now = _now_utc()
+    from_time = now - 48 * 3600
+
+    def fetch(dev):
+        try:
+            points = bluconsole.fetch_measurements(
+                creds["uname"],
+                creds["upass"],
+                device_id=str(dev["id"]),
+                from_time=from_time,
+                to_time=now,
+            )
+            return dev, points
+        except Exception:
+            return dev, None
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(fetch, [d for d in devices if d.get("id")]))
+    for dev, points in results:
+        if points is None:
+            continue
+        ingest_readings(account, str(dev["id"]), points, now=now, missing_is_stale=True)
+
+
+def request_sweep(creds: dict) -> bool:
+    """Start a background fleet sweep unless one ran for this account recently."""
+    if not cache.add(f"alerts:sweep:{creds['uname']}", 1, settings.ALERT_SWEEP_SECONDS):
+        return False
+
+    def run():
+        try:
+            sweep_fleet(creds)
+        except Exception:
+            cache.delete(f"alerts:sweep:{creds['uname']}")
+        finally:
+            close_old_connections()
+
+    threading.Thread(target=run, daemon=True).start()
+    return True
+
+
+def alert_payload(alert: Alert) -> dict:
+    return {
+        "id": alert.id,
+        "device_id": alert.device_id,
+        "kind": alert.kind,
+        "status": alert.status,
+        "message": alert.message,
+        "value": alert.value,
+        "details": alert.details,
+        "active": alert.active,
+        "first_seen_at": alert.first_seen_at.isoformat(),
+        "last_seen_at": alert.last_seen_at.isoformat(),
+        "resolved_at": alert.resolved_at.isoformat() if alert.resolved_at else None,
+    }
+
+
+def device_status(account: str, now: int | None = None) -> list[dict]:
+    now = now or _now_utc()
+    items = []
+    for s in LoggerState.objects.filter(account=account).order_by("device_id"):
+        minutes = (now - s.last_utc) / 60 if s.last_utc else None
+        items.append(
+            {
+                "id": s.device_id,
+                "label": s.label,
+                "battery": s.battery,
+                "lastUtc": s.last_utc,
+                "online": minutes is not None and minutes < settings.ALERT_STALE_MINUTES,
+                "collecting": minutes is not None and minutes < 15,
+            }
+        )
+    return items
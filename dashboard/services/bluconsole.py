@@ -1,7 +1,31 @@
 from __future__ import annotations
 
+import hashlib
+import threading
+from time import monotonic, sleep
+from typing import Any, Callable
 from urllib import parse, request
+
 from django.conf import settings
+from django.core.cache import cache
+
+from ..utils import metrics
+from ..utils.blu_xml import parse_devices, parse_measurements
+from . import throttle
+
+_MISSING = object()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+# key -> in-flight upstream call in this process
+_flights: dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
 
 
 def _request(path: str, params: dict[str, str | int | bool | None]) -> tuple[int, str]:
@@ -9,9 +33,18 @@ def _request(path: str, params: dict[str, str | int | bool | None]) -> tuple[int
     query = parse.urlencode(clean_params)
     url = f"{settings.BLU_BASE}{path}?{query}"
     req = request.Request(url, method="GET")
-    with request.urlopen(req, timeout=20) as resp:
-        text = resp.read().decode("utf-8", errors="replace")
-        return resp.status, text
+    account = str(params.get("uname") or "")
+    lease = throttle.acquire(account)
+    ok = False
+    start = monotonic()
+    try:
+        with metrics.timed("blu"), request.urlopen(req, timeout=20) as resp:
+            text = resp.read().decode("utf-8", errors="replace")
+            ok = resp.status == 200
+            return resp.status, text
+    finally:
+        throttle.release(account, lease, monotonic() - start, ok)
+        metrics.count_upstream("bluconsole", ok)
 
 
 def blu_login(uname: str, upass: str) -> None:
@@ -54,3 +87,103 @@ def get_measurements(
     if status != 200:
         raise ValueError(f"Measurements fetch failed: {status}")
     return text
+
+
+def request_key(kind: str, uname: str, upass: str, *args) -> str:
+    # The password is part of the key so a caller with bad credentials never
+    # shares a result fetched with good ones.
+    raw = repr((kind, uname, upass, args)).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _across_workers(key: str, fn: Callable[[], Any]) -> Any:
+    lock_key = f"blu:flight:lock:{key}"
+    wait_key = f"blu:flight:wait:{key}"
+    result_key = f"blu:flight:result:{key}"
+    try:
+        leader = cache.add(lock_key, 1, settings.BLU_FLIGHT_LOCK_SECONDS)
+    except Exception:  # noqa: BLE001
+        return fn()
+    if leader:
+        try:
+            result = fn()
+            # Only pay for pickling the result into the cache when another
+            # worker is actually waiting on it.
+            if cache.get(wait_key):
+                cache.set(result_key, result, settings.BLU_FLIGHT_RESULT_SECONDS)
+            return result
+        finally:
+            cache.delete_many([lock_key, wait_key])
+    # Another worker holds the call: wait for its result, or run our own if it
+    # failed (lock gone, no result) or is taking longer than the lock lifetime.
+    cache.set(wait_key, 1, settings.BLU_FLIGHT_LOCK_SECONDS)
+    deadline = monotonic() + settings.BLU_FLIGHT_LOCK_SECONDS
+    while monotonic() < deadline:
+        result = cache.get(result_key, _MISSING)
+        if result is not _MISSING:
+            return result
+        if cache.get(lock_key) is None:
+            result = cache.get(result_key, _MISSING)
+            if result is not _MISSING:
+                return result
+            break
+        sleep(settings.BLU_FLIGHT_POLL_SECONDS)
+    return fn()
+
+
+def _single_flight(key: str, fn: Callable[[], Any]) -> Any:
+    """Run ``fn`` once for concurrent callers with the same ``key`` and share its result.
+
+    Results are shared objects; callers must not mutate them.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+    try:
+        flight.result = _across_workers(key, fn)
+        return flight.result
+    except BaseException as exc:
+        flight.error = exc
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+
+def fetch_devices(uname: str, upass: str, children: bool | None = None) -> list[dict]:
+    """Parsed device list, coalescing identical concurrent requests."""
+    key = request_key("devices", uname, upass, children)
+    return _single_flight(key, lambda: parse_devices(get_devices(uname, upass, children=children)))
+
+
+def fetch_measurements(
+    uname: str,
+    upass: str,
+    device_id: str | None = None,
+    from_time: int | None = None,
+    to_time: int | None = None,
+    include_all: bool | None = None,
+) -> list[dict]:
+    """Parsed measurements, coalescing identical concurrent requests."""
+    key = request_key("measurements", uname, upass, device_id, from_time, to_time, include_all)
+
+    def call():
+        xml = get_measurements(
+            uname,
+            upass,
+            device_id=device_id,
+            from_time=from_time,
+            to_time=to_time,
+            include_all=include_all,
+        )
+        return parse_measurements(xml, device_id=device_id)
+
+    return _single_flight(key, call)
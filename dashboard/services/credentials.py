@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+from django.conf import settings
+
+# Per-worker map of session key -> BluConsole credentials, so hot API paths
+# resolve auth without loading the session at all. Entries expire after
+# BLU_CREDS_CACHE_SECONDS; login and logout evict locally and rotate the session key.
+_handles: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+_lock = threading.Lock()
+MAX_HANDLES = 2048
+
+
+def get(request) -> dict | None:
+    key = request.session.session_key
+    if key:
+        with _lock:
+            entry = _handles.get(key)
+            if entry and entry[0] > monotonic():
+                _handles.move_to_end(key)
+                return entry[1]
+    creds = request.session.get("blu_creds")
+    if creds and request.session.session_key:
+        remember(request.session.session_key, creds)
+    return creds
+
+
+def remember(session_key: str, creds: dict) -> None:
+    expires = monotonic() + settings.BLU_CREDS_CACHE_SECONDS
+    with _lock:
+        _handles[session_key] = (expires, creds)
+        _handles.move_to_end(session_key)
+        while len(_handles) > MAX_HANDLES:
+            _handles.popitem(last=False)
+
+
+def forget(session_key: str | None) -> None:
+    if not session_key:
+        return
+    with _lock:
+        _handles.pop(session_key, None)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import csv
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Iterable, Iterator
+
+from django.conf import settings
+from django.db.models.fields.json import KeyTransform
+
+from ..models import UploadDataset
+from ..utils import optional
+from ..utils.responses import dumps
+from . import bluconsole
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+DEVICE_COLUMNS = ["device_id", "type", "utc", "time", "t", "h"]
+DEVICE_TYPES = {"utc": "int64", "t": "double", "h": "double"}
+
+
+class ExportError(Exception):
+    pass
+
+
+def available(fmt: str) -> bool:
+    return fmt in FORMATS and (fmt != "parquet" or optional.load("pyarrow.parquet") is not None)
+
+
+def upstream_calls(device_count: int, from_time: int, to_time: int) -> int:
+    """How many BluConsole requests device_rows makes for this export."""
+    return device_count * -(-(to_time - from_time + 1) // settings.EXPORT_CHUNK_SECONDS)
+
+
+def device_rows(creds: dict, device_ids: list[str], from_time: int, to_time: int) -> Iterator[dict]:
+    """Readings for ``device_ids`` in ``[from_time, to_time]``, fetched one window at a time.
+
+    Only one EXPORT_CHUNK_SECONDS window per device is held in memory.
+    """
+    step = settings.EXPORT_CHUNK_SECONDS
+    for device_id in device_ids:
+        start = from_time
+        while start <= to_time:
+            end = min(start + step - 1, to_time)
+            points = bluconsole.fetch_measurements(
+                creds["uname"], creds["upass"], device_id=device_id, from_time=start, to_time=end
+            )
+            for p in sorted(points, key=lambda p: p.get("utc") or 0):
+                utc = p.get("utc")
+                if utc is None or utc < start or utc > end:
+                    continue
+                yield {
+                    "device_id": device_id,
+                    "type": p.get("type"),
+                    "utc": utc,
+                    "time": datetime.fromtimestamp(utc, tz=dt_timezone.utc).isoformat(),
+                    "t": p.get("t"),
+                    "h": p.get("h"),
+                }
+            start = end + 1
+
+
+def upload_rows(upload: UploadDataset, chunk_size: int = 500) -> Iterator[dict]:
+    """An upload's stored rows, ``chunk_size`` at a time.
+
+    The database extracts each slice of the rows array, so the whole blob is
+    never loaded here.
+    """
+    for start in range(0, upload.row_count, chunk_size):
+        stop = min(start + chunk_size, upload.row_count)
+        paths = [KeyTransform(str(i), "rows") for i in range(start, stop)]
+        values = UploadDataset.objects.filter(pk=upload.pk).values_list(*paths).first()
+        if values is None:
+            return
+        yield from (row for row in values if row is not None)
+
+
+class _Echo:
+    def write(self, value: str) -> str:
+        return value
+
+
+def _csv_cell(val: Any) -> Any:
+    if isinstance(val, (dict, list)):
+        return dumps(val).decode("utf-8")
+    return val
+
+
+def stream_csv(columns: list[str], rows: Iterable[dict]) -> Iterator[bytes]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns).encode("utf-8")
+    batch = []
+    try:
+        for row in rows:
+            batch.append(writer.writerow([_csv_cell(row.get(c)) for c in columns]))
+            if len(batch) >= 500:
+                yield "".join(batch).encode("utf-8")
+                batch = []
+    except Exception as exc:  # noqa: BLE001
+        # Headers are already sent; mark the file as incomplete instead.
+        batch.append(f"# export incomplete: {exc}\r\n")
+    if batch:
+        yield "".join(batch).encode("utf-8")
+
+
+def stream_ndjson(rows: Iterable[dict]) -> Iterator[bytes]:
+    batch = []
+    try:
+        for row in rows:
+            batch.append(dumps(row))
+            if len(batch) >= 500:
+                yield b"\n".join(batch) + b"\n"
+                batch = []
+    except Exception as exc:  # noqa: BLE001
+        batch.append(dumps({"error": f"export incomplete: {exc}"}))
+    if batch:
+        yield b"\n".join(batch) + b"\n"
+
+
+class _Sink:
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.closed = False
+        self.position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        out = b"".join(self.chunks)
+        self.chunks = []
+        return out
+
+
+def _parquet_value(val: Any, type_name: str) -> Any:
+    if val is None or type_name != "string":
+        return val
+    return dumps(val).decode("utf-8") if isinstance(val, (dict, list)) else str(val)
+
+
+def stream_parquet(columns: list[str], rows: Iterable[dict], types: dict[str, str] | None = None,
+                   batch_size: int = 50_000) -> Iterator[bytes]:
+    """Parquet written one row group per ``batch_size`` rows; needs pyarrow.
+
+    Columns without an entry in ``types`` are written as strings.
+    """
+    pq = optional.load("pyarrow.parquet")
+    if pq is None:
+        raise ExportError("Parquet export needs pyarrow installed.")
+    pa = optional.load("pyarrow")
+    types = {c: (types or {}).get(c, "string") for c in columns}
+    schema = pa.schema([(c, pa.type_for_alias(types[c])) for c in columns])
+    sink = _Sink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    batch: list[dict] = []
+    for row in rows:
+        batch.append({c: _parquet_value(row.get(c), types[c]) for c in columns})
+        if len(batch) >= batch_size:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            batch = []
+            yield sink.drain()
+    if batch:
+        writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+    writer.close()
+    yield sink.drain()
+
+
+def stream(fmt: str, columns: list[str], rows: Iterable[dict], types: dict[str, str] | None = None) -> Iterator[bytes]:
+    if fmt == "csv":
+        return stream_csv(columns, rows)
+    if fmt == "ndjson":
+        return stream_ndjson(rows)
+    if fmt == "parquet":
+        return stream_parquet(columns, rows, types=types)
+    raise ExportError(f"Unsupported format: {fmt}")
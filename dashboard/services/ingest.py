@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import csv
+import io
+import math
+import re
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from itertools import chain, islice
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+from ..utils import metrics, optional
+from ..utils.blu_xml import parse_measurements
+from ..utils.series import detect_columns, parse_date, to_num
+
+# A reader turns raw file bytes into a header row and an iterator of value rows.
+Reader = Callable[[bytes], tuple[list[str], Iterator[Sequence[Any]]]]
+_READERS: dict[str, tuple[str, Reader]] = {}
+
+DETECT_SAMPLE_ROWS = 200
+# "007", "-01": codes (IDs, postcodes) whose leading zeros a number would drop.
+_LEADING_ZERO_RE = re.compile(r"[+-]?0\d")
+
+
+def reader(*extensions: str, label: str):
+    def register(fn: Reader) -> Reader:
+        for ext in extensions:
+            _READERS[ext] = (label, fn)
+        return fn
+
+    return register
+
+
+def extension(name: str) -> str:
+    return name.rsplit(".", 1)[-1].lower() if "." in name else ""
+
+
+def supported(name: str) -> bool:
+    return extension(name) in _READERS
+
+
+def supported_extensions() -> list[str]:
+    return sorted(f".{ext}" for ext in _READERS)
+
+
+def _headers(row: Sequence[Any]) -> list[str]:
+    return [str(h).strip() if h is not None else "" for h in row]
+
+
+@reader("xlsx", label="xlsx")
+def read_xlsx(raw: bytes):
+    openpyxl = optional.load("openpyxl")
+    if openpyxl is None:
+        raise ValueError("Excel parser not available.")
+    try:
+        wb = openpyxl.load_workbook(filename=io.BytesIO(raw), data_only=True, read_only=True, keep_links=False)
+    except Exception as exc:  # noqa: BLE001
+        raise ValueError(
+            "Unable to read workbook. Please re-save the file as .xlsx (new copy) and try again."
+        ) from exc
+    rows = wb.worksheets[0].iter_rows(values_only=True)
+    first = next(rows, None)
+    return (_headers(first) if first else []), rows
+
+
+@reader("xls", label="xls")
+def read_xls(raw: bytes):
+    xlrd = optional.load("xlrd")
+    if xlrd is None:
+        raise ValueError("Legacy .xls files need xlrd installed; save as .xlsx or CSV instead.")
+    try:
+        book = xlrd.open_workbook(file_contents=raw, on_demand=True)
+    except Exception as exc:  # noqa: BLE001
+        raise ValueError("Unable to read the .xls workbook.") from exc
+    sheet = book.sheet_by_index(0)
+
+    def cell(c):
+        if c.ctype == xlrd.XL_CELL_DATE:
+            return xlrd.xldate_as_datetime(c.value, book.datemode)
+        if c.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+            return None
+        if c.ctype == xlrd.XL_CELL_BOOLEAN:
+            return bool(c.value)
+        return c.value
+
+    if sheet.nrows == 0:
+        return [], iter(())
+    rows = ([cell(c) for c in sheet.row(i)] for i in range(1, sheet.nrows))
+    return _headers(cell(c) for c in sheet.row(0)), rows
+
+
+def _csv_value(val: str) -> Any:
+    if val == "":
+        return None
+    if _LEADING_ZERO_RE.match(val):
+        return val
+    try:
+        return int(val)
+    except ValueError:
+        pass
+    try:
+        num = float(val)
+    except ValueError:
+        return val
+    # "nan" and "inf" parse as floats, but are not JSON and poison min/max.
+    return num if math.isfinite(num) else val
+
+
+@reader("csv", "tsv", "txt", label="csv")
+def read_csv(raw: bytes):
+    text = io.TextIOWrapper(io.BytesIO(raw), encoding="utf-8-sig", errors="replace", newline="")
+    head = text.read(8192)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(head, delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    rows = csv.reader(text, dialect)
+    first = next(rows, None)
+    return (_headers(first) if first else []), ([_csv_value(v) for v in r] for r in rows if r)
+
+
+@reader("xml", label="xml")
+def read_blu_xml(raw: bytes):
+    try:
+        points = parse_measurements(raw.decode("utf-8", errors="replace"))
+    except Exception as exc:  # noqa: BLE001
+        raise ValueError("Unable to read BluConsole XML.") from exc
+    if not points:
+        raise ValueError("No measurements found in the XML file.")
+    points.sort(key=lambda p: (p.get("id") or "", p.get("utc") or 0))
+    rows = (
+        [
+            p.get("id"),
+            p.get("type"),
+            datetime.fromtimestamp(p["utc"], tz=dt_timezone.utc) if p.get("utc") else None,
+            p.get("t"),
+            p.get("h"),
+        ]
+        for p in points
+    )
+    return ["Logger", "Type", "Date/Time (UTC)", "Temperature", "Humidity"], rows
+
+
+def read_table(name: str, raw: bytes) -> tuple[str, list[str], Iterator[Sequence[Any]]]:
+    entry = _READERS.get(extension(name))
+    if entry is None:
+        raise ValueError(f"Unsupported file type. Use one of: {', '.join(supported_extensions())}.")
+    label, read = entry
+    headers, rows = read(raw)
+    return label, headers, iter(rows)
+
+
+def serialize_cell(val: Any):
+    if val is None:
+        return None
+    if isinstance(val, (datetime, date, time)):
+        return val.isoformat()
+    if isinstance(val, timedelta):
+        return str(val)
+    if isinstance(val, (bytes, bytearray)):
+        return val.decode("utf-8", errors="replace")
+    if isinstance(val, (str, int, float, bool)):
+        return val
+    return str(val)
+
+
+@metrics.timed_call("ingest")
+def parse_dataset(name: str, raw: bytes) -> dict:
+    """Headers plus rows as JSON-ready dicts, for any registered file type."""
+    _label, headers, rows = read_table(name, raw)
+    if not headers:
+        return {"headers": [], "rows": []}
+    body = []
+    for r in rows:
+        obj = {}
+        for i, h in enumerate(headers):
+            obj[h] = serialize_cell(r[i] if i < len(r) else None)
+        body.append(obj)
+    return {"headers": headers, "rows": body}
+
+
+def summarize_rows(headers: list[str], rows: Iterable[Sequence[Any]]) -> dict:
+    """Time range and temperature stats over value rows, read in a single pass."""
+    rows = iter(rows)
+    sample = list(islice(rows, DETECT_SAMPLE_ROWS))
+    time_col, temp_col = detect_columns(headers, sample)
+
+    time_idx = headers.index(time_col) if time_col in headers else None
+    temp_idx = headers.index(temp_col) if temp_col in headers else None
+
+    count = 0
+    t_min = None
+    t_max = None
+    t_sum = 0.0
+    t_count = 0
+    t_start = None
+    t_end = None
+    t_first = None
+    t_last = None
+
+    for r in chain(sample, rows):
+        count += 1
+        tval = None
+        dval = None
+        if temp_idx is not None and temp_idx < len(r):
+            tval = to_num(r[temp_idx])
+        if time_idx is not None and time_idx < len(r):
+            dval = parse_date(r[time_idx])
+        if tval is not None:
+            t_min = tval if t_min is None else min(t_min, tval)
+            t_max = tval if t_max is None else max(t_max, tval)
+            t_sum += tval
+            t_count += 1
+        if dval:
+            if t_start is None or dval < t_start:
+                t_start = dval
+                t_first = tval
+            if t_end is None or dval > t_end:
+                t_end = dval
+                t_last = tval
+
+    return {
+        # "excel" names the tabular summary shape the AI context expects,
+        # whatever file it came from; "format" records the source.
+        "type": "excel",
+        "rows": count,
+        "headers": headers,
+        "timeCol": time_col,
+        "tempCol": temp_col,
+        "tempMin": t_min,
+        "tempMax": t_max,
+        "tempAvg": (t_sum / t_count) if t_count else None,
+        "timeStart": t_start.isoformat() if t_start else None,
+        "timeEnd": t_end.isoformat() if t_end else None,
+        "tempAtStart": t_first,
+        "tempAtEnd": t_last,
+        "tempSamples": t_count,
+    }
+
+
+@metrics.timed_call("ingest")
+def summarize(name: str, raw: bytes) -> dict:
+    label, headers, rows = read_table(name, raw)
+    if not headers:
+        return {"type": "excel", "format": label, "rows": 0}
+    return {**summarize_rows(headers, rows), "format": label}
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from ..models import Job, UploadDataset
+from . import ingest, rollups, search
+
+logger = logging.getLogger(__name__)
+
+
+class JobFailed(Exception):
+    """Raised by a handler for failures a retry cannot fix (e.g. an unreadable file)."""
+
+
+class LeaseLost(Exception):
+    """The job was requeued (or claimed by another worker) while this one ran it."""
+
+
+@dataclass(frozen=True)
+class Handler:
+    fn: Callable[[Job], Any]
+    max_attempts: int
+    # Running jobs of this kind across all workers. Checked before claiming,
+    # so two workers racing for the last slot can briefly exceed it.
+    concurrency: int
+
+
+_HANDLERS: dict[str, Handler] = {}
+
+
+def handler(kind: str, max_attempts: int = 3, concurrency: int = 2):
+    def register(fn: Callable[[Job], Any]) -> Callable[[Job], Any]:
+        _HANDLERS[kind] = Handler(fn, max_attempts, concurrency)
+        return fn
+
+    return register
+
+
+def enqueue(kind: str, owner_key: str, upload=None, payload: dict | None = None) -> Job:
+    """Queue ``kind`` for a worker; ``upload`` (an uploaded file) is kept with the job until it ends."""
+    spec = _HANDLERS[kind]
+    job = Job(
+        owner_key=owner_key,
+        kind=kind,
+        payload=payload or {},
+        max_attempts=spec.max_attempts,
+        run_after=timezone.now(),
+    )
+    if upload is not None:
+        job.data = upload.read()
+    job.save()
+    return job
+
+
+def describe(job: Job) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress,
+        "message": job.message,
+        "result": job.result,
+        "error": job.error or None,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _owned(job: Job, stale_before: datetime | None = None):
+    """``job``'s row, matched only while the worker that claimed it still holds it.
+
+    Every write after claim() goes through this, so a worker whose lease
+    lapsed cannot overwrite the state of the worker that took the job over.
+    """
+    qs = Job.objects.filter(pk=job.pk, status=Job.STATUS_RUNNING, locked_by=job.locked_by)
+    return qs.filter(locked_at__lt=stale_before) if stale_before else qs
+
+
+def progress(job: Job, fraction: float, message: str = "") -> None:
+    """Report progress from a handler; raises LeaseLost if the job was taken away."""
+    now = timezone.now()
+    job.progress = max(0.0, min(1.0, fraction))
+    job.message = message[:255]
+    if not _owned(job).update(progress=job.progress, message=job.message, locked_at=now, updated_at=now):
+        raise LeaseLost(f"Job {job.pk} is no longer held by {job.locked_by}")
+
+
+@contextmanager
+def owned(job: Job):
+    """A transaction for a handler's side effects, committed only if the job is still held.
+
+    The row lock keeps requeue_stale from taking the job mid-commit.
+    """
+    with transaction.atomic():
+        if not _owned(job).select_for_update().exists():
+            raise LeaseLost(f"Job {job.pk} is no longer held by {job.locked_by}")
+        yield
+
+
+def _touch(job: Job) -> bool:
+    now = timezone.now()
+    return bool(_owned(job).update(locked_at=now, updated_at=now))
+
+
+class _Heartbeat(threading.Thread):
+    """Renews the job's lease while its handler runs, whether or not it reports progress."""
+
+    def __init__(self, job: Job):
+        super().__init__(name=f"job-{job.pk}-heartbeat", daemon=True)
+        self.job = job
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        interval = settings.JOB_LEASE_SECONDS / 3
+        try:
+            while not self.stopped.wait(interval):
+                if not _touch(self.job):
+                    return
+        finally:
+            connection.close()
+
+
+def claim(worker: str, kinds: list[str] | None = None) -> Job | None:
+    """Take the oldest runnable job whose kind is under its concurrency limit."""
+    now = timezone.now()
+    running = dict(
+        Job.objects.filter(status=Job.STATUS_RUNNING).values_list("kind").annotate(n=Count("id")).order_by()
+    )
+    open_kinds = [
+        kind for kind, spec in _HANDLERS.items()
+        if (not kinds or kind in kinds) and running.get(kind, 0) < spec.concurrency
+    ]
+    if not open_kinds:
+        return None
+    candidates = (
+        Job.objects.filter(status=Job.STATUS_QUEUED, run_after__lte=now, kind__in=open_kinds)
+        .order_by("run_after", "id")
+        .values_list("id", flat=True)[:10]
+    )
+    for job_id in candidates:
+        # The status guard makes the update the lock: only one worker wins.
+        won = Job.objects.filter(pk=job_id, status=Job.STATUS_QUEUED).update(
+            status=Job.STATUS_RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            attempts=F("attempts") + 1,
+            updated_at=now,
+        )
+        if won:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def _release(job: Job, fields: dict, stale_before: datetime | None = None) -> bool:
+    fields.update(locked_by="", locked_at=None, updated_at=timezone.now())
+    if not _owned(job, stale_before).update(**fields):
+        return False
+    for name, value in fields.items():
+        setattr(job, name, value)
+    return True
+
+
+def _finish(job: Job, stale_before: datetime | None = None, **fields) -> bool:
+    return _release(job, {**fields, "data": None}, stale_before)
+
+
+def _retry_or_fail(job: Job, error: str, retryable: bool = True, stale_before: datetime | None = None) -> bool:
+    if retryable and job.attempts < job.max_attempts:
+        delay = settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** max(job.attempts - 1, 0)
+        run_after = timezone.now() + timedelta(seconds=delay)
+        return _release(job, dict(status=Job.STATUS_QUEUED, error=error, run_after=run_after), stale_before)
+    return _finish(job, stale_before, status=Job.STATUS_FAILED, error=error, finished_at=timezone.now())
+
+
+def run(job: Job) -> None:
+    spec = _HANDLERS.get(job.kind)
+    if spec is None:
+        _finish(job, status=Job.STATUS_FAILED, error=f"Unknown job kind: {job.kind}", finished_at=timezone.now())
+        return
+    heartbeat = _Heartbeat(job)
+    heartbeat.start()
+    try:
+        result = spec.fn(job)
+    except LeaseLost:
+        logger.warning("Job %s (%s) was taken over from %s; dropping its result", job.pk, job.kind, job.locked_by)
+        return
+    except JobFailed as exc:
+        _retry_or_fail(job, str(exc), retryable=False)
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("Job %s (%s) failed on attempt %s", job.pk, job.kind, job.attempts)
+        _retry_or_fail(job, str(exc) or exc.__class__.__name__)
+    else:
+        _finish(job, status=Job.STATUS_DONE, result=result, error="", progress=1.0, finished_at=timezone.now())
+    finally:
+        heartbeat.stopped.set()
+        heartbeat.join()
+
+
+def requeue_stale() -> int:
+    """Give jobs held by a worker that stopped heartbeating back to the queue (or fail them)."""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    count = 0
+    for job in Job.objects.filter(status=Job.STATUS_RUNNING, locked_at__lt=cutoff).defer("data"):
+        # The cutoff is re-checked in the UPDATE: a heartbeat since the SELECT keeps the job.
+        if _retry_or_fail(job, f"Worker {job.locked_by or 'unknown'} stopped responding", stale_before=cutoff):
+            count += 1
+    return count
+
+
+def work(worker: str, stop: threading.Event, kinds: list[str] | None = None, once: bool = False) -> int:
+    """Claim and run jobs until ``stop`` is set (or, with ``once``, until the queue is empty)."""
+    done = 0
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            job = claim(worker, kinds)
+            if job is None:
+                if once:
+                    break
+                stop.wait(settings.JOB_POLL_SECONDS)
+                continue
+            run(job)
+            done += 1
+    finally:
+        close_old_connections()
+    return done
+
+
+@handler("upload.ingest")
+def _ingest_upload(job: Job) -> dict:
+    name = job.payload["name"]
+    progress(job, 0.1, "Reading file")
+    raw = bytes(job.data or b"")
+    try:
+        dataset = ingest.parse_dataset(name, raw)
+    except ValueError as exc:
+        raise JobFailed(str(exc)) from exc
+    progress(job, 0.6, "Saving dataset")
+    # One transaction, so a retry after a rollup failure does not leave a duplicate
+    # upload, and committed only if no other worker has taken the job over.
+    with owned(job):
+        upload = UploadDataset.objects.create(
+            owner_key=job.owner_key,
+            name=name,
+            headers=dataset["headers"],
+            rows=dataset["rows"],
+            row_count=len(dataset["rows"]),
+        )
+        rollups.rollup_upload(upload)
+        search.index_upload(upload)
+    return {"upload_id": upload.id, "row_count": upload.row_count}
+
+
+@handler("attachment.summarize")
+def _summarize_attachment(job: Job) -> dict:
+    name = job.payload["name"]
+    progress(job, 0.2, "Reading file")
+    raw = bytes(job.data or b"")
+    try:
+        summary = ingest.summarize(name, raw)
+    except ValueError as exc:
+        raise JobFailed(str(exc)) from exc
+    return {"attachment": {"name": name, "mime": job.payload.get("mime", ""), "summary": summary}}
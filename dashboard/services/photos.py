@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from ..models import Profile, ProfilePhoto
+
+try:
+    from PIL import Image, ImageOps  # type: ignore
+except Exception:  # pragma: no cover
+    Image = None
+
+PHOTO_DIR = "profile_photos"
+EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+
+
+def decode_data_url(data_url: str) -> tuple[str, bytes]:
+    header, sep, payload = data_url.partition(",")
+    if not sep or not header.startswith("data:") or ";base64" not in header:
+        raise ValueError("Photo must be a base64 data URL.")
+    mime = header[5:].split(";")[0].lower()
+    if mime not in EXTENSIONS:
+        raise ValueError("Unsupported photo type.")
+    try:
+        raw = base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError) as exc:
+        raise ValueError("Photo data is not valid base64.") from exc
+    if len(raw) > settings.PROFILE_PHOTO_MAX_BYTES:
+        raise ValueError("Photo too large (max 5 MB).")
+    return mime, raw
+
+
+def _thumbnail(raw: bytes, size: int) -> bytes | None:
+    if Image is None:
+        return None
+    with Image.open(BytesIO(raw)) as img:
+        img = ImageOps.exif_transpose(img)
+        thumb = ImageOps.fit(img.convert("RGB"), (size, size), Image.LANCZOS)
+        out = BytesIO()
+        thumb.save(out, format="JPEG", quality=85, optimize=True)
+        return out.getvalue()
+
+
+def _store(name: str, raw: bytes) -> str:
+    # Names are content hashes, so an existing file already has these bytes.
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, ContentFile(raw))
+
+
+def _delete_files(photo: ProfilePhoto) -> None:
+    if ProfilePhoto.objects.filter(content_hash=photo.content_hash).exclude(pk=photo.pk).exists():
+        return
+    for name in [photo.image.name, *photo.thumbnails.values()]:
+        if name:
+            default_storage.delete(name)
+
+
+def save_photo(profile: Profile, data_url: str) -> ProfilePhoto:
+    mime, raw = decode_data_url(data_url)
+    digest = hashlib.sha256(raw).hexdigest()
+    existing = ProfilePhoto.objects.filter(profile=profile).first()
+    if existing and existing.content_hash == digest:
+        return existing
+    try:
+        thumbs = {size: _thumbnail(raw, size) for size in settings.PROFILE_PHOTO_SIZES}
+    except Exception as exc:  # noqa: BLE001
+        raise ValueError("Unable to read the photo image.") from exc
+    name = _store(f"{PHOTO_DIR}/{digest}.{EXTENSIONS[mime]}", raw)
+    thumbnails = {
+        str(size): _store(f"{PHOTO_DIR}/{digest}_{size}.jpg", thumb)
+        for size, thumb in thumbs.items()
+        if thumb is not None
+    }
+    if existing:
+        _delete_files(existing)
+        existing.content_hash = digest
+        existing.mime = mime
+        existing.data = raw
+        existing.image.name = name
+        existing.thumbnails = thumbnails
+        existing.save()
+        return existing
+    return ProfilePhoto.objects.create(
+        profile=profile, content_hash=digest, mime=mime, data=raw, image=name, thumbnails=thumbnails
+    )
+
+
+def delete_photo(profile: Profile) -> None:
+    photo = ProfilePhoto.objects.filter(profile=profile).first()
+    if photo:
+        _delete_files(photo)
+        photo.delete()
+
+
+def read_photo(photo: ProfilePhoto, size: int | None = None) -> bytes | None:
+    """The original (or a ``size`` thumbnail) bytes, or None when there are none.
+
+    Reads the stored file; when storage has lost it (or it was never written,
+    as for rows migrated from data URLs) it is rebuilt from ``photo.data``.
+    """
+    if size and size not in settings.PROFILE_PHOTO_SIZES:
+        return None
+    name = photo.thumbnails.get(str(size)) if size else photo.image.name
+    if name:
+        try:
+            with default_storage.open(name, "rb") as fh:
+                return fh.read()
+        except FileNotFoundError:
+            pass
+    if not photo.mime or not photo.data:
+        return None
+    raw = bytes(photo.data)
+    if not size:
+        photo.image.name = _store(f"{PHOTO_DIR}/{photo.content_hash}.{EXTENSIONS[photo.mime]}", raw)
+        photo.save(update_fields=["image"])
+        return raw
+    try:
+        thumb = _thumbnail(raw, size)
+    except Exception:  # noqa: BLE001
+        return None
+    if thumb is None:
+        return None
+    photo.thumbnails = {**photo.thumbnails, str(size): _store(f"{PHOTO_DIR}/{photo.content_hash}_{size}.jpg", thumb)}
+    photo.save(update_fields=["thumbnails"])
+    return thumb
+
+
+def photo_urls(photo: ProfilePhoto) -> dict:
+    base = f"/api/profile/photo/{photo.content_hash}/"
+    # Migrated rows have no thumbnails yet; read_photo makes them on demand.
+    sizes = photo.thumbnails or ([str(size) for size in settings.PROFILE_PHOTO_SIZES] if Image is not None else [])
+    return {
+        "photoUrl": base,
+        "photoThumbs": {size: f"{base}{size}/" for size in sizes},
+    }
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import tracemalloc
+from time import perf_counter, process_time
+
+from django.conf import settings
+from django.core import signing
+
+from ..models import RequestProfile
+
+HEADER = "X-Profile-Token"
+QUERY_FLAG = "_profile"
+_SALT = "dashboard.profiler"
+
+
+def make_token() -> str:
+    """Token for the X-Profile-Token header; valid for PROFILER_TOKEN_MAX_AGE_SECONDS."""
+    return signing.TimestampSigner(key=settings.PROFILER_SECRET or None, salt=_SALT).sign("profile")
+
+
+def _valid_token(token: str) -> bool:
+    signer = signing.TimestampSigner(key=settings.PROFILER_SECRET or None, salt=_SALT)
+    try:
+        return signer.unsign(token, max_age=settings.PROFILER_TOKEN_MAX_AGE_SECONDS) == "profile"
+    except signing.BadSignature:
+        return False
+
+
+def trigger(request) -> str | None:
+    """Why this request should be profiled, or None to leave it alone."""
+    token = request.headers.get(HEADER)
+    if token and _valid_token(token):
+        return RequestProfile.TRIGGER_HEADER
+    if QUERY_FLAG in request.GET:
+        user = getattr(request, "user", None)
+        if user is not None and user.is_staff:
+            return RequestProfile.TRIGGER_STAFF
+    rate = settings.PROFILER_SAMPLE_RATE
+    if rate > 0 and request.path.startswith(tuple(settings.PROFILER_SAMPLE_PATHS)) and random.random() < rate:
+        return RequestProfile.TRIGGER_SAMPLE
+    return None
+
+
+class Capture:
+    """cProfile (plus tracemalloc when ``memory``) around one call on the current thread."""
+
+    def __init__(self, memory: bool = False):
+        # tracemalloc is process-wide; leave it alone if something else started it.
+        self.memory = memory and not tracemalloc.is_tracing()
+        self.profile = cProfile.Profile()
+        self.memory_peak: int | None = None
+
+    def __enter__(self) -> Capture:
+        if self.memory:
+            tracemalloc.start()
+        self.wall = perf_counter()
+        self.cpu = process_time()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.profile.disable()
+        self.duration_ms = (perf_counter() - self.wall) * 1000
+        self.cpu_ms = (process_time() - self.cpu) * 1000
+        if self.memory:
+            self.memory_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def summary(self, limit: int = 30) -> str:
+        out = io.StringIO()
+        pstats.Stats(self.profile, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def dump(self) -> bytes:
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats)
+
+
+def save(capture: Capture, request, response, trigger: str, endpoint: str, queries: int) -> RequestProfile:
+    profile = RequestProfile(
+        endpoint=endpoint[:120],
+        method=request.method,
+        path=request.path[:255],
+        owner_key=request.session.get("owner_key", "") if hasattr(request, "session") else "",
+        trigger=trigger,
+        status_code=getattr(response, "status_code", None),
+        duration_ms=round(capture.duration_ms, 3),
+        cpu_ms=round(capture.cpu_ms, 3),
+        queries=queries,
+        memory_peak_bytes=capture.memory_peak,
+        summary=capture.summary(),
+        stats=capture.dump(),
+    )
+    profile.save()
+    return profile
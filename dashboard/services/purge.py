@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, QuerySet
+from django.utils import timezone
+
+from ..models import ChatAttachment, ChatMessage, ChatSession, Job, RequestProfile, UploadDataset
+
+
+def _batches(qs: QuerySet, batch_size: int):
+    # Re-query each time: the previous batch is gone, so the next ids come first.
+    while True:
+        ids = list(qs.order_by().values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return
+        yield ids
+
+
+def delete_sessions(sessions: QuerySet, batch_size: int | None = None) -> int:
+    """Delete chat sessions children-first in bounded batches.
+
+    A plain ``.delete()`` has Django collect the ids of every message of
+    every session in Python and delete them all in one transaction.
+    Deleting attachments, then messages, then sessions a batch of ids at a
+    time keeps each statement and transaction small. Database-level cascades
+    (``on_delete=models.DB_CASCADE``) would skip the collection, but would
+    still remove every message of a batch of sessions in one statement.
+    Returns sessions deleted.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    deleted = 0
+    for session_ids in _batches(sessions, batch_size):
+        messages = ChatMessage.objects.filter(session_id__in=session_ids)
+        for message_ids in _batches(messages, batch_size):
+            with transaction.atomic():
+                ChatAttachment.objects.filter(message_id__in=message_ids).delete()
+                ChatMessage.objects.filter(pk__in=message_ids).only("id").delete()
+        deleted += ChatSession.objects.filter(pk__in=session_ids).only("id").delete()[1].get(ChatSession._meta.label, 0)
+    return deleted
+
+
+def delete_uploads(uploads: QuerySet, batch_size: int | None = None) -> int:
+    """Delete upload datasets (and their rollups) without loading the rows blobs."""
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    deleted = 0
+    for upload_ids in _batches(uploads, batch_size):
+        deleted += UploadDataset.objects.filter(pk__in=upload_ids).only("id").delete()[1].get(UploadDataset._meta.label, 0)
+    return deleted
+
+
+def _over_limit(model, order: str, limit: int) -> list[QuerySet]:
+    """Per owner over ``limit`` rows, the rows beyond the newest ``limit``."""
+    owners = (
+        model.objects.order_by().values("owner_key").annotate(n=Count("id")).filter(n__gt=limit)
+        .values_list("owner_key", flat=True)
+    )
+    return [
+        model.objects.filter(pk__in=model.objects.filter(owner_key=owner).order_by(order).values("id")[limit:])
+        for owner in owners
+    ]
+
+
+def _delete_rows(qs: QuerySet, batch_size: int) -> int:
+    return sum(qs.model.objects.filter(pk__in=ids).delete()[0] for ids in _batches(qs, batch_size))
+
+
+def apply_retention(dry_run: bool = False, batch_size: int | None = None) -> dict[str, int]:
+    """Enforce the *_RETENTION_DAYS and *_MAX_PER_OWNER settings; 0 turns a rule off."""
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    now = timezone.now()
+    rules: list[tuple[str, QuerySet, Callable[[QuerySet, int], int]]] = []
+    if settings.CHAT_RETENTION_DAYS:
+        cutoff = now - timedelta(days=settings.CHAT_RETENTION_DAYS)
+        rules.append(("chat_sessions_expired", ChatSession.objects.filter(updated_at__lt=cutoff), delete_sessions))
+    if settings.CHAT_MAX_SESSIONS_PER_OWNER:
+        for qs in _over_limit(ChatSession, "-updated_at", settings.CHAT_MAX_SESSIONS_PER_OWNER):
+            rules.append(("chat_sessions_over_limit", qs, delete_sessions))
+    if settings.UPLOAD_RETENTION_DAYS:
+        cutoff = now - timedelta(days=settings.UPLOAD_RETENTION_DAYS)
+        rules.append(("uploads_expired", UploadDataset.objects.filter(created_at__lt=cutoff), delete_uploads))
+    if settings.UPLOAD_MAX_PER_OWNER:
+        for qs in _over_limit(UploadDataset, "-created_at", settings.UPLOAD_MAX_PER_OWNER):
+            rules.append(("uploads_over_limit", qs, delete_uploads))
+    if settings.JOB_RETENTION_DAYS:
+        cutoff = now - timedelta(days=settings.JOB_RETENTION_DAYS)
+        finished = Job.objects.filter(status__in=[Job.STATUS_DONE, Job.STATUS_FAILED], finished_at__lt=cutoff)
+        rules.append(("jobs_finished", finished, _delete_rows))
+    if settings.PROFILE_RETENTION_DAYS:
+        cutoff = now - timedelta(days=settings.PROFILE_RETENTION_DAYS)
+        rules.append(("request_profiles", RequestProfile.objects.filter(created_at__lt=cutoff), _delete_rows))
+
+    counts: dict[str, int] = {}
+    for name, qs, delete in rules:
+        counts[name] = counts.get(name, 0) + (qs.count() if dry_run else delete(qs, batch_size))
+    return counts
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from django.db.models import F, Q
+from django.db.models.functions import Length
+
+from ..models import LoggerState
+
+# ?sort= values (prefix "-" for descending) and the columns they order by.
+SORTS = {
+    "id": "device_id",
+    "label": "label",
+    "type": "device_type",
+    "org": "org",
+    "battery": "battery",
+    "last": "last_utc",
+}
+TYPES = ("tdl", "htdl", "ltdl")
+
+
+def _order(field: str, descending: bool = False) -> list:
+    # Ids are numeric strings: shorter first, then by text, so "9" sorts before "10".
+    columns = [Length(field), F(field)] if field == "device_id" else [F(field)]
+    return [c.desc() if descending else c.asc() for c in columns]
+
+
+def lookup(account: str, device_id: str) -> LoggerState | None:
+    """One registered logger, by the (account, device_id) unique index."""
+    return LoggerState.objects.filter(account=account, device_id=str(device_id)).first()
+
+
+def payload(state: LoggerState) -> dict:
+    # The keys of blu_xml.parse_devices, plus the latest reading seen.
+    return {
+        "id": state.device_id,
+        "label": state.label,
+        "org": state.org,
+        "min_temp": state.min_temp,
+        "max_temp": state.max_temp,
+        "vrn": state.vrn,
+        "battery": state.battery,
+        "type": state.device_type,
+        "last_utc": state.last_utc,
+        "last_temp": state.last_temp,
+        "last_humidity": state.last_humidity,
+    }
+
+
+def query(
+    account: str,
+    search: str = "",
+    device_type: str | None = None,
+    org: str | None = None,
+    sort: str = "id",
+    page: int = 1,
+    page_size: int = 50,
+) -> dict:
+    """One page of the account's current loggers, filtered and sorted in the database.
+
+    Raises ValueError for an unknown sort or type.
+    """
+    field = SORTS.get(sort.lstrip("-"))
+    if not field:
+        raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+    if device_type and device_type not in TYPES:
+        raise ValueError(f"type must be one of {', '.join(TYPES)}")
+    fleet = LoggerState.objects.filter(account=account, in_fleet=True)
+    qs = fleet
+    if device_type:
+        qs = qs.filter(device_type=device_type)
+    if org:
+        qs = qs.filter(org=org)
+    if search:
+        qs = qs.filter(Q(device_id__icontains=search) | Q(label__icontains=search) | Q(org__icontains=search))
+    # device_id keeps pages stable when the sort column has ties.
+    order = _order(field, sort.startswith("-")) + _order("device_id")
+    rows = qs.order_by(*order)[(page - 1) * page_size:page * page_size]
+    return {
+        "devices": [payload(s) for s in rows],
+        "total": qs.count(),
+        "page": page,
+        "pageSize": page_size,
+        "orgs": list(fleet.exclude(org="").order_by("org").values_list("org", flat=True).distinct()),
+    }
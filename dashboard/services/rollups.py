@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Min, Sum
+
+from ..models import LoggerState, ReadingRollup, UploadDataset
+from ..utils.series import MAX_STEP_SECONDS, detect_columns, to_num, to_utc
+from . import bluconsole
+
+BUCKET_SECONDS = {
+    ReadingRollup.BUCKET_HOUR: 3600,
+    ReadingRollup.BUCKET_DAY: 86400,
+}
+
+
+def _bucket_start(utc: int, bucket: str) -> int:
+    size = BUCKET_SECONDS[bucket]
+    return utc - utc % size
+
+
+def _empty() -> dict:
+    return {"count": 0, "t_min": None, "t_max": None, "t_sum": 0.0, "seconds_above": 0.0}
+
+
+def _accumulate(points: list[dict], prev: tuple[int | None, float | None] | None, limit: float
+                ) -> dict[tuple[str, int], dict]:
+    prev_utc, prev_temp = prev or (None, None)
+    acc: dict[tuple[str, int], dict] = {}
+    for p in points:
+        utc = p.get("utc")
+        if not utc:
+            continue
+        t = p.get("t")
+        for bucket in BUCKET_SECONDS:
+            if t is not None:
+                agg = acc.setdefault((bucket, _bucket_start(utc, bucket)), _empty())
+                agg["count"] += 1
+                agg["t_sum"] += t
+                agg["t_min"] = t if agg["t_min"] is None else min(agg["t_min"], t)
+                agg["t_max"] = t if agg["t_max"] is None else max(agg["t_max"], t)
+            if prev_utc is not None and prev_temp is not None and prev_temp > limit:
+                # Time above the limit is credited to the bucket where the interval started.
+                agg = acc.setdefault((bucket, _bucket_start(prev_utc, bucket)), _empty())
+                agg["seconds_above"] += min(utc - prev_utc, MAX_STEP_SECONDS)
+        prev_utc = utc
+        if t is not None:
+            prev_temp = t
+    return acc
+
+
+def add_readings(
+    account: str,
+    series: str,
+    points: list[dict],
+    prev: tuple[int | None, float | None] | None = None,
+    limit: float | None = None,
+    upload: UploadDataset | None = None,
+) -> None:
+    """Fold readings (sorted by ``utc``, newer than ``prev``) into hourly and daily rollups."""
+    if limit is None:
+        limit = settings.ROLLUP_TEMP_LIMIT
+    acc = _accumulate(points, prev, limit)
+    if acc:
+        _merge(account, series, acc, limit, upload)
+
+
+def _merge(account: str, series: str, acc: dict[tuple[str, int], dict], limit: float,
+           upload: UploadDataset | None) -> None:
+    starts = {key: datetime.fromtimestamp(key[1], tz=dt_timezone.utc) for key in acc}
+    with transaction.atomic():
+        existing = {
+            (r.bucket, int(r.start.timestamp())): r
+            for r in ReadingRollup.objects.select_for_update().filter(
+                account=account, series=series, start__in=set(starts.values())
+            )
+        }
+        to_update = []
+        to_create = []
+        for key, agg in acc.items():
+            row = existing.get(key)
+            if row is None:
+                to_create.append(
+                    ReadingRollup(account=account, series=series, upload=upload, bucket=key[0],
+                                  start=starts[key], limit=limit, **agg)
+                )
+                continue
+            row.count += agg["count"]
+            row.t_sum += agg["t_sum"]
+            row.seconds_above += agg["seconds_above"]
+            if agg["t_min"] is not None:
+                row.t_min = agg["t_min"] if row.t_min is None else min(row.t_min, agg["t_min"])
+                row.t_max = agg["t_max"] if row.t_max is None else max(row.t_max, agg["t_max"])
+            row.limit = limit
+            to_update.append(row)
+        if to_update:
+            ReadingRollup.objects.bulk_update(
+                to_update, ["count", "t_sum", "t_min", "t_max", "seconds_above", "limit"], batch_size=500
+            )
+        if to_create:
+            ReadingRollup.objects.bulk_create(to_create, batch_size=500)
+
+
+def upload_points(headers: list[str], rows: list[dict]) -> list[dict]:
+    body = [[r.get(h) for h in headers] for r in rows[:200]]
+    time_col, temp_col = detect_columns(headers, body)
+    if not time_col or not temp_col:
+        return []
+    points = []
+    for r in rows:
+        utc = to_utc(r.get(time_col))
+        if utc is None:
+            continue
+        points.append({"utc": utc, "t": to_num(r.get(temp_col))})
+    points.sort(key=lambda p: p["utc"])
+    return points
+
+
+def rollup_upload(upload: UploadDataset) -> None:
+    series = f"upload:{upload.id}"
+    ReadingRollup.objects.filter(account=upload.owner_key, series=series).delete()
+    add_readings(upload.owner_key, series, upload_points(upload.headers, upload.rows), upload=upload)
+
+
+def series_rows(account: str, series: str, bucket: str, start_utc: int | None = None,
+                end_utc: int | None = None) -> list[dict]:
+    qs = ReadingRollup.objects.filter(account=account, series=series, bucket=bucket)
+    if start_utc:
+        qs = qs.filter(start__gte=datetime.fromtimestamp(_bucket_start(start_utc, bucket), tz=dt_timezone.utc))
+    if end_utc:
+        qs = qs.filter(start__lte=datetime.fromtimestamp(end_utc, tz=dt_timezone.utc))
+    return [
+        {
+            "utc": int(r["start"].timestamp()),
+            "count": r["count"],
+            "min": r["t_min"],
+            "max": r["t_max"],
+            "mean": r["t_sum"] / r["count"] if r["count"] else None,
+            "secondsAbove": r["seconds_above"],
+            "limit": r["limit"],
+        }
+        for r in qs.order_by("start").values("start", "count", "t_min", "t_max", "t_sum", "seconds_above", "limit")
+    ]
+
+
+def _backfill(creds: dict, device_id: str, start_utc: int, end_utc: int) -> None:
+    account = creds["uname"]
+    series = f"blu:{device_id}"
+    first = ReadingRollup.objects.filter(
+        account=account, series=series, bucket=ReadingRollup.BUCKET_HOUR
+    ).aggregate(m=Min("start"))["m"]
+    gap_end = min(int(first.timestamp()) - 1, end_utc) if first else end_utc
+    gap_start = max(start_utc, gap_end - settings.ROLLUP_BACKFILL_MAX_DAYS * 86400)
+    # How far back this series was backfilled, so covered (or empty)
+    # history is not fetched again on every read.
+    done_key = f"rollups:backfilled:{account}:{series}"
+    done = cache.get(done_key)
+    if gap_start > gap_end or (first and done is not None and done <= gap_start):
+        return
+    points = sorted(
+        (
+            p for p in bluconsole.fetch_measurements(
+                creds["uname"], creds["upass"], device_id=str(device_id), from_time=gap_start, to_time=gap_end
+            )
+            if p.get("utc") and gap_start <= p["utc"] <= gap_end
+        ),
+        key=lambda p: p["utc"],
+    )
+    if not first:
+        # Nothing ingested yet: ingest the readings as a live fetch would, so
+        # they are stored once and ingestion carries on after the newest.
+        from . import alerts  # alerts imports this module
+
+        alerts.ingest_readings(account, str(device_id), points)
+        return
+    limit = LoggerState.objects.filter(account=account, device_id=str(device_id)).values_list(
+        "max_temp", flat=True
+    ).first()
+    add_readings(account, series, points, limit=limit)
+    cache.set(done_key, gap_start, 86400)
+
+
+def logger_rows(creds: dict, device_id: str, bucket: str, start_utc: int, end_utc: int) -> list[dict]:
+    """series_rows for a live logger, backfilling history from before its first rollup.
+
+    Live ingestion (alerts.ingest_readings) only rolls up readings newer than
+    LoggerState.last_utc, so anything before a logger was first seen has no
+    rollups. Readings older than its earliest hourly bucket were never
+    ingested, so they are fetched and stored here without double counting.
+    A logger with no rollups at all has its readings ingested, which stores
+    them and moves last_utc past them.
+    """
+    lock_key = f"rollups:backfill:{creds['uname']}:{device_id}"
+    # One backfill per logger at a time; a concurrent read gets what is stored.
+    if cache.add(lock_key, 1, 120):
+        try:
+            _backfill(creds, device_id, start_utc, end_utc)
+        finally:
+            cache.delete(lock_key)
+    return series_rows(creds["uname"], f"blu:{device_id}", bucket, start_utc=start_utc, end_utc=end_utc)
+
+
+def summarize(account: str, series: list[str]) -> dict[str, dict]:
+    """Whole-history summary per series, read from daily rollups."""
+    rows = (
+        ReadingRollup.objects.filter(account=account, series__in=series, bucket=ReadingRollup.BUCKET_DAY)
+        .values("series")
+        .annotate(
+            lo=Min("t_min"),
+            hi=Max("t_max"),
+            total=Sum("t_sum"),
+            n=Sum("count"),
+            above=Sum("seconds_above"),
+            first=Min("start"),
+            last=Max("start"),
+        )
+    )
+    out = {}
+    for r in rows:
+        out[r["series"]] = {
+            "min": r["lo"],
+            "max": r["hi"],
+            "mean": r["total"] / r["n"] if r["n"] else None,
+            "count": r["n"],
+            "hoursAbove": round((r["above"] or 0) / 3600, 2),
+            "firstDay": r["first"].date().isoformat() if r["first"] else None,
+            "lastDay": r["last"].date().isoformat() if r["last"] else None,
+        }
+    return out
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from functools import cache
+
+from django.db import connection
+from django.db.models import Q
+
+from ..models import ChatMessage, ChatSession, Note, SearchDocument, UploadDataset
+
+FTS_TABLE = "dashboard_search_fts"
+MAX_TERMS = 8
+SNIPPET_CHARS = 160
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def owner_tag(owner_key: str) -> str:
+    """Single-token stand-in for owner_key inside the FTS5 index."""
+    return "o" + hashlib.sha256(owner_key.encode("utf-8")).hexdigest()[:20]
+
+
+def _upsert(lookup: dict, owner_key: str, kind: str, **fields) -> None:
+    SearchDocument.objects.update_or_create(
+        **lookup, defaults={"owner_key": owner_key, "owner_tag": owner_tag(owner_key), "kind": kind, **fields}
+    )
+
+
+def index_note(note: Note) -> None:
+    _upsert(
+        {"note": note}, note.owner_key, SearchDocument.KIND_NOTE,
+        title=note.title[:255], body=note.body, created_at=note.updated_at or note.created_at,
+    )
+
+
+def index_message(message: ChatMessage, session: ChatSession) -> None:
+    if not message.content:
+        return
+    _upsert(
+        {"message": message}, session.owner_key, SearchDocument.KIND_CHAT,
+        session_id=session.id, title=session.title[:255], body=message.content, created_at=message.created_at,
+    )
+
+
+def index_upload(upload: UploadDataset) -> None:
+    # Metadata only: the name and column headers, never the rows.
+    _upsert(
+        {"upload": upload}, upload.owner_key, SearchDocument.KIND_UPLOAD,
+        title=upload.name[:255], body=" ".join(str(h) for h in upload.headers or [] if h),
+        created_at=upload.created_at,
+    )
+
+
+@cache
+def _has_fts(alias: str) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def backend() -> str:
+    """Which index answers queries: postgresql, fts5, or basic (LIKE scan)."""
+    if connection.vendor == "postgresql":
+        return "postgresql"
+    if connection.vendor == "sqlite" and _has_fts(connection.alias):
+        return "fts5"
+    return "basic"
+
+
+def terms(query: str, limit: int = MAX_TERMS) -> list[str]:
+    return [t.lower() for t in _TERM_RE.findall(query)][:limit]
+
+
+_COLUMNS = "d.id, d.kind, d.note_id, d.message_id, d.upload_id, d.session_id, d.title, d.body, d.created_at"
+
+
+def _filters(kind: str | None, exclude_session: int | None) -> tuple[str, list]:
+    sql, params = "", []
+    if kind:
+        sql += " AND d.kind = %s"
+        params.append(kind)
+    if exclude_session:
+        sql += " AND (d.session_id IS NULL OR d.session_id <> %s)"
+        params.append(exclude_session)
+    return sql, params
+
+
+def _fts5(owner_key, words, any_term, kind, exclude_session, limit, offset):
+    # Search treats every word as a prefix ("temp" finds "temperature" while
+    # typing) and wants all of them; retrieval wants whole words, any of them.
+    terms_ = " OR ".join(f'"{w}"' for w in words) if any_term else " AND ".join(f'"{w}"*' for w in words)
+    match = f"owner_tag:{owner_tag(owner_key)} AND {{title body}}:({terms_})"
+    where, params = _filters(kind, exclude_session)
+    sql = (
+        f"SELECT {_COLUMNS}, bm25({FTS_TABLE}, 0.0, 2.0, 1.0) AS score"
+        f" FROM {FTS_TABLE} JOIN dashboard_searchdocument d ON d.id = {FTS_TABLE}.rowid"
+        f" WHERE {FTS_TABLE} MATCH %s AND d.owner_key = %s{where}"
+        " ORDER BY score, d.created_at DESC LIMIT %s OFFSET %s"
+    )
+    # bm25() is lower-is-better; flip it so every backend reports higher-is-better.
+    return SearchDocument.objects.raw(sql, [match, owner_key, *params, limit, offset]), -1
+
+
+def _postgres(owner_key, words, any_term, kind, exclude_session, limit, offset):
+    # Same expression as the dashboard_search_tsv_idx GIN index, so the planner uses it.
+    vector = "to_tsvector('english', d.title || ' ' || d.body)"
+    tsquery = " | ".join(words) if any_term else " & ".join(f"{w}:*" for w in words)
+    where, params = _filters(kind, exclude_session)
+    sql = (
+        f"SELECT {_COLUMNS}, ts_rank_cd({vector}, q) AS score"
+        f" FROM dashboard_searchdocument d, to_tsquery('english', %s) q"
+        f" WHERE d.owner_key = %s AND {vector} @@ q{where}"
+        " ORDER BY score DESC, d.created_at DESC LIMIT %s OFFSET %s"
+    )
+    return SearchDocument.objects.raw(sql, [tsquery, owner_key, *params, limit, offset]), 1
+
+
+def _basic(owner_key, words, any_term, kind, exclude_session, limit, offset):
+    qs = SearchDocument.objects.filter(owner_key=owner_key)
+    if kind:
+        qs = qs.filter(kind=kind)
+    if exclude_session:
+        qs = qs.filter(Q(session_id__isnull=True) | ~Q(session_id=exclude_session))
+    matches = [Q(title__icontains=w) | Q(body__icontains=w) for w in words]
+    combined = matches[0]
+    for m in matches[1:]:
+        combined = (combined | m) if any_term else (combined & m)
+    return qs.filter(combined).order_by("-created_at")[offset:offset + limit], 0
+
+
+def _query(owner_key, words, *, any_term=False, kind=None, exclude_session=None, limit=20, offset=0) -> list:
+    run = {"postgresql": _postgres, "fts5": _fts5, "basic": _basic}[backend()]
+    rows, sign = run(owner_key, words, any_term, kind, exclude_session, limit, offset)
+    rows = list(rows)
+    for doc in rows:
+        doc.score = round(sign * float(getattr(doc, "score", 0) or 0), 4)
+    return rows
+
+
+def snippet(text: str, words: list[str], size: int = SNIPPET_CHARS) -> str:
+    """About ``size`` characters of ``text`` around the first matching word."""
+    lowered = text.lower()
+    hits = [i for i in (lowered.find(w) for w in words) if i >= 0]
+    start = max(0, min(hits) - size // 4) if hits else 0
+    piece = " ".join(text[start:start + size].split())
+    return ("…" if start else "") + piece + ("…" if start + size < len(text) else "")
+
+
+def search(owner_key: str, query: str, kind: str | None = None, page: int = 1, page_size: int = 20) -> dict:
+    """Ranked, paginated matches for ``query`` among one owner's documents.
+
+    Fetches one row past the page to report ``has_more`` instead of counting
+    every match.
+    """
+    words = terms(query)
+    if not words:
+        return {"results": [], "page": page, "has_more": False, "backend": backend()}
+    rows = _query(owner_key, words, kind=kind, limit=page_size + 1, offset=(page - 1) * page_size)
+    results = []
+    for doc in rows[:page_size]:
+        results.append({
+            "kind": doc.kind,
+            "id": doc.note_id or doc.message_id or doc.upload_id,
+            "session_id": doc.session_id,
+            "title": doc.title,
+            "snippet": snippet(doc.body, words),
+            "created_at": doc.created_at,
+            "score": doc.score,
+        })
+    return {"results": results, "page": page, "has_more": len(rows) > page_size, "backend": backend()}
+
+
+# Common words that would match nearly every document; FTS5 has no stop list of its own.
+STOPWORDS = frozenset(
+    "a an and are as at be but by can could did do does for from had has have how i if in is it its me my "
+    "no not of on or our so that the their them then there these they this to us was we were what when "
+    "where which who why will with would you your about any just please show tell give".split()
+)
+CHUNK_CHARS = 600
+
+
+def _chunks(text: str, size: int = CHUNK_CHARS) -> list[str]:
+    # Paragraphs, merged up to ``size``; a longer paragraph is cut at ``size``.
+    out: list[str] = []
+    for para in (p.strip() for p in text.split("\n\n")):
+        while para:
+            piece, para = para[:size], para[size:]
+            if out and len(out[-1]) + len(piece) + 1 <= size:
+                out[-1] += "\n" + piece
+            else:
+                out.append(piece)
+    return out or [""]
+
+
+def _best_chunk(text: str, words: list[str]) -> str:
+    chunks = _chunks(text)
+    return max(chunks, key=lambda c: sum(c.lower().count(w) for w in words))
+
+
+def relevant(owner_key: str, prompt: str, k: int, budget: int, exclude_session: int | None = None) -> list[dict]:
+    """The ``k`` documents that best match ``prompt``, cut to fit ``budget`` characters.
+
+    Ranked by the same index as search(), but any prompt word may match and
+    each document contributes only its best-matching chunk.
+    """
+    words = [w for w in dict.fromkeys(terms(prompt, limit=64)) if w not in STOPWORDS and len(w) > 1][:16]
+    if not words:
+        return []
+    picked, used = [], 0
+    for doc in _query(owner_key, words, any_term=True, exclude_session=exclude_session, limit=k):
+        text = _best_chunk(doc.body, words)
+        cost = len(doc.title) + len(text)
+        if used + cost > budget:
+            continue
+        used += cost
+        picked.append({
+            "kind": doc.kind,
+            "id": doc.note_id or doc.message_id or doc.upload_id,
+            "session_id": doc.session_id,
+            "title": doc.title,
+            "text": text,
+            "created_at": doc.created_at,
+            "score": doc.score,
+        })
+    return picked
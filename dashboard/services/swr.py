@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _store(key: str, data: Any, max_stale: int) -> dict:
+    entry = {"at": time.time(), "data": data}
+    cache.set(f"swr:{key}", entry, max(1, max_stale))
+    return entry
+
+
+def _refresh_async(key: str, fetch: Callable[[], Any], max_stale: int) -> None:
+    lock_key = f"swr:refresh:{key}"
+    if not cache.add(lock_key, 1, settings.BLU_FLIGHT_LOCK_SECONDS):
+        return
+
+    def run():
+        try:
+            _store(key, fetch(), max_stale)
+        except Exception:  # noqa: BLE001
+            pass
+        finally:
+            cache.delete(lock_key)
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def _meta(entry: dict, stale: bool) -> dict:
+    return {
+        "fetchedAt": int(entry["at"]),
+        "ageSeconds": max(0, int(time.time() - entry["at"])),
+        "stale": stale,
+    }
+
+
+def serve(key: str, fetch: Callable[[], Any], fresh: int, max_stale: int) -> tuple[Any, dict]:
+    """Last known good result for ``key`` plus freshness metadata.
+
+    Within ``fresh`` seconds the cached result is returned as is. Up to
+    ``max_stale`` seconds it is still returned immediately while one background
+    refresh runs. Past that, or on a miss, ``fetch`` runs inline.
+    """
+    if max_stale <= 0:
+        return fetch(), {"fetchedAt": int(time.time()), "ageSeconds": 0, "stale": False}
+    entry = cache.get(f"swr:{key}")
+    if entry is not None:
+        age = time.time() - entry["at"]
+        if age < fresh:
+            return entry["data"], _meta(entry, stale=False)
+        if age < max_stale:
+            _refresh_async(key, fetch, max_stale)
+            return entry["data"], _meta(entry, stale=True)
+    entry = _store(key, fetch(), max_stale)
+    return entry["data"], _meta(entry, stale=False)
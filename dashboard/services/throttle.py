@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import time
+import uuid
+from contextlib import contextmanager
+from time import monotonic, sleep
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Per-account limits on BluConsole traffic, kept in the shared cache so every
+# worker draws from the same budget:
+# - a token bucket caps the request rate (BLU_RATE_PER_SECOND, BLU_RATE_BURST);
+# - an AIMD concurrency limit caps requests in flight. It grows by ~1 per
+#   round of healthy responses and halves on errors or slow responses.
+# State changes happen under a short cache.add mutex, which is cheap next to
+# the upstream call it guards.
+
+LEASE_SECONDS = 30
+STATE_SECONDS = 3600
+
+
+class UpstreamBusy(Exception):
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        # Whole seconds until the budget is likely to admit the request.
+        self.retry_after = retry_after
+
+
+def _key(account: str) -> str:
+    return hashlib.sha256(account.encode("utf-8")).hexdigest()[:24]
+
+
+@contextmanager
+def _locked(key: str):
+    mutex = f"blu:throttle:mutex:{key}"
+    acquired = False
+    deadline = monotonic() + 1.0
+    while True:
+        acquired = cache.add(mutex, 1, 2)
+        # A crashed holder's mutex expires on its own; past the deadline we
+        # proceed unlocked rather than stall the request.
+        if acquired or monotonic() > deadline:
+            break
+        sleep(0.005)
+    try:
+        yield
+    finally:
+        if acquired:
+            cache.delete(mutex)
+
+
+def _load(key: str, now: float) -> dict:
+    state = cache.get(f"blu:throttle:{key}")
+    if state is None:
+        state = {
+            "tokens": float(settings.BLU_RATE_BURST),
+            "ts": now,
+            "limit": float(settings.BLU_CONCURRENCY_INITIAL),
+            "leases": {},
+            "decreased_at": 0.0,
+        }
+    rate = settings.BLU_RATE_PER_SECOND
+    state["tokens"] = min(float(settings.BLU_RATE_BURST), state["tokens"] + max(0.0, now - state["ts"]) * rate)
+    state["ts"] = now
+    # Leases left behind by a worker that died mid-request.
+    state["leases"] = {lease: exp for lease, exp in state["leases"].items() if exp > now}
+    return state
+
+
+def _save(key: str, state: dict) -> None:
+    cache.set(f"blu:throttle:{key}", state, STATE_SECONDS)
+
+
+def acquire(account: str) -> str | None:
+    """Wait for a rate token and a concurrency slot; returns a lease for :func:`release`."""
+    if settings.BLU_RATE_PER_SECOND <= 0:
+        return None
+    key = _key(account)
+    deadline = monotonic() + settings.BLU_THROTTLE_MAX_WAIT_SECONDS
+    while True:
+        with _locked(key):
+            now = time.time()
+            state = _load(key, now)
+            has_slot = len(state["leases"]) < max(1, int(state["limit"]))
+            if state["tokens"] >= 1 and has_slot:
+                state["tokens"] -= 1
+                lease = uuid.uuid4().hex
+                state["leases"][lease] = now + LEASE_SECONDS
+                _save(key, state)
+                return lease
+            _save(key, state)
+        wait = (1 - state["tokens"]) / settings.BLU_RATE_PER_SECOND if state["tokens"] < 1 else 0.05
+        wait = min(max(wait, 0.01), 0.25)
+        if monotonic() + wait > deadline:
+            # The next token's arrival, or a second for a concurrency slot.
+            retry = (1 - state["tokens"]) / settings.BLU_RATE_PER_SECOND if state["tokens"] < 1 else 1.0
+            raise UpstreamBusy("BluConsole is busy for this account; try again shortly.", max(1, math.ceil(retry)))
+        sleep(wait)
+
+
+def release(account: str, lease: str | None, latency: float, ok: bool) -> None:
+    if lease is None:
+        return
+    key = _key(account)
+    with _locked(key):
+        now = time.time()
+        state = _load(key, now)
+        state["leases"].pop(lease, None)
+        limit = state["limit"]
+        if not ok or latency > settings.BLU_LATENCY_TARGET_SECONDS:
+            # One decrease per latency window, so a burst of failures from the
+            # same congested moment does not collapse the limit to the floor.
+            if now - state["decreased_at"] >= settings.BLU_LATENCY_TARGET_SECONDS:
+                limit = max(float(settings.BLU_CONCURRENCY_MIN), limit * 0.5)
+                state["decreased_at"] = now
+        else:
+            limit = min(float(settings.BLU_CONCURRENCY_MAX), limit + 1.0 / max(limit, 1.0))
+        state["limit"] = limit
+        _save(key, state)
+
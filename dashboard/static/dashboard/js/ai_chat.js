@@ -12,18 +12,36 @@
   const MAX_SIZE = 5 * 1024 * 1024;
   let currentSessionId = null;
   let pendingAttachment = null;
+  // Cursors for the next (older) page of sessions and of the open chat; null when there is none.
+  let sessionsCursor = null;
+  let messagesCursor = null;
+  let loadingMore = false;
 
-  const addMessage = (role, text) => {
-    if (!log) return;
+  const messageCard = (role, text) => {
     const card = document.createElement("div");
     card.className = "rounded-2xl border border-slate-200 bg-white p-4 text-slate-800";
     card.innerHTML = `
       <p class="font-medium ${role === "user" ? "text-brick" : "text-auburn"} mb-1">${role === "user" ? "You" : "Assistant"}</p>
       <p class="whitespace-pre-line">${text}</p>
     `;
-    log.appendChild(card);
+    return card;
+  };
+
+  const addMessage = (role, text) => {
+    if (!log) return;
+    log.appendChild(messageCard(role, text));
   };
 
+  // Sentinels: scrolling one into view loads the next page.
+  const olderMessages = document.createElement("button");
+  olderMessages.type = "button";
+  olderMessages.className = "hidden w-full text-center text-xs text-auburn underline";
+  olderMessages.textContent = "Load earlier messages";
+  const moreSessions = document.createElement("button");
+  moreSessions.type = "button";
+  moreSessions.className = "hidden w-full text-center text-xs text-auburn underline";
+  moreSessions.textContent = "Load older chats";
+
   const formatDt = (iso) => {
     try {
       return new Date(iso).toLocaleString();
@@ -33,6 +51,8 @@
   };
 
   const clearLog = () => {
+    messagesCursor = null;
+    olderMessages.classList.add("hidden");
     if (log) log.innerHTML = "";
   };
 
@@ -207,6 +227,21 @@
           return;
         }
         pendingAttachment = data.attachment || null;
+        if (res.status === 202 && data.job) {
+          if (uploadHint) {
+            uploadHint.textContent = `Processing ${file.name}...`;
+            uploadHint.classList.remove("hidden", "text-red-600");
+          }
+          const job = await window.BluDash.waitForJob(data.job.id);
+          if (job.status !== "done") {
+            if (uploadHint) {
+              uploadHint.textContent = job.error || "Attachment could not be parsed.";
+              uploadHint.classList.add("text-red-600");
+            }
+            return;
+          }
+          pendingAttachment = job.result.attachment;
+        }
       } catch {
         pendingAttachment = null;
       }
@@ -273,49 +308,114 @@
     }
   };
 
+  const sessionButton = (s) => {
+    const btn = document.createElement("button");
+    btn.className =
+      "w-full text-left rounded-lg border border-slate-200 px-3 py-2 hover:border-auburn/40";
+    btn.innerHTML = `
+      <div class="text-sm font-medium text-slate-800">${s.title}</div>
+      <div class="text-xs text-slate-500 truncate" data-preview></div>
+      <div class="text-xs text-slate-500">${formatDt(s.updated_at)} · ${s.message_count} messages</div>
+    `;
+    btn.querySelector("[data-preview]").textContent = s.preview || "";
+    btn.addEventListener("click", async () => {
+      currentSessionId = s.id;
+      await loadSessionMessages(s.id);
+    });
+    return btn;
+  };
+
+  const fetchSessions = async (cursor) => {
+    const res = await fetch(`/api/ai-chat/sessions/${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ""}`);
+    const data = await res.json();
+    sessionsCursor = data.next_cursor || null;
+    moreSessions.classList.toggle("hidden", !sessionsCursor);
+    return data.sessions || [];
+  };
+
   const loadSessions = async () => {
     if (!historyWrap || !historyEmpty) return;
     try {
-      const res = await fetch("/api/ai-chat/sessions/");
-      const data = await res.json();
-      const sessions = data.sessions || [];
+      const sessions = await fetchSessions(null);
       historyWrap.innerHTML = "";
       if (!sessions.length) {
         historyEmpty.classList.remove("hidden");
         return;
       }
       historyEmpty.classList.add("hidden");
-      sessions.forEach((s) => {
-        const btn = document.createElement("button");
-        btn.className =
-          "w-full text-left rounded-lg border border-slate-200 px-3 py-2 hover:border-auburn/40";
-        btn.innerHTML = `
-          <div class="text-sm font-medium text-slate-800">${s.title}</div>
-          <div class="text-xs text-slate-500">${formatDt(s.updated_at)}</div>
-        `;
-        btn.addEventListener("click", async () => {
-          currentSessionId = s.id;
-          await loadSessionMessages(s.id);
-        });
-        historyWrap.appendChild(btn);
-      });
+      sessions.forEach((s) => historyWrap.appendChild(sessionButton(s)));
+      historyWrap.appendChild(moreSessions);
     } catch {
       historyEmpty.classList.remove("hidden");
     }
   };
 
+  const loadMoreSessions = async () => {
+    if (!sessionsCursor || loadingMore) return;
+    loadingMore = true;
+    try {
+      const sessions = await fetchSessions(sessionsCursor);
+      sessions.forEach((s) => historyWrap.insertBefore(sessionButton(s), moreSessions));
+    } catch {
+      moreSessions.classList.add("hidden");
+    } finally {
+      loadingMore = false;
+    }
+  };
+
+  const fetchMessages = async (sessionId, cursor) => {
+    const qs = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+    const res = await fetch(`/api/ai-chat/sessions/${sessionId}/${qs}`);
+    const data = await res.json();
+    messagesCursor = data.next_cursor || null;
+    olderMessages.classList.toggle("hidden", !messagesCursor);
+    return data.messages || [];
+  };
+
   const loadSessionMessages = async (sessionId) => {
     clearLog();
     try {
-      const res = await fetch(`/api/ai-chat/sessions/${sessionId}/`);
-      const data = await res.json();
-      const messages = data.messages || [];
+      const messages = await fetchMessages(sessionId, null);
+      log.appendChild(olderMessages);
       messages.forEach((m) => addMessage(m.role, m.content));
     } catch {
       addMessage("assistant", "Unable to load this chat history.");
     }
   };
 
+  const loadOlderMessages = async () => {
+    if (!messagesCursor || !currentSessionId || loadingMore) return;
+    loadingMore = true;
+    const sessionId = currentSessionId;
+    try {
+      const messages = await fetchMessages(sessionId, messagesCursor);
+      if (sessionId !== currentSessionId) return;
+      // Prepend without moving what the reader is looking at.
+      const before = document.documentElement.scrollHeight;
+      const anchor = olderMessages.nextSibling;
+      messages.forEach((m) => log.insertBefore(messageCard(m.role, m.content), anchor));
+      window.scrollBy(0, document.documentElement.scrollHeight - before);
+    } catch {
+      olderMessages.classList.add("hidden");
+    } finally {
+      loadingMore = false;
+    }
+  };
+
+  olderMessages.addEventListener("click", loadOlderMessages);
+  moreSessions.addEventListener("click", loadMoreSessions);
+  if ("IntersectionObserver" in window) {
+    const observer = new IntersectionObserver((entries) => {
+      entries.forEach((entry) => {
+        if (!entry.isIntersecting) return;
+        if (entry.target === olderMessages) loadOlderMessages();
+        else loadMoreSessions();
+      });
+    });
+    observer.observe(olderMessages);
+    observer.observe(moreSessions);
+  }
+
   if (newChatBtn) {
     newChatBtn.addEventListener("click", () => {
       currentSessionId = null;
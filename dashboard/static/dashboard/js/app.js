@@ -24,5 +24,31 @@
     });
   }
 
-  window.BluDash = { csrfFetch };
+  // Server responses served from cache carry ageSeconds/stale.
+  const freshnessLabel = (res) => {
+    if (!res || typeof res.ageSeconds !== "number") return "";
+    const age = res.ageSeconds;
+    let text;
+    if (age < 5) text = "updated just now";
+    else if (age < 90) text = `updated ${age} seconds ago`;
+    else if (age < 5400) text = `updated ${Math.round(age / 60)} minutes ago`;
+    else text = `updated ${Math.round(age / 3600)} hours ago`;
+    return res.stale ? `${text} (refreshing)` : text;
+  };
+
+  // Poll a background job (202 responses carry { job }) until it is done or failed.
+  const waitForJob = async (jobId, onProgress) => {
+    let delay = 500;
+    for (;;) {
+      const res = await fetch(`/api/jobs/${jobId}/`);
+      if (!res.ok) throw new Error("Job status unavailable");
+      const { job } = await res.json();
+      if (job.status === "done" || job.status === "failed") return job;
+      if (onProgress) onProgress(job);
+      await new Promise((resolve) => setTimeout(resolve, delay));
+      delay = Math.min(delay * 1.5, 3000);
+    }
+  };
+
+  window.BluDash = { csrfFetch, freshnessLabel, waitForJob };
 })();
@@ -8,7 +8,7 @@
     { tag: "Devices & measurements", q: "What is VRN?", a: "VRN is the device firmware version/build reference number. It is useful for fleet management and support." },
     { tag: "BluConsole", q: "How does the app connect to BluConsole?", a: "When you log in with BluConsole credentials, the app calls the BluConsole API to list devices and fetch their measurements for the selected time window. Your credentials are stored only in your browser session." },
     { tag: "BluConsole", q: "Why do I see no devices after logging in?", a: "Your account may have no devices, or there is a permission or org mismatch. Click Refresh, confirm your org scope in BluConsole, and check network restrictions or VPN if applicable." },
-    { tag: "Uploads & charts", q: "What Excel formats can I upload?", a: "Standard Excel workbooks (.xlsx, .xlsm, .xlsb, .xls). The app reads the first worksheet and tries to detect time, temperature, and humidity columns automatically." },
+    { tag: "Uploads & charts", q: "What file formats can I upload?", a: "Excel workbooks (.xlsx, and legacy .xls where the server supports it), CSV or tab-separated logger exports, and raw BluConsole XML. For workbooks the app reads the first worksheet; in every case it tries to detect time, temperature, and humidity columns automatically. CSV is the fastest to process." },
     { tag: "Uploads & charts", q: "How does the app detect the time and temperature columns?", a: "It looks for common header names (time, timestamp, date, temp, temperature, etc.) and validates samples. You can still use datasets with different headers as long as they contain time-like and numeric columns." },
     { tag: "Uploads & charts", q: "Why does the X-axis show hours like 0.50h, 1.00h?", a: "For readability the chart buckets points by a chosen interval and plots the mean temperature for each bucket measured as hours from the first reading." },
     { tag: "Uploads & charts", q: "What does the AI cut-off do?", a: "It computes exposure metrics relative to a chosen temperature threshold: hours above, percent time above, upward excursions, longest streak above, and min/avg/max across the range." },
@@ -35,7 +35,7 @@
     { tag: "Troubleshooting", q: "Measurements look shifted or in the wrong time zone.", a: "Make sure your export has explicit timestamps with time zone or ISO-8601 strings. The app converts recognized timestamps to your local time for display." },
     { tag: "Troubleshooting", q: "Why is there 'No logger selected' or an empty chart?", a: "Choose a logger in the right panel (BluConsole loggers) or pick a file from Upload history. If it is still empty, there may be no points in the selected window." },
     { tag: "Troubleshooting", q: "The file uploaded but charts don't show values.", a: "Check that the first sheet has a header row and a time-like column plus numeric temperature values. If needed, rename headers to include words like 'time' and 'temperature'." },
-    { tag: "Troubleshooting", q: "How do I export a chart image or the processed data?", a: "Use your OS or browser screenshot tools for images. For data, export from BluConsole or re-use your original file." },
+    { tag: "Troubleshooting", q: "How do I export a chart image or the processed data?", a: "Use your OS or browser screenshot tools for images. For data, use Export CSV on the Visualizations page for a logger range, or the CSV link next to an upload. NDJSON is available with format=ndjson." },
   ];
 
   const search = document.getElementById("faq-search");
@@ -35,12 +35,16 @@
     return res.json();
   };
 
-  const getLatestPoint = (points) => {
-    if (!points || !points.length) return null;
-    return points.reduce((latest, cur) => {
-      if (!latest || (cur.utc || 0) > (latest.utc || 0)) return cur;
-      return latest;
-    }, null);
+  const KIND_BADGES = {
+    out_of_range: null,
+    stale: "No Check-in",
+    low_battery: "Low Battery",
+    shelf_life: "Shelf-life Loss",
+  };
+
+  const badgeFor = (a) => {
+    if (a.kind === "out_of_range") return a.status === "high" ? "Above Max" : "Below Min";
+    return KIND_BADGES[a.kind] || a.kind;
   };
 
   const renderAlerts = (alerts) => {
@@ -52,24 +56,25 @@
       return;
     }
     alertsEmpty.classList.add("hidden");
-    alerts.forEach((a) => {
+    alerts.forEach((alert) => {
+      const a = Object.assign({}, alert.details || {}, alert);
+      const hot = a.status === "high";
       const card = document.createElement("div");
       card.className = `rounded-2xl border p-4 shadow-sm ${
-        a.status === "high" ? "border-red-500/40 bg-red-50" : "border-blue-500/40 bg-blue-50"
+        hot ? "border-red-500/40 bg-red-50" : "border-blue-500/40 bg-blue-50"
       }`;
       card.innerHTML = `
         <div class="flex items-center justify-between">
           <div class="text-sm text-slate-700">
             <span class="font-semibold text-auburn">Logger:</span>
-            <span class="font-medium">${a.id || "-"}</span>
-            <span class="uppercase text-slate-500">(${a.type})</span>
+            <span class="font-medium">${a.device_id || "-"}</span>
+            <span class="uppercase text-slate-500">(${a.type || "-"})</span>
           </div>
-          <div class="text-xs rounded-full px-2 py-0.5 ${
-            a.status === "high" ? "bg-red-600 text-white" : "bg-blue-600 text-white"
-          }">
-            ${a.status === "high" ? "Above Max" : "Below Min"}
+          <div class="text-xs rounded-full px-2 py-0.5 ${hot ? "bg-red-600 text-white" : "bg-blue-600 text-white"}">
+            ${badgeFor(a)}
           </div>
         </div>
+        <div class="mt-1 text-sm text-slate-700">${a.message || ""}</div>
         <div class="mt-2 grid grid-cols-2 gap-2 text-sm text-slate-800">
           <div>
             <div><span class="text-slate-600">Current Temp:</span> <span class="font-semibold">${a.currentT ?? "-"} C</span></div>
@@ -123,6 +128,39 @@
     });
   };
 
+  const applySnapshot = (data) => {
+    const alerts = (data.alerts || []).slice();
+    alerts.sort((a, b) => ((b.details || {}).at || 0) - ((a.details || {}).at || 0));
+    renderAlerts(alerts);
+    renderStatus(
+      (data.devices || []).map((d) => ({
+        ...d,
+        lastUpdate: d.lastUtc ? new Date(d.lastUtc * 1000).toLocaleString() : "-",
+      }))
+    );
+    if (alertsLoading) alertsLoading.textContent = "";
+    if (alertsError) alertsError.textContent = "";
+  };
+
+  const subscribe = () => {
+    // The server evaluates alert rules; the browser revalidates its cached
+    // snapshot with If-None-Match, so an unchanged poll is an empty 304.
+    let delay = 15000;
+    const poll = async () => {
+      try {
+        const res = await fetch("/api/alerts/", { cache: "no-cache" });
+        if (!res.ok) throw new Error("Request failed");
+        const data = await res.json();
+        if (data.poll_seconds) delay = data.poll_seconds * 1000;
+        applySnapshot(data);
+      } catch {
+        if (alertsError) alertsError.textContent = "Failed to load alerts";
+      }
+      setTimeout(poll, document.hidden ? delay * 4 : delay);
+    };
+    poll();
+  };
+
   const load = async () => {
     try {
       const status = await fetchJson("/api/blu/status/");
@@ -134,90 +172,8 @@
       const lastName = profileData.profile?.lastName || "";
       setHeader(true, lastName);
       if (alertsSection) alertsSection.classList.remove("hidden");
-
       if (alertsLoading) alertsLoading.textContent = "Loading...";
-      const devicesRes = await fetchJson("/api/blu/devices/");
-      const devices = devicesRes.devices || [];
-      const now = Math.floor(Date.now() / 1000);
-      const from = now - 48 * 3600;
-
-      const results = {};
-      const concurrency = 5;
-      let index = 0;
-      const worker = async () => {
-        while (index < devices.length) {
-          const d = devices[index++];
-          if (!d.id) continue;
-          try {
-            const q = new URLSearchParams({
-              id: d.id,
-              fromTime: String(from),
-              toTime: String(now),
-            });
-            const meas = await fetchJson(`/api/blu/measurements/?${q.toString()}`);
-            results[d.id] = getLatestPoint(meas.points || []);
-          } catch {
-            results[d.id] = null;
-          }
-        }
-      };
-      await Promise.all(Array.from({ length: Math.min(concurrency, devices.length) }, worker));
-
-      const alerts = [];
-      const statusItems = [];
-      devices.forEach((d) => {
-        const lv = results[d.id] || {};
-        const t = lv.t ?? null;
-        if (t != null && (d.min_temp != null || d.max_temp != null)) {
-          if (d.min_temp != null && t < d.min_temp) {
-            alerts.push({
-              id: d.id,
-              type: d.type,
-              label: d.label,
-              org: d.org,
-              currentT: t,
-              currentH: lv.h ?? null,
-              min: d.min_temp,
-              max: d.max_temp,
-              at: lv.utc ?? null,
-              battery: d.battery,
-              status: "low",
-            });
-          } else if (d.max_temp != null && t > d.max_temp) {
-            alerts.push({
-              id: d.id,
-              type: d.type,
-              label: d.label,
-              org: d.org,
-              currentT: t,
-              currentH: lv.h ?? null,
-              min: d.min_temp,
-              max: d.max_temp,
-              at: lv.utc ?? null,
-              battery: d.battery,
-              status: "high",
-            });
-          }
-        }
-
-        const lastUtc = lv.utc ?? null;
-        const minutesSince = lastUtc ? Math.floor((now - lastUtc) / 60) : null;
-        const isOnline = minutesSince !== null && minutesSince < 30;
-        const isDataFlowing = minutesSince !== null && minutesSince < 15;
-        statusItems.push({
-          id: d.id,
-          label: d.label,
-          battery: d.battery,
-          lastUpdate: lastUtc ? new Date(lastUtc * 1000).toLocaleString() : "-",
-          online: isOnline,
-          collecting: isDataFlowing,
-        });
-      });
-
-      alerts.sort((a, b) => (b.at || 0) - (a.at || 0));
-      renderAlerts(alerts);
-      renderStatus(statusItems);
-      if (alertsLoading) alertsLoading.textContent = "";
+      subscribe();
     } catch (err) {
       if (alertsError) alertsError.textContent = "Failed to load devices";
     }
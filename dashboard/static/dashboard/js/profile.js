@@ -12,7 +12,8 @@
   const noteHeading = document.getElementById("note-heading");
   const noteCancel = document.getElementById("note-cancel");
 
-  let photoDataUrl = "";
+  let photoUrl = "";
+  let photoDataUrl = null;
   let editingId = null;
 
   const fetchJson = async (url, options) => {
@@ -48,8 +49,9 @@
       form.firstName.value = firstName;
       form.lastName.value = lastName;
     }
-    photoDataUrl = profile.photoDataUrl || "";
-    setAvatar(photoDataUrl, getInitials(firstName, lastName));
+    photoUrl = (profile.photoThumbs || {})["160"] || profile.photoUrl || "";
+    photoDataUrl = null;
+    setAvatar(photoUrl, getInitials(firstName, lastName));
     if (nameEl) nameEl.textContent = [firstName, lastName].filter(Boolean).join(" ").trim() || "Your profile";
     if (emailEl) emailEl.textContent = profile.email || "Guest (BluConsole-only login)";
   };
@@ -59,14 +61,15 @@
     const payload = {
       firstName: form.firstName.value.trim(),
       lastName: form.lastName.value.trim(),
-      photoDataUrl: photoDataUrl || "",
     };
+    // Only send the photo when a new one was picked.
+    if (photoDataUrl !== null) payload.photoDataUrl = photoDataUrl;
     await fetchJson("/api/profile/", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify(payload),
     });
-    setAvatar(photoDataUrl, getInitials(payload.firstName, payload.lastName));
+    setAvatar(photoDataUrl || photoUrl, getInitials(payload.firstName, payload.lastName));
     if (nameEl) nameEl.textContent = [payload.firstName, payload.lastName].filter(Boolean).join(" ").trim() || "Your profile";
     if (saved) {
       saved.classList.remove("hidden");
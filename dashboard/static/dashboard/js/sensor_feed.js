@@ -14,11 +14,30 @@
   const historyWrap = document.getElementById("history-table-wrap");
   const historyBody = document.getElementById("history-body");
   const clearHistory = document.getElementById("clear-history");
+  const deviceSearch = document.getElementById("device-search");
+  const deviceType = document.getElementById("device-type");
+  const deviceOrg = document.getElementById("device-org");
+  const deviceSort = document.getElementById("device-sort");
+  const devicePrev = document.getElementById("device-prev");
+  const deviceNext = document.getElementById("device-next");
+  const devicePageInfo = document.getElementById("device-page-info");
 
+  const PAGE_SIZE = 50;
   let devices = [];
+  let devicePage = 1;
+  let deviceTotal = 0;
+  let deviceRequest = 0;
 
-  const fetchJson = async (url) => {
+  const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+  const fetchJson = async (url, retries = 2) => {
     const res = await fetch(url);
+    // 429: over the account's BluConsole budget; the server says when to come back.
+    if (res.status === 429 && retries > 0) {
+      const wait = Number(res.headers.get("Retry-After")) || 1;
+      await sleep(Math.min(wait, 10) * 1000);
+      return fetchJson(url, retries - 1);
+    }
     if (!res.ok) throw new Error("Request failed");
     return res.json();
   };
@@ -70,18 +89,59 @@
     });
   };
 
+  const renderOrgs = (orgs) => {
+    if (!deviceOrg) return;
+    const selected = deviceOrg.value;
+    deviceOrg.innerHTML = '<option value="">All orgs</option>';
+    (orgs || []).forEach((org) => {
+      const opt = document.createElement("option");
+      opt.value = org;
+      opt.textContent = org;
+      deviceOrg.appendChild(opt);
+    });
+    deviceOrg.value = (orgs || []).includes(selected) ? selected : "";
+  };
+
+  const renderPager = () => {
+    const pages = Math.max(1, Math.ceil(deviceTotal / PAGE_SIZE));
+    if (devicePageInfo) {
+      const first = deviceTotal ? (devicePage - 1) * PAGE_SIZE + 1 : 0;
+      devicePageInfo.textContent = `${first}-${Math.min(devicePage * PAGE_SIZE, deviceTotal)} of ${deviceTotal}`;
+    }
+    if (devicePrev) devicePrev.disabled = devicePage <= 1;
+    if (deviceNext) deviceNext.disabled = devicePage >= pages;
+  };
+
   const loadDevices = async () => {
     if (refreshBtn) refreshBtn.disabled = true;
+    // Search, filters, sort and paging run on the server; only this page is rendered and polled.
+    const request = ++deviceRequest;
+    const qs = new URLSearchParams({
+      q: deviceSearch ? deviceSearch.value.trim() : "",
+      type: deviceType ? deviceType.value : "",
+      org: deviceOrg ? deviceOrg.value : "",
+      sort: deviceSort ? deviceSort.value : "id",
+      page: String(devicePage),
+      pageSize: String(PAGE_SIZE),
+    });
     try {
-      const res = await fetchJson("/api/blu/devices/");
+      const res = await fetchJson(`/api/blu/devices/?${qs.toString()}`);
+      if (request !== deviceRequest) return;
       devices = (res.devices || []).map((d) => ({
         ...d,
-        cur_t: null,
-        cur_h: null,
-        liveAtUtc: null,
+        cur_t: d.last_temp ?? null,
+        cur_h: d.last_humidity ?? null,
+        liveAtUtc: d.last_utc ?? null,
       }));
+      deviceTotal = res.total || 0;
+      renderOrgs(res.orgs);
+      renderPager();
       renderDevices();
-      if (lastRefreshed) lastRefreshed.textContent = `Last refreshed: ${new Date().toLocaleString()}`;
+      if (lastRefreshed) {
+        const fetchedAt = res.fetchedAt ? new Date(res.fetchedAt * 1000) : new Date();
+        const freshness = window.BluDash.freshnessLabel(res);
+        lastRefreshed.textContent = `Last refreshed: ${fetchedAt.toLocaleString()}${freshness ? ` (${freshness})` : ""}`;
+      }
       await loadLiveForDevices();
     } catch {
       renderDevices();
@@ -97,7 +157,8 @@
     const from = now - 48 * 3600;
     const results = {};
     let idx = 0;
-    const pool = 5;
+    // Under the default BluConsole budget (5/s, burst 10) so requests rarely hit 429.
+    const pool = 3;
     const worker = async () => {
       while (idx < devices.length) {
         const d = devices[idx++];
@@ -189,7 +250,22 @@
       alert((data && data.error) || "Upload failed. Check the server log for details.");
       return;
     }
-    const upload = data.upload;
+    let upload = data.upload;
+    if (res.status === 202 && data.job) {
+      const showProgress = (job) => {
+        if (!loadedFile) return;
+        loadedFile.textContent = `Processing ${file.name}: ${job.message || job.status} (${Math.round(job.progress * 100)}%)`;
+        loadedFile.classList.remove("hidden");
+      };
+      showProgress(data.job);
+      const job = await window.BluDash.waitForJob(data.job.id, showProgress);
+      if (job.status !== "done") {
+        if (loadedFile) loadedFile.classList.add("hidden");
+        alert(job.error || "Upload failed. Check the server log for details.");
+        return;
+      }
+      upload = (await fetchJson(`/api/uploads/${job.result.upload_id}/`)).upload;
+    }
     renderPreview(upload.name, upload.headers || [], upload.rows || []);
     await loadHistory();
   };
@@ -232,6 +308,30 @@
   };
 
   if (refreshBtn) refreshBtn.addEventListener("click", loadDevices);
+  const reloadFirstPage = () => {
+    devicePage = 1;
+    loadDevices();
+  };
+  let searchTimer = null;
+  if (deviceSearch) {
+    deviceSearch.addEventListener("input", () => {
+      clearTimeout(searchTimer);
+      searchTimer = setTimeout(reloadFirstPage, 250);
+    });
+  }
+  [deviceType, deviceOrg, deviceSort].forEach((el) => el && el.addEventListener("change", reloadFirstPage));
+  if (devicePrev) {
+    devicePrev.addEventListener("click", () => {
+      devicePage = Math.max(1, devicePage - 1);
+      loadDevices();
+    });
+  }
+  if (deviceNext) {
+    deviceNext.addEventListener("click", () => {
+      devicePage += 1;
+      loadDevices();
+    });
+  }
   if (manualUpload) manualUpload.addEventListener("change", (e) => uploadFile(e.target.files?.[0]));
   if (clearPreview) clearPreview.addEventListener("click", clearPreviewTable);
   if (clearHistory) {
@@ -1,6 +1,9 @@
 (() => {
   const liveTitle = document.getElementById("live-title");
   const liveRefresh = document.getElementById("live-refresh");
+  const liveRange = document.getElementById("live-range");
+  const liveUpdated = document.getElementById("live-updated");
+  const liveExport = document.getElementById("live-export");
   const liveCard = document.getElementById("live-card");
   const liveEmpty = document.getElementById("live-empty");
   const liveError = document.getElementById("live-error");
@@ -20,6 +23,16 @@
   let uploadChart = null;
   let uploadSeries = [];
 
+  // Ranges past 48h and large uploads are charted from server-side rollups
+  // instead of raw readings.
+  const LIVE_RANGES = {
+    "48h": { seconds: 48 * 3600, bucket: null, label: "last 48h" },
+    "7d": { seconds: 7 * 86400, bucket: "hour", label: "last 7 days, hourly" },
+    "30d": { seconds: 30 * 86400, bucket: "hour", label: "last 30 days, hourly" },
+    "90d": { seconds: 90 * 86400, bucket: "day", label: "last 90 days, daily" },
+  };
+  const UPLOAD_ROLLUP_MIN_ROWS = 5000;
+
   const fetchJson = async (url) => {
     const res = await fetch(url);
     if (!res.ok) throw new Error("Request failed");
@@ -155,16 +168,37 @@
       if (liveCard) liveCard.classList.add("hidden");
       return;
     }
-    if (liveTitle) liveTitle.textContent = `Logger ${loggerId} - Temperature (last 48h)`;
+    const range = LIVE_RANGES[liveRange?.value] || LIVE_RANGES["48h"];
+    if (liveTitle) liveTitle.textContent = `Logger ${loggerId} - Temperature (${range.label})`;
     if (liveRefresh) liveRefresh.classList.remove("hidden");
+    if (liveRange) liveRange.classList.remove("hidden");
     const now = Math.floor(Date.now() / 1000);
-    const from = now - 48 * 3600;
+    const from = now - range.seconds;
+    if (liveExport) {
+      const exportQs = new URLSearchParams({ ids: loggerId, fromTime: String(from), toTime: String(now), format: "csv" });
+      liveExport.href = `/api/export/blu/?${exportQs.toString()}`;
+      liveExport.classList.remove("hidden");
+    }
     try {
-      const qs = new URLSearchParams({ id: loggerId, fromTime: String(from), toTime: String(now) });
-      const res = await fetchJson(`/api/blu/measurements/?${qs.toString()}`);
-      const points = (res.points || [])
-        .filter((p) => p.utc)
-        .sort((a, b) => a.utc - b.utc);
+      let points;
+      if (range.bucket) {
+        const qs = new URLSearchParams({
+          id: loggerId,
+          bucket: range.bucket,
+          fromTime: String(from),
+          toTime: String(now),
+        });
+        const res = await fetchJson(`/api/rollups/?${qs.toString()}`);
+        if (liveUpdated) liveUpdated.textContent = "";
+        points = (res.rollups || []).map((r) => ({ utc: r.utc, t: r.mean }));
+      } else {
+        const qs = new URLSearchParams({ id: loggerId, fromTime: String(from), toTime: String(now) });
+        const res = await fetchJson(`/api/blu/measurements/?${qs.toString()}`);
+        if (liveUpdated) liveUpdated.textContent = window.BluDash.freshnessLabel(res);
+        points = (res.points || [])
+          .filter((p) => p.utc)
+          .sort((a, b) => a.utc - b.utc);
+      }
       if (!points.length) {
         if (liveCard) liveCard.classList.remove("hidden");
         if (liveCanvas) renderLineChart(liveCanvas, ["No data"], [null], "Temperature (C)");
@@ -204,9 +238,13 @@
         <td class="px-3 py-2 border-b border-slate-200/70 text-slate-800 whitespace-nowrap">
           ${new Date(u.created_at).toLocaleString()}
         </td>
+        <td class="px-3 py-2 border-b border-slate-200/70 whitespace-nowrap text-right">
+          <a href="/api/export/uploads/${u.id}/?format=csv" class="text-sky-700 hover:underline text-xs" data-export>CSV</a>
+        </td>
       `;
+      tr.querySelector("[data-export]")?.addEventListener("click", (e) => e.stopPropagation());
       tr.addEventListener("click", async () => {
-        await loadUpload(u.id, u.name);
+        await loadUpload(u.id, u.name, u.row_count);
       });
       historyBody.appendChild(tr);
     });
@@ -230,21 +268,30 @@
     });
   };
 
-  const loadUpload = async (id, name) => {
+  const loadUploadRollups = async (id) => {
+    const qs = new URLSearchParams({ upload: String(id), bucket: "hour" });
+    const res = await fetchJson(`/api/rollups/?${qs.toString()}`);
+    return (res.rollups || []).map((r) => ({ t: r.utc * 1000, temp: r.mean }));
+  };
+
+  const loadUpload = async (id, name, rowCount = 0) => {
     try {
-      const res = await fetchJson(`/api/uploads/${id}/`);
-      const upload = res.upload;
-      const headers = (upload.headers || []).map((h) => String(h || "").trim());
-      const rows = upload.rows || [];
-      const { timeCol, tempCol } = detectTimeAndTemp(headers, rows);
-      uploadSeries = rows
-        .map((r) => {
-          const d = parseMaybeDate(r[timeCol]);
-          if (!d) return null;
-          return { t: d.getTime(), temp: toNum(r[tempCol]) };
-        })
-        .filter(Boolean)
-        .sort((a, b) => a.t - b.t);
+      uploadSeries = rowCount > UPLOAD_ROLLUP_MIN_ROWS ? await loadUploadRollups(id) : [];
+      if (!uploadSeries.length) {
+        const res = await fetchJson(`/api/uploads/${id}/`);
+        const upload = res.upload;
+        const headers = (upload.headers || []).map((h) => String(h || "").trim());
+        const rows = upload.rows || [];
+        const { timeCol, tempCol } = detectTimeAndTemp(headers, rows);
+        uploadSeries = rows
+          .map((r) => {
+            const d = parseMaybeDate(r[timeCol]);
+            if (!d) return null;
+            return { t: d.getTime(), temp: toNum(r[tempCol]) };
+          })
+          .filter(Boolean)
+          .sort((a, b) => a.t - b.t);
+      }
       if (!uploadSeries.length) {
         if (uploadError) {
           uploadError.textContent = "No temperature/time columns detected in this file.";
@@ -268,6 +315,7 @@
   };
 
   if (liveRefresh) liveRefresh.addEventListener("click", loadLive);
+  if (liveRange) liveRange.addEventListener("change", loadLive);
   if (uploadXInterval) uploadXInterval.addEventListener("change", updateUploadChart);
   if (uploadYStep) uploadYStep.addEventListener("change", updateUploadChart);
   loadLive();
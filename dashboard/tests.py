@@ -1,3 +1,963 @@
-from django.test import TestCase
+import base64
+import gzip
+import json
+import marshal
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from importlib import import_module
+from io import BytesIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import views, warmup
+from .models import Alert, ChatAttachment, ChatMessage, ChatSession, Job, Note, ProfilePhoto, ReadingRollup, RequestProfile, SearchDocument, UploadDataset
+from .services import alerts, bluconsole, credentials, export, ingest, jobs, profiler, purge, registry, rollups, search, swr, throttle
+from .utils import metrics, optional, responses
+from .utils.compression import brotli, compress_stream
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover
+    Image = None
+
+OWNER = "owner@example.com"
+
+
+def _temp_media(test):
+    media = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media, ignore_errors=True)
+    storage = override_settings(MEDIA_ROOT=media)
+    storage.enable()
+    test.addCleanup(storage.disable)
+
+
+def explain(qs, name: str) -> str:
+    """Return the plan for ``qs``; set EXPLAIN_DIR to keep a copy per vendor for review."""
+    if connection.vendor == "postgresql":
+        # Tiny test tables would otherwise always seq-scan.
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    plan = qs.explain()
+    out_dir = os.environ.get("EXPLAIN_DIR")
+    if out_dir:
+        path = Path(out_dir) / connection.vendor
+        path.mkdir(parents=True, exist_ok=True)
+        (path / f"{name}.txt").write_text(f"{qs.query}\n\n{plan}\n", encoding="utf-8")
+    return plan
+
+
+def _seed(owner: str, count: int = 3) -> ChatSession:
+    session = None
+    for i in range(count):
+        Note.objects.create(owner_key=owner, title=f"note {i}", body="body")
+        UploadDataset.objects.create(owner_key=owner, name=f"u{i}.xlsx", headers=["a"], rows=[{"a": i}], row_count=1)
+        session = ChatSession.objects.create(owner_key=owner, title=f"chat {i}")
+        msg = ChatMessage.objects.create(session=session, role="user", content="hi")
+        ChatMessage.objects.create(session=session, role="assistant", content="hello")
+        ChatAttachment.objects.create(message=msg, name="a.xlsx", summary={"type": "excel"})
+    return session
+
+
+class OwnerQueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.session = _seed(OWNER)
+        _seed("other@example.com")
+
+    def assertUsesIndex(self, plan: str, index: str):
+        self.assertIn(index, plan)
+        if connection.vendor == "sqlite":
+            self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
+    def test_notes_by_owner(self):
+        qs = Note.objects.filter(owner_key=OWNER).order_by("-updated_at", "-created_at")
+        self.assertUsesIndex(explain(qs, "notes_by_owner"), "note_owner_recent_idx")
+
+    def test_uploads_by_owner(self):
+        qs = UploadDataset.objects.filter(owner_key=OWNER).order_by("-created_at").values("id", "name")
+        self.assertUsesIndex(explain(qs, "uploads_by_owner"), "upload_owner_created_idx")
+
+    def test_chat_sessions_by_owner(self):
+        qs = ChatSession.objects.filter(owner_key=OWNER).order_by("-updated_at", "-id")
+        self.assertUsesIndex(explain(qs, "chat_sessions_by_owner"), "chatsession_owner_upd_idx")
+
+    def test_chat_messages_by_session(self):
+        qs = ChatMessage.objects.filter(session=self.session).order_by("-created_at", "-id")
+        self.assertUsesIndex(explain(qs, "chat_messages_by_session"), "chatmessage_session_idx")
+
+    def test_latest_attachment_by_session(self):
+        qs = ChatAttachment.objects.filter(message__session=self.session).order_by("-created_at")[:1]
+        plan = explain(qs, "latest_attachment_by_session")
+        self.assertIn("chatmessage_session_idx", plan)
+        self.assertIn("chatattach_message_idx", plan)
+
+
+class OwnerQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.chat = _seed(OWNER, count=5)
+
+    def setUp(self):
+        session = self.client.session
+        session["owner_key"] = OWNER
+        session.save()
+
+    def test_list_endpoints_do_not_scale_with_rows(self):
+        # The session comes from the cache, leaving the ETag aggregate and the listing query.
+        for url in ("/api/notes/", "/api/uploads/", "/api/ai-chat/sessions/"):
+            with self.subTest(url=url), self.assertNumQueries(2):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_chat_lists_page_by_cursor_with_counts_and_previews(self):
+        ChatMessage.objects.create(session=self.chat, role="assistant", content="x" * 500)
+        seen, params = [], {"limit": 2}
+        while True:
+            # ETag aggregate plus one page; counts and previews add no queries.
+            with self.assertNumQueries(2):
+                data = self.client.get("/api/ai-chat/sessions/", params).json()
+            seen += data["sessions"]
+            if not data["next_cursor"]:
+                break
+            params["cursor"] = data["next_cursor"]
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(seen[0]["id"], self.chat.id)
+        self.assertEqual((seen[0]["message_count"], len(seen[0]["preview"])), (3, 120))
+        self.assertEqual((seen[1]["message_count"], seen[1]["preview"]), (2, "hello"))
+
+        url = f"/api/ai-chat/sessions/{self.chat.id}/"
+        first = self.client.get(url, {"limit": 2}).json()
+        self.assertEqual([m["role"] for m in first["messages"]], ["assistant", "assistant"])
+        older = self.client.get(url, {"limit": 2, "cursor": first["next_cursor"]}).json()
+        self.assertEqual([m["content"] for m in older["messages"]], ["hi"])
+        self.assertIsNone(older["next_cursor"])
+        self.assertEqual(self.client.get("/api/ai-chat/sessions/", {"cursor": "nope"}).status_code, 400)
+
+    @override_settings(OPENAI_API_KEY="test")
+    def test_chat_reply_reads_history_and_attachment_once(self):
+        # An unstructured reply goes through _format_structured_answer and the
+        # attachment fallback as well as the context and model helpers.
+        reply = mock.MagicMock()
+        reply.__enter__.return_value.read.return_value = json.dumps(
+            {"choices": [{"message": {"content": "I cannot access that file."}}]}
+        ).encode()
+        with mock.patch.object(views.urlrequest, "urlopen", return_value=reply), \
+                CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                "/api/ai-chat/", {"prompt": "Summarize the file", "session_id": self.chat.id},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 200)
+        selects = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("SELECT")]
+        self.assertEqual(sum('FROM "dashboard_chatattachment"' in sql for sql in selects), 1)
+        self.assertEqual(sum('FROM "dashboard_chatmessage"' in sql for sql in selects), 1)
+
+    def test_unchanged_resources_revalidate_with_one_query(self):
+        upload = UploadDataset.objects.filter(owner_key=OWNER).first()
+        for url in ("/api/notes/", "/api/uploads/", "/api/ai-chat/sessions/", "/api/profile/", f"/api/uploads/{upload.id}/"):
+            with self.subTest(url=url):
+                etag = self.client.get(url)["ETag"]
+                with self.assertNumQueries(1):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertIn("private", response["Cache-Control"])
+
+    def test_deleted_upload_is_not_served_from_cache(self):
+        url = f"/api/uploads/{UploadDataset.objects.filter(owner_key=OWNER).first().id}/"
+        response = self.client.get(url)
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertEqual(self.client.delete(url).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 404)
+
+    def test_list_etag_changes_on_write(self):
+        etag = self.client.get("/api/notes/")["ETag"]
+        Note.objects.filter(owner_key=OWNER).first().delete()
+        self.assertEqual(self.client.get("/api/notes/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_chat_session_detail(self):
+        with self.assertNumQueries(2):
+            self.client.get(f"/api/ai-chat/sessions/{self.chat.id}/")
+
+
+class BluAuthQueryTests(TestCase):
+    def setUp(self):
+        session = self.client.session
+        session["blu_creds"] = {"uname": "u", "upass": "p"}
+        session.save()
+
+    def test_measurements_auth_needs_no_database(self):
+        xml = "<r><tdl><id>1</id><ms><m><t>3</t><utc>1700000000</utc></m></ms></tdl></r>"
+        with mock.patch.object(bluconsole, "get_measurements", return_value=xml):
+            with self.assertNumQueries(0):
+                response = self.client.get("/api/blu/measurements/")
+        self.assertEqual(response.json()["points"][0]["t"], 3.0)
+
+    def test_over_budget_requests_get_429(self):
+        busy = throttle.UpstreamBusy("busy", retry_after=2)
+        with mock.patch.object(bluconsole, "get_measurements", side_effect=busy):
+            response = self.client.get("/api/blu/measurements/?id=9")
+        self.assertEqual((response.status_code, response["Retry-After"]), (429, "2"))
+
+    def test_login_rotates_the_session_key(self):
+        old_key = self.client.session.session_key
+        credentials.remember(old_key, {"uname": "u", "upass": "p"})
+        with mock.patch.object(bluconsole, "blu_login"):
+            response = self.client.post("/api/blu/login/", {"uname": "v", "upass": "q"}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(self.client.session.session_key, old_key)
+        self.assertEqual(self.client.session["blu_creds"], {"uname": "v", "upass": "q"})
+
+
+def _png(color="red") -> bytes:
+    out = BytesIO()
+    Image.new("RGB", (300, 200), color).save(out, format="PNG")
+    return out.getvalue()
+
+
+@skipIf(Image is None, "Pillow is not installed")
+class ProfilePhotoTests(TestCase):
+    def setUp(self):
+        _temp_media(self)
+        session = self.client.session
+        session["owner_key"] = OWNER
+        session.save()
+        self.raw = _png()
+        self.data_url = "data:image/png;base64," + base64.b64encode(self.raw).decode("ascii")
+
+    def _upload(self):
+        response = self.client.post("/api/profile/", {"photoDataUrl": self.data_url}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        return self.client.get("/api/profile/").json()["profile"]
+
+    def test_upload_stores_bytes_and_square_thumbnails(self):
+        profile = self._upload()
+        photo = ProfilePhoto.objects.get()
+        self.assertEqual((photo.mime, bytes(photo.data)), ("image/png", self.raw))
+        self.assertEqual(sorted(profile["photoThumbs"]), ["160", "48"])
+        response = self.client.get(profile["photoUrl"])
+        self.assertEqual((response.status_code, response["Content-Type"], response.content), (200, "image/png", self.raw))
+        thumb = self.client.get(profile["photoThumbs"]["48"])
+        self.assertEqual(thumb["Content-Type"], "image/jpeg")
+        self.assertEqual(Image.open(BytesIO(thumb.content)).size, (48, 48))
+        again = self.client.get(profile["photoUrl"], headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+    def test_lost_files_are_rebuilt_from_the_database(self):
+        profile = self._upload()
+        photo = ProfilePhoto.objects.get()
+        for name in [photo.image.name, *photo.thumbnails.values()]:
+            default_storage.delete(name)
+        self.assertEqual(self.client.get(profile["photoUrl"]).content, self.raw)
+        self.assertEqual(self.client.get(profile["photoThumbs"]["160"]).status_code, 200)
+        self.assertTrue(default_storage.exists(photo.image.name))
+        self.assertEqual(self.client.get(profile["photoUrl"] + "99/").status_code, 404)
+
+    def test_migration_round_trips_data_urls(self):
+        migration = import_module("dashboard.migrations.0007_profilephoto_storage")
+        self.assertEqual(migration.decode_data_url(self.data_url), ("image/png", self.raw))
+        with self.assertRaises(ValueError):
+            migration.decode_data_url("data:text/plain;base64,aGk=")
+        rows = [SimpleNamespace(data_url=self.data_url), SimpleNamespace(data_url="not a photo")]
+        for row in rows:
+            row.save = lambda update_fields: None
+        fake = SimpleNamespace(objects=SimpleNamespace(iterator=lambda chunk_size: iter(rows)))
+        apps = SimpleNamespace(get_model=lambda app, model: fake)
+        migration.data_url_to_bytes(apps, None)
+        self.assertEqual([(r.mime, bytes(r.data)) for r in rows], [("image/png", self.raw), ("", b"not a photo")])
+        for row in rows:
+            row.data_url = None
+        migration.bytes_to_data_url(apps, None)
+        self.assertEqual([r.data_url for r in rows], [self.data_url, "not a photo"])
+
+
+@override_settings(PERF_METRICS_ENABLED=True, PERF_METRICS_TOKEN="scrape")
+class PerfMetricsTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        folder = override_settings(PERF_METRICS_DIR=self.dir)
+        folder.enable()
+        self.addCleanup(folder.disable)
+
+    def tearDown(self):
+        metrics.enabled = False
+        metrics.directory = ""
+
+    def test_server_timing_and_prometheus_output(self):
+        client = Client()
+        xml = "<r><tdl><id>1</id><label>A</label></tdl></r>"
+        session = client.session
+        session["blu_creds"] = {"uname": "u", "upass": "p"}
+        session.save()
+        with mock.patch.object(bluconsole, "get_devices", return_value=xml):
+            response = client.get("/api/blu/devices/")
+        self.assertIn("xml;dur=", response["Server-Timing"])
+        self.assertIn("json;dur=", response["Server-Timing"])
+        body = client.get("/metrics", headers={"Authorization": "Bearer scrape"}).content.decode()
+        self.assertIn('dashboard_request_duration_seconds_count{endpoint="api_blu_devices",method="GET"}', body)
+        self.assertIn('dashboard_phase_calls_total{phase="xml"}', body)
+
+    def test_scrapes_sum_every_worker_process(self):
+        self.client.get("/api/blu/status/")
+        other = {"histograms": [["elsewhere", "GET", [2] + [0] * len(metrics.BUCKETS), 0.004]],
+                 "phases": [], "upstream": [["openai", "error", 3]]}
+        Path(self.dir, "99-other.json").write_text(json.dumps(other))
+        body = self.client.get("/metrics", headers={"Authorization": "Bearer scrape"}).content.decode()
+        self.assertIn('dashboard_request_duration_seconds_count{endpoint="elsewhere",method="GET"} 2', body)
+        self.assertIn('dashboard_upstream_calls_total{target="openai",outcome="error"} 3', body)
+        self.assertIn('endpoint="api_blu_status"', body)
+        self.assertEqual(len(list(Path(self.dir).glob("*.json"))), 2)
+        metrics.clear(self.dir)
+        self.assertEqual(list(Path(self.dir).glob("*.json")), [])
+
+    def test_metrics_always_need_the_token(self):
+        self.assertEqual(self.client.get("/metrics", headers={"Authorization": "Bearer nope"}).status_code, 401)
+        with override_settings(PERF_METRICS_TOKEN=""):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+
+class BluSingleFlightTests(SimpleTestCase):
+    def test_concurrent_identical_calls_share_one_upstream_request(self):
+        calls = []
+        barrier = threading.Barrier(4)
+
+        def slow_devices(uname, upass, children=None):
+            calls.append(uname)
+            time.sleep(0.2)
+            return "<r><tdl><id>7</id></tdl></r>"
+
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(bluconsole.fetch_devices("flight", "pw", children=False))
+
+        with mock.patch.object(bluconsole, "get_devices", side_effect=slow_devices):
+            threads = [threading.Thread(target=worker) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([r[0]["id"] for r in results], ["7"] * 4)
+
+    def test_different_credentials_do_not_share(self):
+        with mock.patch.object(bluconsole, "get_devices", return_value="<r/>") as get_devices:
+            bluconsole.fetch_devices("flight", "a")
+            bluconsole.fetch_devices("flight", "b")
+        self.assertEqual(get_devices.call_count, 2)
+
+
+class StaleWhileRevalidateTests(SimpleTestCase):
+    def test_serves_stale_result_and_refreshes_in_background(self):
+        fetch = mock.Mock(side_effect=[["old"], ["new"]])
+        data, meta = swr.serve("test:swr", fetch, fresh=30, max_stale=600)
+        self.assertEqual((data, meta["stale"]), (["old"], False))
+        self.assertEqual(swr.serve("test:swr", fetch, fresh=30, max_stale=600)[0], ["old"])
+        self.assertEqual(fetch.call_count, 1)
+
+        later = time.time() + 60
+        with mock.patch.object(swr.time, "time", return_value=later), \
+                mock.patch.object(swr.threading, "Thread") as thread:
+            data, meta = swr.serve("test:swr", fetch, fresh=30, max_stale=600)
+            self.assertEqual((data, meta["stale"], meta["ageSeconds"]), (["old"], True, 60))
+            thread.call_args.kwargs["target"]()
+        self.assertEqual(swr.serve("test:swr", fetch, fresh=30, max_stale=600)[0], ["new"])
+
+
+@override_settings(
+    BLU_RATE_PER_SECOND=1,
+    BLU_RATE_BURST=2,
+    BLU_CONCURRENCY_INITIAL=4,
+    BLU_CONCURRENCY_MIN=1,
+    BLU_CONCURRENCY_MAX=8,
+    BLU_LATENCY_TARGET_SECONDS=3,
+    BLU_THROTTLE_MAX_WAIT_SECONDS=0,
+)
+class UpstreamThrottleTests(SimpleTestCase):
+    def state(self, account):
+        return throttle._load(throttle._key(account), time.time())
+
+    def test_token_bucket_limits_burst_per_account(self):
+        leases = [throttle.acquire("bucket"), throttle.acquire("bucket")]
+        with self.assertRaises(throttle.UpstreamBusy) as busy:
+            throttle.acquire("bucket")
+        self.assertGreaterEqual(busy.exception.retry_after, 1)
+        self.assertIsNotNone(throttle.acquire("bucket-other"))
+        for lease in leases:
+            throttle.release("bucket", lease, 0.1, True)
+
+    def test_concurrency_limit_halves_on_errors_and_grows_back(self):
+        throttle.release("aimd", throttle.acquire("aimd"), 0.1, False)
+        self.assertEqual(self.state("aimd")["limit"], 2.0)
+        throttle.release("aimd", throttle.acquire("aimd"), 0.1, True)
+        self.assertEqual(self.state("aimd")["limit"], 2.5)
+
+
+class FastJsonTests(SimpleTestCase):
+    def test_fast_and_fallback_encoders_agree(self):
+        from datetime import datetime, timezone as dt_timezone
+        from decimal import Decimal
+
+        data = {
+            "at": datetime(2026, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc),
+            "precise": datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=dt_timezone.utc),
+            "naive": datetime(2026, 1, 2, 3, 4, 5, 120000),
+            "n": Decimal("1.5"),
+            "rows": [{"t": 2.5}],
+        }
+        outputs = []
+        for enabled in (True, False):
+            with self.settings(FAST_JSON_ENABLED=enabled):
+                outputs.append(json.loads(responses.FastJsonResponse(data).content))
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0]["at"], "2026-01-02T03:04:05Z")
+        self.assertEqual((outputs[0]["precise"], outputs[0]["naive"]), ("2026-01-02T03:04:05.123Z", "2026-01-02T03:04:05.120"))
+
+
+class ApiCompressionTests(TestCase):
+    def setUp(self):
+        session = self.client.session
+        session["owner_key"] = OWNER
+        session.save()
+        rows = [{"time": f"2026-01-01T00:{i % 60:02d}:00", "temp": 3.5} for i in range(500)]
+        self.upload = UploadDataset.objects.create(owner_key=OWNER, name="u.xlsx", headers=["time", "temp"],
+                                                   rows=rows, row_count=len(rows))
+
+    def test_large_json_is_compressed_when_accepted(self):
+        url = f"/api/uploads/{self.upload.id}/"
+        plain = self.client.get(url)
+        for encoding in ("gzip", "br") if brotli else ("gzip",):
+            with self.subTest(encoding=encoding):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+                self.assertEqual(response["Content-Encoding"], encoding)
+                self.assertIn("Accept-Encoding", response["Vary"])
+                self.assertTrue(response["ETag"].startswith("W/"))
+                raw = gzip.decompress(response.content) if encoding == "gzip" else brotli.decompress(response.content)
+                self.assertEqual(raw, plain.content)
+
+    def test_small_responses_are_left_alone(self):
+        response = self.client.get("/api/ai-chat/status/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_streams_are_compressed_per_chunk(self):
+        chunks = list(compress_stream(iter([b"a" * 100, b"b" * 100]), "gzip"))
+        self.assertGreaterEqual(len(chunks), 3)
+        self.assertEqual(gzip.decompress(b"".join(chunks)), b"a" * 100 + b"b" * 100)
+
+
+class RollupTests(TestCase):
+    ACCOUNT = "rollups@example.com"
+    DAY = 1_699_920_000  # a UTC midnight
+
+    def setUp(self):
+        cache.clear()
+
+    def _points(self, *pairs):
+        return [{"utc": utc, "t": t} for utc, t in pairs]
+
+    def test_readings_fold_into_hour_and_day_buckets(self):
+        day = self.DAY
+        rollups.add_readings(self.ACCOUNT, "blu:1", self._points((day, 5.0), (day + 1800, 3.0), (day + 3600, 6.0)),
+                             limit=4.0)
+        hours = rollups.series_rows(self.ACCOUNT, "blu:1", ReadingRollup.BUCKET_HOUR)
+        self.assertEqual([(h["utc"], h["count"], h["min"], h["max"], h["mean"], h["secondsAbove"]) for h in hours],
+                         [(day, 2, 3.0, 5.0, 4.0, 1800.0), (day + 3600, 1, 6.0, 6.0, 6.0, 0.0)])
+        # A later batch merges into the open buckets, crediting the interval since prev.
+        rollups.add_readings(self.ACCOUNT, "blu:1", self._points((day + 5400, 2.0)), prev=(day + 3600, 6.0), limit=4.0)
+        hour = rollups.series_rows(self.ACCOUNT, "blu:1", ReadingRollup.BUCKET_HOUR)[1]
+        self.assertEqual((hour["count"], hour["min"], hour["max"], hour["secondsAbove"]), (2, 2.0, 6.0, 1800.0))
+        self.assertEqual(rollups.summarize(self.ACCOUNT, ["blu:1", "blu:2"]), {
+            "blu:1": {"min": 2.0, "max": 6.0, "mean": 4.0, "count": 4, "hoursAbove": 1.0,
+                      "firstDay": "2023-11-14", "lastDay": "2023-11-14"},
+        })
+
+    def test_logger_rows_backfill_history_before_the_first_rollup(self):
+        day, creds = self.DAY, {"uname": self.ACCOUNT, "upass": "p"}
+        rollups.add_readings(self.ACCOUNT, "blu:1", self._points((day + 86400, 3.0)))
+        raw = self._points((day, 2.0), (day + 3600, 5.0), (day + 86400, 3.0))
+        with mock.patch.object(bluconsole, "fetch_measurements", return_value=raw) as fetch:
+            rows = rollups.logger_rows(creds, "1", ReadingRollup.BUCKET_DAY, day, day + 2 * 86400)
+            self.assertEqual([(r["utc"], r["count"]) for r in rows], [(day, 2), (day + 86400, 1)])
+            rollups.logger_rows(creds, "1", ReadingRollup.BUCKET_DAY, day, day + 2 * 86400)
+            self.assertEqual(fetch.call_args.kwargs["to_time"], day + 86399)
+            fetch.assert_called_once()
+            # Not seen by ingestion yet: ingested once, and live ingestion carries on after it.
+            rows = rollups.logger_rows(creds, "2", ReadingRollup.BUCKET_HOUR, day, day + 86400)
+            self.assertEqual([r["count"] for r in rows], [1, 1, 1])
+            rollups.logger_rows(creds, "2", ReadingRollup.BUCKET_HOUR, day, day + 86400)
+            self.assertEqual(fetch.call_count, 2)
+        alerts.ingest_readings(self.ACCOUNT, "2", raw + self._points((day + 90000, 4.0)))
+        hours = rollups.series_rows(self.ACCOUNT, "blu:2", ReadingRollup.BUCKET_HOUR)
+        self.assertEqual([r["count"] for r in hours], [1, 1, 1, 1])
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        session = self.client.session
+        session["owner_key"] = OWNER
+        session["blu_creds"] = {"uname": "export", "upass": "p"}
+        session.save()
+
+    def test_upload_streams_as_csv_and_ndjson(self):
+        upload = UploadDataset.objects.create(
+            owner_key=OWNER, name="run 1.xlsx", headers=["time", "temp"],
+            rows=[{"time": "2026-01-01T00:00:00", "temp": 3.5}, {"time": "2026-01-01T00:05:00", "temp": None}], row_count=2,
+        )
+        response = self.client.get(f"/api/export/uploads/{upload.id}/")
+        self.assertTrue(response.streaming)
+        self.assertIn('filename="run_1.csv"', response["Content-Disposition"])
+        self.assertEqual(b"".join(response.streaming_content).decode().splitlines(),
+                         ["time,temp", "2026-01-01T00:00:00,3.5", "2026-01-01T00:05:00,"])
+        response = self.client.get(f"/api/export/uploads/{upload.id}/?format=ndjson")
+        lines = b"".join(response.streaming_content).splitlines()
+        self.assertEqual(json.loads(lines[1]), {"time": "2026-01-01T00:05:00", "temp": None})
+
+    def test_upload_rows_are_read_a_chunk_at_a_time(self):
+        rows = [{"n": i, "tags": ["a", i]} for i in range(5)]
+        upload = UploadDataset.objects.create(owner_key=OWNER, name="big.csv", headers=["n", "tags"], rows=rows,
+                                              row_count=5)
+        upload = UploadDataset.objects.only("row_count").get(pk=upload.pk)
+        with self.assertNumQueries(3):
+            self.assertEqual(list(export.upload_rows(upload, chunk_size=2)), rows)
+        headless = UploadDataset.objects.create(owner_key=OWNER, name="x.csv", rows=rows[:1], row_count=1)
+        body = b"".join(self.client.get(f"/api/export/uploads/{headless.id}/").streaming_content).decode()
+        self.assertEqual(body.splitlines(), ["n,tags", '0,"[""a"",0]"'])
+
+    @override_settings(EXPORT_CHUNK_SECONDS=3600)
+    def test_logger_export_fetches_one_window_at_a_time(self):
+        def fake_fetch(uname, upass, device_id=None, from_time=None, to_time=None, include_all=None):
+            return [{"id": device_id, "type": "tdl", "t": 2.0, "h": None, "utc": from_time + 60}]
+
+        with mock.patch.object(bluconsole, "fetch_measurements", side_effect=fake_fetch) as fetch:
+            response = self.client.get("/api/export/blu/?ids=7,8&fromTime=1700000000&toTime=1700007199")
+            lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(fetch.call_count, 4)
+        self.assertEqual(lines[0], "device_id,type,utc,time,t,h")
+        self.assertEqual(lines[1], "7,tdl,1700000060,2023-11-14T22:14:20+00:00,2.0,")
+        self.assertEqual(len(lines), 5)
+
+    def test_rejects_unknown_format(self):
+        self.assertEqual(self.client.get("/api/export/blu/?format=xml").status_code, 400)
+
+    @override_settings(EXPORT_MAX_UPSTREAM_CALLS=30)
+    def test_rejects_exports_too_large_for_one_request(self):
+        with mock.patch.object(bluconsole, "fetch_measurements") as fetch:
+            response = self.client.get("/api/export/blu/?ids=7,8&fromTime=1700000000&toTime=1701296000")
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("32 BluConsole requests", response.json()["error"])
+            self.assertEqual(self.client.get("/api/export/blu/?ids=7,8&fromTime=1700000000&toTime=1701209599").status_code, 200)
+        fetch.assert_not_called()
+
+
+class UploadIngestTests(TestCase):
+    def setUp(self):
+        session = self.client.session
+        session["owner_key"] = OWNER
+        session.save()
+
+    def _post(self, url, name, body):
+        return self.client.post(url, {"file": SimpleUploadedFile(name, body)})
+
+    def test_csv_upload_feeds_the_dataset_pipeline(self):
+        body = "\ufeffDate/Time;Temperature (°C)\n2026-01-01 00:00:00;3.5\n2026-01-01 00:05:00;\n".encode("utf-8")
+        response = self._post("/api/uploads/", "run.csv", body)
+        self.assertEqual(response.status_code, 200)
+        upload = response.json()["upload"]
+        self.assertEqual(upload["headers"], ["Date/Time", "Temperature (°C)"])
+        self.assertEqual(upload["rows"][0], {"Date/Time": "2026-01-01 00:00:00", "Temperature (°C)": 3.5})
+        self.assertIsNone(upload["rows"][1]["Temperature (°C)"])
+
+    def test_blu_xml_attachment_is_summarized(self):
+        xml = (b"<devices><tdl><id>7</id><ms>"
+               b"<m><utc>1700000000</utc><t>2.5</t></m><m><utc>1700000300</utc><t>4.0</t></m>"
+               b"</ms></tdl></devices>")
+        response = self._post("/api/ai-chat/attachment/", "export.xml", xml)
+        summary = response.json()["attachment"]["summary"]
+        self.assertEqual((summary["type"], summary["format"], summary["rows"]), ("excel", "xml", 2))
+        self.assertEqual((summary["tempMin"], summary["tempAtEnd"]), (2.5, 4.0))
+        self.assertEqual(summary["timeStart"], "2023-11-14T22:13:20+00:00")
+
+    def test_rejects_unknown_extension(self):
+        self.assertEqual(self._post("/api/uploads/", "notes.pdf", b"%PDF").status_code, 400)
+
+    def test_csv_cells_keep_codes_and_reject_non_finite_numbers(self):
+        cells = ["000123", "-007", "0", "0.5", "-3", "1e3", "NaN", "inf", "-Infinity", "n/a"]
+        self.assertEqual([ingest._csv_value(c) for c in cells],
+                         ["000123", "-007", 0, 0.5, -3, 1000.0, "NaN", "inf", "-Infinity", "n/a"])
+        response = self._post("/api/uploads/", "codes.csv", b"id,temp\n000123,nan\n000124,2.5\n")
+        self.assertEqual(response.json()["upload"]["rows"][0], {"id": "000123", "temp": "nan"})
+
+
+@override_settings(JOBS_ENABLED=True, JOB_RETRY_BACKOFF_SECONDS=0)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        _temp_media(self)
+        session = self.client.session
+        session["owner_key"] = OWNER
+        session.save()
+
+    def _drain(self):
+        return jobs.work("test", threading.Event(), once=True)
+
+    def test_upload_is_parsed_by_the_worker(self):
+        body = b"time,temp\n2026-01-01 00:00:00,3.5\n2026-01-01 00:05:00,4.0\n"
+        response = self.client.post("/api/uploads/", {"file": SimpleUploadedFile("run.csv", body)})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["job"]["id"]
+        self.assertFalse(UploadDataset.objects.exists())
+
+        self.assertEqual(self._drain(), 1)
+        job = self.client.get(f"/api/jobs/{job_id}/").json()["job"]
+        self.assertEqual((job["status"], job["progress"]), ("done", 1.0))
+        upload = UploadDataset.objects.get(pk=job["result"]["upload_id"])
+        self.assertEqual(upload.row_count, 2)
+        self.assertIsNone(Job.objects.get(pk=job_id).data)
+
+    def test_failures_retry_then_fail(self):
+        job = jobs.enqueue("upload.ingest", OWNER, upload=SimpleUploadedFile("run.csv", b"time\n1\n"),
+                           payload={"name": "run.csv"})
+        with mock.patch.object(jobs.rollups, "rollup_upload", side_effect=RuntimeError("db busy")):
+            self.assertEqual(self._drain(), 3)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), ("failed", 3, "db busy"))
+        self.assertFalse(UploadDataset.objects.exists())
+
+    def test_unreadable_file_is_not_retried(self):
+        response = self.client.post("/api/ai-chat/attachment/", {"file": SimpleUploadedFile("x.xml", b"<devices/>")})
+        self._drain()
+        job = Job.objects.get(pk=response.json()["job"]["id"])
+        self.assertEqual((job.status, job.attempts), ("failed", 1))
+
+    def test_requeued_job_is_not_overwritten_by_its_old_worker(self):
+        jobs.enqueue("upload.ingest", OWNER, upload=SimpleUploadedFile("run.csv", b"time\n1\n"),
+                     payload={"name": "run.csv"})
+        stalled = jobs.claim("a")
+        Job.objects.filter(pk=stalled.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        Job.objects.filter(pk=stalled.pk).update(run_after=timezone.now())
+        current = jobs.claim("b")
+
+        jobs.run(stalled)
+        self.assertFalse(UploadDataset.objects.exists())
+        self.assertEqual(Job.objects.get(pk=current.pk).locked_by, "b")
+        self.assertEqual(jobs.requeue_stale(), 0)
+        jobs.run(current)
+        self.assertEqual(Job.objects.get(pk=current.pk).status, "done")
+        self.assertEqual(UploadDataset.objects.count(), 1)
+
+    @override_settings(JOB_LEASE_SECONDS=0.03)
+    def test_lease_is_renewed_while_the_handler_runs(self):
+        jobs.enqueue("upload.ingest", OWNER, upload=SimpleUploadedFile("run.csv", b"time\n1\n"),
+                     payload={"name": "run.csv"})
+
+        def slow(name, raw):
+            time.sleep(0.1)
+            return {"headers": ["time"], "rows": [["1"]]}
+
+        with mock.patch.object(jobs.ingest, "parse_dataset", side_effect=slow), \
+                mock.patch.object(jobs, "_touch", return_value=True) as touch:
+            self._drain()
+        self.assertGreaterEqual(touch.call_count, 2)
+
+    def test_jobs_are_owner_scoped(self):
+        job = jobs.enqueue("upload.ingest", "someone-else", payload={"name": "a.csv"})
+        self.assertEqual(self.client.get(f"/api/jobs/{job.id}/").status_code, 404)
+        self.assertEqual(self.client.get("/api/jobs/").json(), {"jobs": []})
+
+
+class WorkerWarmupTests(TestCase):
+    def test_warm_worker_reports_each_step(self):
+        timings = warmup.warm_worker()
+        self.assertEqual(set(timings), {"urls", "templates", "db", "cache"})
+
+    def test_missing_optional_module_loads_as_none(self):
+        self.assertIsNone(optional.load("dashboard_no_such_module"))
+
+
+@override_settings(PROFILER_ENABLED=True, PROFILER_SAMPLE_RATE=0)
+class RequestProfilerTests(TestCase):
+    def setUp(self):
+        _temp_media(self)
+
+    def test_signed_header_stores_a_loadable_profile(self):
+        body = b"time,temp\n2026-01-01 00:00:00,3.5\n"
+        response = self.client.post("/api/uploads/", {"file": SimpleUploadedFile("run.csv", body)},
+                                    headers={profiler.HEADER: profiler.make_token()})
+        profile = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+        self.assertEqual((profile.endpoint, profile.trigger, profile.status_code), ("api_uploads", "header", 200))
+        self.assertGreater(profile.memory_peak_bytes, 0)
+        self.assertGreater(profile.queries, 0)
+        stats = marshal.loads(bytes(profile.stats))
+        self.assertIn("api_uploads", {func for _file, _line, func in stats})
+
+    def test_untrusted_requests_are_not_profiled(self):
+        response = self.client.get("/api/notes/?_profile=1", headers={profiler.HEADER: "forged:token"})
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_staff_flag_and_profile_pages(self):
+        staff = User.objects.create_user("ops", password="pw", is_staff=True)
+        self.assertEqual(self.client.get("/staff/profiles/").status_code, 302)
+        self.client.force_login(staff)
+        response = self.client.get("/api/notes/?_profile=1")
+        profile_id = response["X-Profile-Id"]
+        page = self.client.get(f"/staff/profiles/?id={profile_id}")
+        self.assertContains(page, "api_notes")
+        download = self.client.get(f"/staff/profiles/{profile_id}/download/")
+        self.assertTrue(download["Content-Disposition"].startswith("attachment"))
+
+
+class PurgeTests(TestCase):
+    def _session(self, owner, messages=3):
+        session = ChatSession.objects.create(owner_key=owner)
+        for i in range(messages):
+            msg = ChatMessage.objects.create(session=session, role="user", content=f"message {i}")
+            ChatAttachment.objects.create(message=msg, name="a.csv", summary={"type": "excel"})
+        return session
+
+    def test_clear_deletes_in_bounded_batches(self):
+        for _ in range(3):
+            self._session(OWNER)
+        other = self._session("other@example.com")
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(purge.delete_sessions(ChatSession.objects.filter(owner_key=OWNER), batch_size=2), 3)
+        deletes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("DELETE")]
+        self.assertTrue(all(len(ids.split(",")) <= 2 for sql in deletes for ids in re.findall(r" IN \(([^)]*)\)", sql)))
+        self.assertEqual(ChatMessage.objects.count(), 3)
+        self.assertEqual(ChatAttachment.objects.filter(message__session=other).count(), 3)
+
+    @override_settings(CHAT_RETENTION_DAYS=30, CHAT_MAX_SESSIONS_PER_OWNER=2, UPLOAD_MAX_PER_OWNER=1)
+    def test_retention_by_age_and_per_owner_limit(self):
+        old = self._session(OWNER, messages=1)
+        ChatSession.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(days=31))
+        keep = [self._session(OWNER, messages=1) for _ in range(3)]
+        ChatSession.objects.filter(pk=keep[0].pk).update(updated_at=timezone.now() - timedelta(days=1))
+        for i in range(2):
+            UploadDataset.objects.create(owner_key=OWNER, name=f"u{i}.csv", headers=["a"], rows=[], row_count=0)
+
+        counts = purge.apply_retention()
+        self.assertEqual(counts["chat_sessions_expired"], 1)
+        self.assertEqual(counts["chat_sessions_over_limit"], 1)
+        self.assertEqual(counts["uploads_over_limit"], 1)
+        self.assertEqual(set(ChatSession.objects.values_list("pk", flat=True)), {keep[1].pk, keep[2].pk})
+        self.assertEqual(UploadDataset.objects.get().name, "u1.csv")
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        session = self.client.session
+        session["owner_key"] = OWNER
+        session.save()
+
+    def _note(self, title, body):
+        response = self.client.post("/api/notes/", {"title": title, "body": body}, content_type="application/json")
+        return Note.objects.get(pk=response.json()["note"]["id"])
+
+    def _search(self, **params):
+        response = self.client.get("/api/search/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ranks_prefix_matches_and_scopes_to_owner(self):
+        self._note("Barn 3 humidity", "Humidity spiked after the fans stopped.")
+        self._note("Feed order", "Ordered feed; humidity was fine.")
+        search.index_note(Note.objects.create(owner_key="other@example.com", title="Barn 3 humidity", body="Not mine."))
+        upload = UploadDataset.objects.create(owner_key=OWNER, name="coop.csv", headers=["Date", "Humidity"], rows=[])
+        search.index_upload(upload)
+
+        data = self._search(q="humid")
+        self.assertEqual(data["backend"], search.backend())
+        self.assertEqual([r["kind"] for r in data["results"]].count("note"), 2)
+        self.assertEqual(len(data["results"]), 3)
+        if data["backend"] != "basic":
+            self.assertEqual(data["results"][0]["title"], "Barn 3 humidity")
+        self.assertEqual([r["id"] for r in self._search(q="humid", kind="upload")["results"]], [upload.id])
+        self.assertEqual(self._search(q="fans stop")["results"][0]["snippet"], "Humidity spiked after the fans stopped.")
+
+    def test_paginates_and_follows_edits_and_deletes(self):
+        notes = [self._note(f"Flock check {i}", "Weights recorded.") for i in range(5)]
+        first = self._search(q="flock", pageSize=2)
+        self.assertEqual((len(first["results"]), first["has_more"]), (2, True))
+        last = self._search(q="flock", pageSize=2, page=3)
+        self.assertEqual((len(last["results"]), last["has_more"]), (1, False))
+
+        self.client.put(f"/api/notes/{notes[0].id}/", {"title": "Vaccination"}, content_type="application/json")
+        self.assertEqual(len(self._search(q="flock")["results"]), 4)
+        self.assertEqual(self._search(q="vaccination")["results"][0]["id"], notes[0].id)
+        self.client.delete(f"/api/notes/{notes[1].id}/")
+        self.assertEqual(len(self._search(q="flock")["results"]), 3)
+        self.assertEqual(SearchDocument.objects.count(), 4)
+
+    def test_chat_messages_are_indexed_and_purged(self):
+        session = ChatSession.objects.create(owner_key=OWNER, title="Ammonia levels")
+        search.index_message(ChatMessage.objects.create(session=session, role="user", content="ammonia at dawn"), session)
+        self.assertEqual(self._search(q="ammonia dawn")["results"][0]["session_id"], session.id)
+        purge.delete_sessions(ChatSession.objects.filter(owner_key=OWNER))
+        self.assertEqual(self._search(q="ammonia")["results"], [])
+
+    def test_rejects_bad_parameters(self):
+        self.assertEqual(self.client.get("/api/search/").status_code, 400)
+        self.assertEqual(self.client.get("/api/search/", {"q": "x", "kind": "alert"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/search/", {"q": "x", "page": "two"}).status_code, 400)
+
+    @override_settings(AI_CONTEXT_TOP_K=3, AI_CONTEXT_BUDGET_CHARS=900)
+    def test_ai_context_gets_relevant_chunks_within_budget(self):
+        self._note("Ammonia readings", ("Barn 2 ammonia peaked at 25 ppm before ventilation. " * 30).strip())
+        self._note("Feed order", "Ordered 2 tons of grower feed.")
+        for i in range(4):
+            self._note(f"Ventilation log {i}", "Fans serviced, ammonia back under 10 ppm.")
+        current = ChatSession.objects.create(owner_key=OWNER, title="Ammonia")
+        search.index_message(ChatMessage.objects.create(session=current, role="user", content="ammonia?"), current)
+
+        picked = search.relevant(OWNER, "What was the ammonia in barn 2?", 3, 900, exclude_session=current.id)
+        self.assertEqual(picked[0]["title"], "Ammonia readings")
+        self.assertLessEqual(len(picked[0]["text"]), search.CHUNK_CHARS)
+        self.assertLessEqual(sum(len(p["title"]) + len(p["text"]) for p in picked), 900)
+        self.assertNotIn("Feed order", [p["title"] for p in picked])
+        self.assertNotIn(SearchDocument.KIND_CHAT, [p["kind"] for p in picked])
+
+        request = RequestFactory().get("/")
+        request.session = self.client.session
+        context = views._build_ai_context(request, "ammonia in barn 2", views.ChatContext(current))
+        self.assertIn("Note Ammonia readings", context)
+        self.assertNotIn("grower feed", context)
+        self.assertLess(len(context), 900 + 1500)
+
+
+class DeviceRegistryTests(TestCase):
+    ACCOUNT = "registry@example.com"
+
+    def setUp(self):
+        session = self.client.session
+        session["blu_creds"] = {"uname": self.ACCOUNT, "upass": "p"}
+        session.save()
+        self.devices = [
+            {"id": str(i), "label": f"Barn {i % 3} cooler", "org": "North" if i % 2 else "South",
+             "type": "htdl" if i % 4 == 0 else "tdl", "vrn": f"V{i}", "battery": float(i)}
+            for i in range(1, 13)
+        ]
+
+    def _get(self, **params):
+        with mock.patch.object(bluconsole, "fetch_devices", return_value=self.devices):
+            return self.client.get("/api/blu/devices/", params)
+
+    def test_query_mode_filters_sorts_and_pages_on_the_server(self):
+        data = self._get(q="barn 1", org="North", sort="-battery", pageSize=2).json()
+        # Barn 1: ids 1, 4, 7, 10; North: the odd ones.
+        self.assertEqual(data["total"], 2)
+        self.assertEqual([d["id"] for d in data["devices"]], ["7", "1"])
+        self.assertEqual(data["orgs"], ["North", "South"])
+        self.assertEqual(self._get(type="htdl").json()["total"], 3)
+        page = self._get(sort="label", pageSize=5, page=3).json()
+        self.assertEqual((page["page"], len(page["devices"])), (3, 2))
+        self.assertEqual(self._get(sort="colour").status_code, 400)
+        ids = [d["id"] for d in self._get(sort="id", pageSize=12).json()["devices"]]
+        self.assertEqual(ids, [str(i) for i in range(1, 13)])
+        self.assertEqual(self._get(sort="-id", pageSize=2).json()["devices"][0]["id"], "12")
+        # Without query parameters the full upstream list is returned as before.
+        self.assertEqual(len(self._get().json()["devices"]), 12)
+
+    def test_registry_sync_failures_are_not_hidden(self):
+        with mock.patch.object(alerts, "observe_devices", side_effect=RuntimeError("db locked")):
+            with self.assertLogs("dashboard.views", "ERROR"):
+                self.assertEqual(self._get(q="barn").status_code, 500)
+            # The plain list does not depend on the registry, so it is still served.
+            with self.assertLogs("dashboard.views", "ERROR"):
+                self.assertEqual(self._get().status_code, 200)
+
+    def test_registry_tracks_the_fleet_and_serves_lookups(self):
+        alerts.observe_devices(self.ACCOUNT, self.devices)
+        alerts.observe_devices(self.ACCOUNT, self.devices[1:])
+        self.assertFalse(registry.lookup(self.ACCOUNT, "1").in_fleet)
+        self.assertEqual(registry.query(self.ACCOUNT)["total"], 11)
+        with self.assertNumQueries(1):
+            self.assertEqual(registry.lookup(self.ACCOUNT, 5).vrn, "V5")
+
+    def test_readings_for_unlisted_ids_stay_out_of_the_fleet(self):
+        alerts.observe_devices(self.ACCOUNT, self.devices)
+        alerts.ingest_readings(self.ACCOUNT, "404", [{"utc": 1700000000, "t": 3.0}])
+        self.assertEqual(registry.query(self.ACCOUNT)["total"], 12)
+        alerts.observe_devices(self.ACCOUNT, self.devices + [{"id": "404", "label": "Late"}])
+        self.assertTrue(registry.lookup(self.ACCOUNT, "404").in_fleet)
+
+
+class AlertRuleTests(TestCase):
+    ACCOUNT = "alerts@example.com"
+
+    def setUp(self):
+        session = self.client.session
+        session["blu_creds"] = {"uname": self.ACCOUNT, "upass": "p"}
+        session.save()
+        sweep = mock.patch.object(alerts, "request_sweep", return_value=False)
+        sweep.start()
+        self.addCleanup(sweep.stop)
+
+    def test_alerts_poll_revalidates_until_something_changes(self):
+        first = self.client.get("/api/alerts/")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get("/api/alerts/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        alerts.observe_devices(self.ACCOUNT, [{"id": "1", "type": "tdl", "battery": 5.0}])
+        changed = self.client.get("/api/alerts/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()["alerts"][0]["kind"], Alert.KIND_LOW_BATTERY)
+
+    NOW = 1_700_000_000
+
+    def _ingest(self, *points, **kwargs):
+        return alerts.ingest_readings(self.ACCOUNT, "7", [{"utc": u, "t": t} for u, t in points], now=self.NOW, **kwargs)
+
+    def _active(self):
+        return dict(Alert.objects.filter(account=self.ACCOUNT, active=True).values_list("kind", "status"))
+
+    def test_range_alert_follows_the_latest_reading(self):
+        alerts.observe_devices(self.ACCOUNT, [{"id": "7", "type": "tdl", "min_temp": 0.0, "max_temp": 4.0}])
+        self._ingest((self.NOW - 90, 6.0))
+        self.assertEqual(self._active(), {Alert.KIND_OUT_OF_RANGE: "high"})
+        self._ingest((self.NOW - 60, -1.0))
+        self.assertEqual(self._active(), {Alert.KIND_OUT_OF_RANGE: "low"})
+        self._ingest((self.NOW - 30, 2.0))
+        self.assertEqual(self._active(), {})
+
+    def test_stale_alert_and_repeat_fetches(self):
+        self._ingest(missing_is_stale=True)
+        self.assertEqual(self._active(), {Alert.KIND_STALE: "offline"})
+        self._ingest((self.NOW - 3600, 2.0))
+        self.assertEqual(Alert.objects.get(active=True).value, 60.0)
+        # Nothing new and still stale: no rule needs re-running.
+        with self.assertNumQueries(2):
+            self._ingest((self.NOW - 3600, 2.0))
+        self._ingest((self.NOW - 60, 2.0))
+        self.assertEqual(self._active(), {})
+        with self.assertNumQueries(2):
+            self._ingest((self.NOW - 60, 2.0))
+
+    def test_battery_alert(self):
+        alerts.observe_devices(self.ACCOUNT, [{"id": "7", "type": "tdl", "battery": 50.0}])
+        self.assertEqual(self._active(), {})
+        alerts.observe_devices(self.ACCOUNT, [{"id": "7", "type": "tdl", "battery": 12.0}])
+        self.assertEqual(Alert.objects.get(active=True).value, 12.0)
+        alerts.observe_devices(self.ACCOUNT, [{"id": "7", "type": "tdl", "battery": 90.0}])
+        self.assertEqual(self._active(), {})
+
+    def test_shelf_life_loss_accumulates_above_the_reference(self):
+        # Six hours at 25 C: Q10 3 runs the clock 9x, 8 extra days per day, so 2 days lost.
+        start = self.NOW - 6 * 3600
+        state = self._ingest(*((start + i * 600, 25.0) for i in range(37)))
+        self.assertAlmostEqual(state.shelf_life_loss, 2.0)
+        self.assertEqual(self._active(), {Alert.KIND_SHELF_LIFE: "high"})
+        self.assertAlmostEqual(self._ingest((self.NOW + 60, 4.0)).shelf_life_loss, 2.0 + 8 * 60 / 86400)
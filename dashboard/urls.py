@@ -12,24 +12,40 @@ urlpatterns = [
     path("ai/", views.ai, name="ai"),
     path("ai-chat/", views.ai_chat, name="ai_chat"),
     path("contact/", views.contact, name="contact"),
+    path("staff/profiles/", views.staff_profiles, name="staff_profiles"),
+    path("staff/profiles/<int:profile_id>/download/", views.staff_profile_download, name="staff_profile_download"),
     # BluConsole API
     path("api/blu/login/", views.api_blu_login, name="api_blu_login"),
     path("api/blu/logout/", views.api_blu_logout, name="api_blu_logout"),
     path("api/blu/status/", views.api_blu_status, name="api_blu_status"),
     path("api/blu/devices/", views.api_blu_devices, name="api_blu_devices"),
     path("api/blu/measurements/", views.api_blu_measurements, name="api_blu_measurements"),
+    path("api/alerts/", views.api_alerts, name="api_alerts"),
     # App data API
     path("api/signup/", views.api_signup, name="api_signup"),
     path("api/profile/", views.api_profile, name="api_profile"),
+    path("api/profile/photo/<str:content_hash>/", views.api_profile_photo, name="api_profile_photo"),
+    path(
+        "api/profile/photo/<str:content_hash>/<int:size>/",
+        views.api_profile_photo,
+        name="api_profile_photo_thumb",
+    ),
     path("api/notes/", views.api_notes, name="api_notes"),
     path("api/notes/<int:note_id>/", views.api_note_detail, name="api_note_detail"),
     path("api/uploads/", views.api_uploads, name="api_uploads"),
     path("api/uploads/clear/", views.api_uploads_clear, name="api_uploads_clear"),
     path("api/uploads/<int:upload_id>/", views.api_upload_detail, name="api_upload_detail"),
+    path("api/jobs/", views.api_jobs, name="api_jobs"),
+    path("api/jobs/<int:job_id>/", views.api_job_detail, name="api_job_detail"),
+    path("api/search/", views.api_search, name="api_search"),
+    path("api/rollups/", views.api_rollups, name="api_rollups"),
+    path("api/export/blu/", views.api_export_blu, name="api_export_blu"),
+    path("api/export/uploads/<int:upload_id>/", views.api_export_upload, name="api_export_upload"),
     path("api/ai-chat/", views.api_ai_chat, name="api_ai_chat"),
     path("api/ai-chat/status/", views.api_ai_chat_status, name="api_ai_chat_status"),
     path("api/ai-chat/sessions/", views.api_ai_chat_sessions, name="api_ai_chat_sessions"),
     path("api/ai-chat/sessions/<int:session_id>/", views.api_ai_chat_session_detail, name="api_ai_chat_session_detail"),
     path("api/ai-chat/sessions/clear/", views.api_ai_chat_sessions_clear, name="api_ai_chat_sessions_clear"),
     path("api/ai-chat/attachment/", views.api_ai_chat_attachment, name="api_ai_chat_attachment"),
+    path("metrics", views.metrics_view, name="metrics"),
 ]
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from xml.etree import ElementTree as ET
 
+from . import metrics
+
 
 def _to_float(val: str | None) -> float | None:
     if val is None:
@@ -21,6 +23,7 @@ def _to_int(val: str | None) -> int | None:
         return None
 
 
+@metrics.timed_call("xml")
 def parse_devices(xml: str) -> list[dict]:
     root = ET.fromstring(xml)
     devices = []
@@ -45,6 +48,7 @@ def parse_devices(xml: str) -> list[dict]:
     return devices
 
 
+@metrics.timed_call("xml")
 def parse_measurements(xml: str, device_id: str | None = None) -> list[dict]:
     root = ET.fromstring(xml)
     points = []
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import gzip
+import zlib
+from typing import Iterable, Iterator
+
+try:
+    import brotli  # type: ignore
+except Exception:  # pragma: no cover
+    brotli = None
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """Best encoding the client accepts: ``br`` when brotli is installed, else ``gzip``."""
+    offered = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip().lower()] = q
+    if brotli is not None and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(data: bytes, encoding: str, gzip_level: int = 6, br_quality: int = 4) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=br_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, gzip_level: int = 6,
+                    br_quality: int = 4) -> Iterator[bytes]:
+    """Compress a streamed body chunk by chunk, flushing after each so nothing is held back."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=br_quality)
+        for chunk in chunks:
+            out = compressor.process(chunk) + compressor.flush()
+            if out:
+                yield out
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        out = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if out:
+            yield out
+    yield compressor.flush()
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from time import monotonic, perf_counter
+
+# Flipped on by PerfMiddleware at startup. When it stays False every hook
+# below is a single attribute check.
+enabled = False
+# Gunicorn workers share one port, so a scrape reaches whichever worker
+# answers. Each process therefore writes its cumulative counters to
+# <directory>/<pid>-<token>.json (at most every FLUSH_SECONDS) and /metrics
+# sums every file. Files of exited workers stay, so counters never go
+# backwards; gunicorn clears the directory when it starts. Set by
+# PerfMiddleware from PERF_METRICS_DIR; empty keeps counters in-process.
+directory = ""
+FLUSH_SECONDS = 1.0
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_local = threading.local()
+# (endpoint, method) -> [bucket counts..., +Inf count], sum
+_histograms: dict[tuple[str, str], tuple[list[int], list[float]]] = {}
+# phase -> [seconds, calls]
+_phases: dict[str, list[float]] = {}
+# (target, outcome) -> calls
+_upstream: dict[tuple[str, str], int] = {}
+_flush_lock = threading.Lock()
+_flushed_at = 0.0
+_file = ""
+
+
+def _forked() -> None:
+    # A new worker reports only what it counts itself, under its own file.
+    global _file, _flushed_at
+    _histograms.clear()
+    _phases.clear()
+    _upstream.clear()
+    _file, _flushed_at = "", 0.0
+
+
+os.register_at_fork(after_in_child=_forked)
+
+
+def begin_request() -> None:
+    _local.timings = {}
+
+
+def end_request() -> dict[str, list[float]]:
+    timings = getattr(_local, "timings", None) or {}
+    _local.timings = None
+    return timings
+
+
+def record(phase: str, seconds: float) -> None:
+    timings = getattr(_local, "timings", None)
+    if timings is not None:
+        slot = timings.setdefault(phase, [0.0, 0])
+        slot[0] += seconds
+        slot[1] += 1
+    with _lock:
+        slot = _phases.setdefault(phase, [0.0, 0])
+        slot[0] += seconds
+        slot[1] += 1
+
+
+@contextmanager
+def timed(phase: str):
+    if not enabled:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, perf_counter() - start)
+
+
+def timed_call(phase: str):
+    """Decorator form of :func:`timed`; checks ``enabled`` per call."""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(phase, perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def count_upstream(target: str, ok: bool) -> None:
+    if not enabled:
+        return
+    key = (target, "ok" if ok else "error")
+    with _lock:
+        _upstream[key] = _upstream.get(key, 0) + 1
+
+
+def observe_request(endpoint: str, method: str, seconds: float) -> None:
+    idx = bisect_left(BUCKETS, seconds)
+    with _lock:
+        counts, total = _histograms.setdefault((endpoint, method), ([0] * (len(BUCKETS) + 1), [0.0]))
+        counts[idx] += 1
+        total[0] += seconds
+
+
+def server_timing(timings: dict[str, list[float]], total: float) -> str:
+    parts = [f'{phase};dur={secs * 1000:.1f};desc="{int(calls)} calls"' for phase, (secs, calls) in timings.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def _label(val: str) -> str:
+    return val.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _snapshot() -> dict:
+    with _lock:
+        return {
+            "histograms": [[e, m, list(c), t[0]] for (e, m), (c, t) in _histograms.items()],
+            "phases": [[p, v[0], v[1]] for p, v in _phases.items()],
+            "upstream": [[t, o, n] for (t, o), n in _upstream.items()],
+        }
+
+
+def flush(force: bool = False) -> None:
+    """Write this process's counters for other workers' scrapes (rate-limited unless ``force``)."""
+    global _file, _flushed_at
+    if not directory or (not force and monotonic() - _flushed_at < FLUSH_SECONDS):
+        return
+    if not _flush_lock.acquire(blocking=force):
+        return
+    try:
+        _flushed_at = monotonic()
+        folder = Path(directory)
+        folder.mkdir(parents=True, exist_ok=True)
+        _file = _file or f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+        tmp = folder / f"{_file}.tmp"
+        tmp.write_text(json.dumps(_snapshot()))
+        os.replace(tmp, folder / _file)
+    finally:
+        _flush_lock.release()
+
+
+def clear(path: str) -> None:
+    """Drop the previous run's counter files; gunicorn calls this before forking workers."""
+    for stale in Path(path).glob("*.json"):
+        stale.unlink(missing_ok=True)
+
+
+def _collect() -> tuple[dict, dict, dict]:
+    if directory:
+        flush(force=True)
+        snapshots = []
+        for path in Path(directory).glob("*.json"):
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+    else:
+        snapshots = [_snapshot()]
+    histograms: dict[tuple[str, str], tuple[list[int], float]] = {}
+    phases: dict[str, tuple[float, float]] = {}
+    upstream: dict[tuple[str, str], int] = {}
+    for snap in snapshots:
+        for endpoint, method, counts, total in snap["histograms"]:
+            prev_counts, prev_total = histograms.get((endpoint, method), ([0] * len(counts), 0.0))
+            histograms[(endpoint, method)] = ([a + b for a, b in zip(prev_counts, counts)], prev_total + total)
+        for phase, secs, calls in snap["phases"]:
+            prev_secs, prev_calls = phases.get(phase, (0.0, 0))
+            phases[phase] = (prev_secs + secs, prev_calls + calls)
+        for target, outcome, calls in snap["upstream"]:
+            upstream[(target, outcome)] = upstream.get((target, outcome), 0) + calls
+    return histograms, phases, upstream
+
+
+def render_prometheus() -> str:
+    """Counters summed over every worker process, in the Prometheus text exposition format."""
+    histograms, phases, upstream = _collect()
+    lines = [
+        "# HELP dashboard_request_duration_seconds Request latency by endpoint.",
+        "# TYPE dashboard_request_duration_seconds histogram",
+    ]
+    for (endpoint, method), (counts, total) in sorted(histograms.items()):
+        labels = f'endpoint="{_label(endpoint)}",method="{method}"'
+        running = 0
+        for bound, count in zip(BUCKETS, counts):
+            running += count
+            lines.append(f'dashboard_request_duration_seconds_bucket{{{labels},le="{bound}"}} {running}')
+        running += counts[-1]
+        lines.append(f'dashboard_request_duration_seconds_bucket{{{labels},le="+Inf"}} {running}')
+        lines.append(f"dashboard_request_duration_seconds_sum{{{labels}}} {total:.6f}")
+        lines.append(f"dashboard_request_duration_seconds_count{{{labels}}} {running}")
+    lines += [
+        "# HELP dashboard_phase_seconds_total Time spent in instrumented phases (db, blu, xml, openai, json).",
+        "# TYPE dashboard_phase_seconds_total counter",
+    ]
+    for phase, (secs, _calls) in sorted(phases.items()):
+        lines.append(f'dashboard_phase_seconds_total{{phase="{_label(phase)}"}} {secs:.6f}')
+    lines += [
+        "# HELP dashboard_phase_calls_total Calls made in instrumented phases.",
+        "# TYPE dashboard_phase_calls_total counter",
+    ]
+    for phase, (_secs, calls) in sorted(phases.items()):
+        lines.append(f'dashboard_phase_calls_total{{phase="{_label(phase)}"}} {int(calls)}')
+    lines += [
+        "# HELP dashboard_upstream_calls_total Outbound calls by target and outcome.",
+        "# TYPE dashboard_upstream_calls_total counter",
+    ]
+    for (target, outcome), calls in sorted(upstream.items()):
+        lines.append(f'dashboard_upstream_calls_total{{target="{_label(target)}",outcome="{outcome}"}} {calls}')
+    return "\n".join(lines) + "\n"
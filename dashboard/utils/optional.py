@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import importlib
+from functools import cache
+from types import ModuleType
+
+# Heavy optional dependencies (openpyxl alone is most of the app's import
+# time) load on first use. The gunicorn master imports them before forking,
+# see warmup.preload_modules, so web workers still share one copy.
+HEAVY_MODULES = ("openpyxl", "xlrd", "pyarrow", "pyarrow.parquet")
+
+
+@cache
+def load(name: str) -> ModuleType | None:
+    """``name`` imported on first call, or None when it is not installed."""
+    try:
+        return importlib.import_module(name)
+    except Exception:  # noqa: BLE001
+        return None
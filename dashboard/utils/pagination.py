@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q, QuerySet
+
+
+def encode_cursor(when: datetime, pk: int) -> str:
+    raw = json.dumps([when.isoformat(), pk], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[datetime, int]:
+    """Inverse of encode_cursor; ValueError for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        when, pk = json.loads(raw)
+        return datetime.fromisoformat(when), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def keyset(qs: QuerySet, field: str, limit: int, cursor: str | None = None, descending: bool = True):
+    """One page of ``qs`` ordered by ``(field, id)``, continuing after ``cursor``.
+
+    Seeks with ``(field, id) < cursor`` (or ``>``) instead of OFFSET, so a
+    page costs the same however deep it is and rows inserted meanwhile do not
+    shift it. Returns the rows (as fetched by the caller's ``.values()``, which
+    must include ``field`` and ``id``) and the cursor for the next page, or None.
+    """
+    op = "lt" if descending else "gt"
+    if cursor:
+        when, pk = decode_cursor(cursor)
+        qs = qs.filter(Q(**{f"{field}__{op}": when}) | Q(**{field: when, f"id__{op}": pk}))
+    prefix = "-" if descending else ""
+    rows = list(qs.order_by(f"{prefix}{field}", f"{prefix}id")[: limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last[field], last["id"])
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse as _JsonResponse
+
+from . import metrics
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None
+
+_fallback = DjangoJSONEncoder()
+
+
+def _default(obj: Any):
+    # Everything orjson does not encode natively (Decimal, timedelta, lazy
+    # strings) goes to Django's encoder. So do datetimes, dates and times
+    # (OPT_PASSTHROUGH_DATETIME): orjson would keep microseconds where Django
+    # cuts them to milliseconds, and both paths must produce the same JSON.
+    return _fallback.default(obj)
+
+
+def dumps(data: Any) -> bytes:
+    """Serialize ``data`` with orjson when available and enabled, else the stdlib encoder."""
+    if orjson is not None and settings.FAST_JSON_ENABLED:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, cls=DjangoJSONEncoder).encode("utf-8")
+
+
+class JsonResponse(_JsonResponse):
+    """``django.http.JsonResponse`` with serialization reported as the ``json`` phase."""
+
+    def __init__(self, *args, **kwargs):
+        with metrics.timed("json"):
+            super().__init__(*args, **kwargs)
+
+
+class FastJsonResponse(HttpResponse):
+    """JSON response for large payloads (measurement lists, upload rows, chat history)."""
+
+    def __init__(self, data: Any, safe: bool = True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError("In order to allow non-dict objects to be serialized set the safe parameter to False.")
+        kwargs.setdefault("content_type", "application/json")
+        with metrics.timed("json"):
+            content = dumps(data)
+        super().__init__(content=content, **kwargs)
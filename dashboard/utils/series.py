@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime, timezone as dt_timezone, timedelta
+from typing import Any, Sequence
+
+# Cap a single integration step so a long gap in check-ins is not counted
+# as hours spent at whatever temperature was last reported.
+MAX_STEP_SECONDS = 2 * 3600
+
+
+def parse_date(val: Any) -> datetime | None:
+    if val is None:
+        return None
+    if isinstance(val, datetime):
+        return val
+    if isinstance(val, (int, float)):
+        if 20_000 < val < 60_000:
+            return datetime(1899, 12, 30, tzinfo=dt_timezone.utc) + timedelta(days=float(val))
+        if val > 1_000_000_000:
+            return datetime.fromtimestamp(val, tz=dt_timezone.utc)
+    try:
+        return datetime.fromisoformat(str(val))
+    except Exception:
+        return None
+
+
+def to_num(val: Any) -> float | None:
+    try:
+        return float(val)
+    except Exception:
+        return None
+
+
+def to_utc(val: Any) -> int | None:
+    d = parse_date(val)
+    if d is None:
+        return None
+    if d.tzinfo is None:
+        d = d.replace(tzinfo=dt_timezone.utc)
+    return int(d.timestamp())
+
+
+def detect_columns(headers: list[str], body: Sequence[Sequence[Any]]) -> tuple[str, str]:
+    """Pick the most likely time and temperature columns from header names and a row sample."""
+    time_col = ""
+    temp_col = ""
+    best_time = -1
+    best_temp = -1
+    sample = body[:200]
+    for idx, h in enumerate(headers):
+        h_lower = h.lower()
+        score = 0
+        if re.search(r"(time|date|timestamp)", h_lower):
+            score += 2
+        for r in sample:
+            if idx < len(r) and parse_date(r[idx]):
+                score += 1
+        if score > best_time:
+            best_time = score
+            time_col = h
+    for idx, h in enumerate(headers):
+        h_lower = h.lower()
+        score = 0
+        if re.search(r"(temp|temperature|degc|celsius)", h_lower):
+            score += 2
+        ok = 0
+        tot = 0
+        for r in sample:
+            if idx < len(r):
+                if to_num(r[idx]) is not None:
+                    ok += 1
+                tot += 1
+        if tot:
+            score += (ok / tot) * 5
+        if score > best_temp:
+            best_temp = score
+            temp_col = h
+    return time_col, temp_col
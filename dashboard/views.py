@@ -1,40 +1,77 @@
 from __future__ import annotations
 
+import hashlib
+import hmac
+import itertools
 import json
+import logging
 import re
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import date, datetime, time, timezone as dt_timezone, timedelta
-from io import BytesIO
+from datetime import datetime, timezone as dt_timezone
 from typing import Any
 from urllib import request as urlrequest
 
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Substr
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import redirect, render
 from django.conf import settings
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.functional import cached_property
+from django.utils.http import quote_etag
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import ensure_csrf_cookie
-from django.views.decorators.http import require_http_methods
-
-from .models import Note, Profile, UploadDataset, ChatSession, ChatMessage, ChatAttachment
-
-try:
-    import openpyxl  # type: ignore
-except Exception:  # pragma: no cover
-    openpyxl = None
-from .services import bluconsole
-from .utils.blu_xml import parse_devices, parse_measurements
+from django.views.decorators.http import condition, require_http_methods
+
+from .models import (
+    Alert,
+    ChatAttachment,
+    ChatMessage,
+    ChatSession,
+    Job,
+    LoggerState,
+    Note,
+    Profile,
+    ProfilePhoto,
+    ReadingRollup,
+    RequestProfile,
+    SearchDocument,
+    UploadDataset,
+)
+
+from .services import (
+    alerts, bluconsole, credentials, export, ingest, jobs, photos, purge, registry, rollups, search, swr, throttle,
+)
+from .utils import metrics, pagination
+from .utils.responses import FastJsonResponse, JsonResponse
+
+logger = logging.getLogger(__name__)
+
+# A measurements window ending this close to now is treated as "up to now".
+LIVE_WINDOW_SLACK_SECONDS = 120
+# Any of these on /api/blu/devices/ answers from the device registry, one page at a time.
+DEVICE_QUERY_PARAMS = frozenset({"q", "type", "org", "sort", "page", "pageSize"})
 
 
 def _owner_key(request) -> str:
     return request.session.get("owner_key") or "guest"
 
 
+def _limit_param(request, default: int, maximum: int) -> int:
+    try:
+        return min(maximum, max(1, int(request.GET.get("limit") or default)))
+    except ValueError as exc:
+        raise ValueError("limit must be an integer") from exc
+
+
 def _set_owner_key(request, key: str) -> None:
     request.session["owner_key"] = key
 
 
 def _blu_creds(request) -> dict | None:
-    return request.session.get("blu_creds")
+    return credentials.get(request)
 
 
 def _require_blu(view_func):
@@ -46,6 +83,61 @@ def _require_blu(view_func):
     return wrapper
 
 
+def _validator(*parts) -> str:
+    return hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:24]
+
+
+def _owner_list_etag(model, field: str):
+    """ETag for an owner's collection: changes on any insert, delete or edit."""
+
+    def etag(request, *args, **kwargs):
+        if request.method != "GET":
+            return None
+        owner_key = _owner_key(request)
+        agg = model.objects.filter(owner_key=owner_key).aggregate(n=Count("id"), top=Max("id"), last=Max(field))
+        return _validator(model.__name__, owner_key, agg["n"], agg["top"], agg["last"], request.GET.urlencode())
+
+    return etag
+
+
+def _profile_state(request) -> tuple:
+    # Memoized on the request: condition() asks for the ETag and Last-Modified separately.
+    if not hasattr(request, "_profile_state"):
+        request._profile_state = (
+            Profile.objects.filter(owner_key=_owner_key(request))
+            .values_list("updated_at", "photo__content_hash")
+            .first()
+        ) or (None, None)
+    return request._profile_state
+
+
+def _profile_etag(request):
+    if request.method != "GET":
+        return None
+    return _validator("profile", _owner_key(request), *_profile_state(request))
+
+
+def _profile_modified(request):
+    return _profile_state(request)[0] if request.method == "GET" else None
+
+
+def _upload_created(request, upload_id: int):
+    if request.method != "GET":
+        return None
+    if not hasattr(request, "_upload_created"):
+        request._upload_created = (
+            UploadDataset.objects.filter(owner_key=_owner_key(request), id=upload_id)
+            .values_list("created_at", flat=True)
+            .first()
+        )
+    return request._upload_created
+
+
+def _upload_etag(request, upload_id: int):
+    created = _upload_created(request, upload_id)
+    return _validator("upload", upload_id, created) if created else None
+
+
 def _json_body(request) -> dict[str, Any]:
     try:
         return json.loads(request.body.decode("utf-8") or "{}")
@@ -55,7 +147,7 @@ def _json_body(request) -> dict[str, Any]:
 
 @ensure_csrf_cookie
 def home(request):
-    profile = Profile.objects.filter(owner_key=_owner_key(request)).first()
+    profile = Profile.objects.filter(owner_key=_owner_key(request)).only("first_name", "last_name").first()
     return render(request, "dashboard/home.html", {"profile": profile})
 
 
@@ -108,6 +200,39 @@ def contact(request):
     return render(request, "dashboard/contact.html")
 
 
+@staff_member_required
+def staff_profiles(request):
+    profiles = RequestProfile.objects.defer("summary", "stats").order_by("-created_at")
+    endpoint = request.GET.get("endpoint")
+    if endpoint:
+        profiles = profiles.filter(endpoint=endpoint)
+    selected = None
+    if request.GET.get("id", "").isdigit():
+        selected = RequestProfile.objects.filter(pk=request.GET["id"]).defer("stats").first()
+    return render(
+        request,
+        "dashboard/staff_profiles.html",
+        {
+            "profiles": profiles[:100],
+            "endpoint": endpoint or "",
+            "endpoints": RequestProfile.objects.order_by("endpoint").values_list("endpoint", flat=True).distinct(),
+            "selected": selected,
+            "profiler_enabled": settings.PROFILER_ENABLED,
+        },
+    )
+
+
+@staff_member_required
+def staff_profile_download(request, profile_id: int):
+    profile = RequestProfile.objects.filter(pk=profile_id).only("stats", "endpoint", "created_at").first()
+    if not profile or not profile.stats:
+        raise Http404
+    stamp = profile.created_at.strftime("%Y%m%d-%H%M%S")
+    response = HttpResponse(bytes(profile.stats), content_type="application/octet-stream")
+    response["Content-Disposition"] = f'attachment; filename="{profile.endpoint}-{stamp}-{profile.pk}.prof"'
+    return response
+
+
 @require_http_methods(["POST"])
 def api_blu_login(request):
     data = _json_body(request)
@@ -119,13 +244,19 @@ def api_blu_login(request):
         bluconsole.blu_login(uname, upass)
     except Exception as exc:  # noqa: BLE001
         return JsonResponse({"error": str(exc)}, status=401)
+    credentials.forget(request.session.session_key)
     request.session["blu_creds"] = {"uname": uname, "upass": upass}
+    # As on logout: handles other workers cached for the old credentials stay under the old key.
+    request.session.cycle_key()
     return JsonResponse({"ok": True})
 
 
 @require_http_methods(["POST"])
 def api_blu_logout(request):
+    credentials.forget(request.session.session_key)
     request.session.pop("blu_creds", None)
+    # A new key means handles cached by other workers can no longer be reached.
+    request.session.cycle_key()
     return JsonResponse({"ok": True})
 
 
@@ -135,17 +266,54 @@ def api_blu_status(request):
     return JsonResponse({"authenticated": bool(creds)})
 
 
+def _upstream_error(exc: Exception) -> JsonResponse:
+    if isinstance(exc, throttle.UpstreamBusy):
+        # Over the account's BluConsole budget: tell the client when to retry
+        # instead of holding a worker while it waits.
+        response = JsonResponse({"error": str(exc)}, status=429)
+        response["Retry-After"] = str(exc.retry_after)
+        return response
+    return JsonResponse({"error": str(exc)}, status=502)
+
+
 @require_http_methods(["GET"])
 def api_blu_devices(request):
     creds = _blu_creds(request)
     if not creds:
         return JsonResponse({"error": "Not authenticated"}, status=401)
     try:
-        xml = bluconsole.get_devices(creds["uname"], creds["upass"], children=False)
-        devices = parse_devices(xml)
-        return JsonResponse({"devices": devices})
+        devices, freshness = swr.serve(
+            bluconsole.request_key("devices", creds["uname"], creds["upass"], False),
+            lambda: bluconsole.fetch_devices(creds["uname"], creds["upass"], children=False),
+            fresh=settings.BLU_DEVICES_FRESH_SECONDS,
+            max_stale=settings.BLU_DEVICES_MAX_STALE_SECONDS,
+        )
     except Exception as exc:  # noqa: BLE001
-        return JsonResponse({"error": str(exc)}, status=502)
+        return _upstream_error(exc)
+    if not DEVICE_QUERY_PARAMS.intersection(request.GET):
+        _observe_alerts(creds, devices=devices)
+        return JsonResponse({"devices": devices, **freshness})
+    # Query mode: one page of the registry, so the sync must have worked.
+    try:
+        alerts.observe_devices(creds["uname"], devices)
+    except Exception:  # noqa: BLE001
+        logger.exception("Device registry sync failed for %s", creds["uname"])
+        return JsonResponse({"error": "Unable to update the device registry"}, status=500)
+    try:
+        page = max(1, int(request.GET.get("page") or 1))
+        page_size = min(500, max(1, int(request.GET.get("pageSize") or 50)))
+        result = registry.query(
+            creds["uname"],
+            search=(request.GET.get("q") or "").strip(),
+            device_type=request.GET.get("type") or None,
+            org=request.GET.get("org") or None,
+            sort=request.GET.get("sort") or "id",
+            page=page,
+            page_size=page_size,
+        )
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse({**result, **freshness})
 
 
 @require_http_methods(["GET"])
@@ -158,18 +326,92 @@ def api_blu_measurements(request):
     to_time = request.GET.get("toTime")
     include_all = request.GET.get("includeAll") == "true"
     try:
-        xml = bluconsole.get_measurements(
-            creds["uname"],
-            creds["upass"],
-            device_id=device_id,
-            from_time=int(from_time) if from_time else None,
-            to_time=int(to_time) if to_time else None,
-            include_all=include_all,
+        from_time = int(from_time) if from_time else None
+        to_time = int(to_time) if to_time else None
+        now = int(datetime.now(tz=dt_timezone.utc).timestamp())
+        if from_time and (to_time is None or to_time >= now - LIVE_WINDOW_SLACK_SECONDS):
+            # "The last N hours": key on the span so every poll shares one entry,
+            # and refresh the same span relative to the time of the refresh.
+            span = (now - from_time) // 60 * 60
+            key_args = (device_id, "live", span, to_time is not None, include_all)
+
+            def fetch():
+                end = int(datetime.now(tz=dt_timezone.utc).timestamp())
+                return bluconsole.fetch_measurements(
+                    creds["uname"],
+                    creds["upass"],
+                    device_id=device_id,
+                    from_time=end - span,
+                    to_time=end if to_time is not None else None,
+                    include_all=include_all,
+                )
+        else:
+            key_args = (device_id, from_time, to_time, include_all)
+
+            def fetch():
+                return bluconsole.fetch_measurements(
+                    creds["uname"],
+                    creds["upass"],
+                    device_id=device_id,
+                    from_time=from_time,
+                    to_time=to_time,
+                    include_all=include_all,
+                )
+
+        points, freshness = swr.serve(
+            bluconsole.request_key("measurements", creds["uname"], creds["upass"], *key_args),
+            fetch,
+            fresh=settings.BLU_MEASUREMENTS_FRESH_SECONDS,
+            max_stale=settings.BLU_MEASUREMENTS_MAX_STALE_SECONDS,
         )
-        points = parse_measurements(xml, device_id=device_id)
-        return JsonResponse({"points": points})
+        if device_id:
+            _observe_alerts(creds, device_id=device_id, points=points)
+        return FastJsonResponse({"points": points, **freshness})
     except Exception as exc:  # noqa: BLE001
-        return JsonResponse({"error": str(exc)}, status=502)
+        return _upstream_error(exc)
+
+
+def _observe_alerts(creds: dict, devices: list[dict] | None = None, device_id: str | None = None,
+                    points: list[dict] | None = None) -> None:
+    # Alert evaluation must never break data delivery, but its failures are logged.
+    try:
+        if devices is not None:
+            alerts.observe_devices(creds["uname"], devices)
+        if device_id:
+            alerts.ingest_readings(creds["uname"], device_id, points or [])
+    except Exception:  # noqa: BLE001
+        logger.exception("Alert evaluation failed for %s", creds["uname"])
+
+
+def _alerts_snapshot(account: str) -> dict:
+    active = Alert.objects.filter(account=account, active=True).order_by("-last_seen_at")
+    return {
+        "alerts": [alerts.alert_payload(a) for a in active],
+        "devices": alerts.device_status(account),
+    }
+
+
+@require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+def api_alerts(request):
+    # Home polls this every ALERT_POLL_SECONDS; unchanged snapshots answer 304.
+    # (A held-open stream would pin one of gunicorn's few sync workers per tab.)
+    creds = _blu_creds(request)
+    if not creds:
+        return JsonResponse({"error": "Not authenticated"}, status=401)
+    account = creds["uname"]
+    alerts.request_sweep(creds)
+    marker = (
+        Alert.objects.filter(account=account).aggregate(m=Max("updated_at"))["m"],
+        LoggerState.objects.filter(account=account).aggregate(m=Max("updated_at"))["m"],
+    )
+    etag = quote_etag(_validator("alerts", account, *marker))
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    response = JsonResponse({**_alerts_snapshot(account), "poll_seconds": settings.ALERT_POLL_SECONDS})
+    response["ETag"] = etag
+    return response
 
 
 @require_http_methods(["POST"])
@@ -190,19 +432,27 @@ def api_signup(request):
 
 
 @require_http_methods(["GET", "POST"])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_profile_etag, last_modified_func=_profile_modified)
 def api_profile(request):
     owner_key = _owner_key(request)
     if request.method == "GET":
-        profile = Profile.objects.filter(owner_key=owner_key).first()
+        profile = (
+            Profile.objects.filter(owner_key=owner_key)
+            .select_related("photo")
+            .only("first_name", "last_name", "email", "photo__content_hash", "photo__thumbnails")
+            .first()
+        )
         if not profile:
             return JsonResponse({"profile": None})
+        photo = getattr(profile, "photo", None)
         return JsonResponse(
             {
                 "profile": {
                     "firstName": profile.first_name,
                     "lastName": profile.last_name,
                     "email": profile.email,
-                    "photoDataUrl": profile.photo_data_url,
+                    **(photos.photo_urls(photo) if photo else {"photoUrl": "", "photoThumbs": {}}),
                 }
             }
         )
@@ -211,12 +461,45 @@ def api_profile(request):
     profile.first_name = (data.get("firstName") or "").strip()
     profile.last_name = (data.get("lastName") or "").strip()
     profile.email = (data.get("email") or profile.email or "").strip()
-    profile.photo_data_url = data.get("photoDataUrl") or ""
+    # The photo is only sent when it changed; an empty string removes it.
+    if "photoDataUrl" in data:
+        try:
+            if data["photoDataUrl"]:
+                photos.save_photo(profile, data["photoDataUrl"])
+            else:
+                photos.delete_photo(profile)
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
     profile.save()
     return JsonResponse({"ok": True})
 
 
+@require_http_methods(["GET"])
+def api_profile_photo(request, content_hash: str, size: int | None = None):
+    # data is only loaded (by read_photo) when a file has to be rebuilt.
+    photo = ProfilePhoto.objects.filter(
+        profile__owner_key=_owner_key(request), content_hash=content_hash
+    ).defer("data").first()
+    if not photo:
+        return JsonResponse({"error": "Not found"}, status=404)
+    etag = f'"{content_hash}-{size or "orig"}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponse(status=304)
+    else:
+        body = photos.read_photo(photo, size)
+        if body is None:
+            return JsonResponse({"error": "Not found"}, status=404)
+        response = HttpResponse(body, content_type="image/jpeg" if size else photo.mime)
+    response["ETag"] = etag
+    # The URL is keyed by content hash, so it never changes meaning; private
+    # because it is only served to the owning session.
+    response["Cache-Control"] = "private, max-age=31536000, immutable"
+    return response
+
+
 @require_http_methods(["GET", "POST"])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_owner_list_etag(Note, "updated_at"))
 def api_notes(request):
     owner_key = _owner_key(request)
     if request.method == "GET":
@@ -232,6 +515,7 @@ def api_notes(request):
     if not title or not body:
         return JsonResponse({"error": "Title and body are required"}, status=400)
     note = Note.objects.create(owner_key=owner_key, title=title, body=body)
+    search.index_note(note)
     return JsonResponse({"note": {"id": note.id, "title": note.title, "body": note.body}})
 
 
@@ -249,10 +533,13 @@ def api_note_detail(request, note_id: int):
     note.body = (data.get("body") or note.body).strip()
     note.updated_at = timezone.now()
     note.save(update_fields=["title", "body", "updated_at"])
+    search.index_note(note)
     return JsonResponse({"ok": True})
 
 
 @require_http_methods(["GET", "POST"])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_owner_list_etag(UploadDataset, "created_at"))
 def api_uploads(request):
     owner_key = _owner_key(request)
     if request.method == "GET":
@@ -267,15 +554,13 @@ def api_uploads(request):
         if up.size > 5 * 1024 * 1024:
             return JsonResponse({"error": "File too large (max 5 MB)"}, status=400)
         name = up.name
-        lower = name.lower()
-        if lower.endswith(".xls") and not lower.endswith(".xlsx"):
-            return JsonResponse({"error": "Please save as .xlsx for now."}, status=400)
-        if not lower.endswith(".xlsx"):
+        if not ingest.supported(name):
             return JsonResponse({"error": "Unsupported file type."}, status=400)
-        if openpyxl is None:
-            return JsonResponse({"error": "Excel parser not available."}, status=500)
+        if settings.JOBS_ENABLED:
+            job = jobs.enqueue("upload.ingest", owner_key, upload=up, payload={"name": name})
+            return JsonResponse({"job": jobs.describe(job)}, status=202)
         try:
-            dataset = _parse_xlsx_dataset(up.read())
+            dataset = ingest.parse_dataset(name, up.read())
         except Exception as exc:  # noqa: BLE001
             return JsonResponse({"error": str(exc)}, status=400)
         try:
@@ -288,7 +573,9 @@ def api_uploads(request):
             )
         except Exception as exc:  # noqa: BLE001
             return JsonResponse({"error": f"Unable to save dataset: {exc}"}, status=400)
-        return JsonResponse(
+        rollups.rollup_upload(upload)
+        search.index_upload(upload)
+        return FastJsonResponse(
             {
                 "upload": {
                     "id": upload.id,
@@ -313,26 +600,35 @@ def api_uploads(request):
         rows=rows,
         row_count=len(rows),
     )
+    rollups.rollup_upload(upload)
+    search.index_upload(upload)
     return JsonResponse({"upload": {"id": upload.id}})
 
 
 @require_http_methods(["DELETE"])
 def api_uploads_clear(request):
     owner_key = _owner_key(request)
-    UploadDataset.objects.filter(owner_key=owner_key).delete()
+    purge.delete_uploads(UploadDataset.objects.filter(owner_key=owner_key))
     return JsonResponse({"ok": True})
 
 
 @require_http_methods(["GET", "DELETE"])
+# Revalidated on every use, so a deleted upload is not served from the browser cache.
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_upload_etag, last_modified_func=_upload_created)
 def api_upload_detail(request, upload_id: int):
     owner_key = _owner_key(request)
-    upload = UploadDataset.objects.filter(owner_key=owner_key, id=upload_id).first()
-    if not upload:
-        return JsonResponse({"error": "Not found"}, status=404)
+    uploads = UploadDataset.objects.filter(owner_key=owner_key, id=upload_id)
     if request.method == "DELETE":
-        upload.delete()
+        # Delete without pulling the rows blob into memory.
+        deleted, _ = uploads.only("id").delete()
+        if not deleted:
+            return JsonResponse({"error": "Not found"}, status=404)
         return JsonResponse({"ok": True})
-    return JsonResponse(
+    upload = uploads.first()
+    if not upload:
+        return JsonResponse({"error": "Not found"}, status=404)
+    return FastJsonResponse(
         {
             "upload": {
                 "id": upload.id,
@@ -346,6 +642,150 @@ def api_upload_detail(request, upload_id: int):
     )
 
 
+@require_http_methods(["GET"])
+def api_jobs(request):
+    qs = Job.objects.filter(owner_key=_owner_key(request)).defer("payload", "data").order_by("-created_at")
+    status = request.GET.get("status")
+    if status:
+        qs = qs.filter(status=status)
+    return JsonResponse({"jobs": [jobs.describe(job) for job in qs[:20]]})
+
+
+@require_http_methods(["GET"])
+def api_job_detail(request, job_id: int):
+    job = Job.objects.filter(owner_key=_owner_key(request), id=job_id).defer("payload", "data").first()
+    if not job:
+        return JsonResponse({"error": "Not found"}, status=404)
+    return JsonResponse({"job": jobs.describe(job)})
+
+
+@require_http_methods(["GET"])
+def api_search(request):
+    query = (request.GET.get("q") or "").strip()
+    if not query:
+        return JsonResponse({"error": "q is required"}, status=400)
+    kind = request.GET.get("kind") or None
+    if kind and kind not in dict(SearchDocument.KIND_CHOICES):
+        return JsonResponse({"error": "kind must be note, chat or upload"}, status=400)
+    try:
+        page = max(1, int(request.GET.get("page") or 1))
+        page_size = min(50, max(1, int(request.GET.get("pageSize") or 20)))
+    except ValueError:
+        return JsonResponse({"error": "page and pageSize must be integers"}, status=400)
+    return JsonResponse(search.search(_owner_key(request), query, kind=kind, page=page, page_size=page_size))
+
+
+@require_http_methods(["GET"])
+def api_rollups(request):
+    bucket = request.GET.get("bucket") or ReadingRollup.BUCKET_HOUR
+    if bucket not in rollups.BUCKET_SECONDS:
+        return JsonResponse({"error": "bucket must be hour or day"}, status=400)
+    upload_id = request.GET.get("upload")
+    device_id = request.GET.get("id")
+    if upload_id:
+        account = _owner_key(request)
+        series = f"upload:{upload_id}"
+    elif device_id:
+        creds = _blu_creds(request)
+        if not creds:
+            return JsonResponse({"error": "Not authenticated"}, status=401)
+        account = creds["uname"]
+        series = f"blu:{device_id}"
+    else:
+        return JsonResponse({"error": "id or upload is required"}, status=400)
+    try:
+        from_time = int(request.GET["fromTime"]) if request.GET.get("fromTime") else None
+        to_time = int(request.GET["toTime"]) if request.GET.get("toTime") else None
+    except ValueError:
+        return JsonResponse({"error": "fromTime and toTime must be unix seconds"}, status=400)
+    if device_id and not upload_id and from_time is not None:
+        now = int(datetime.now(tz=dt_timezone.utc).timestamp())
+        try:
+            rows = rollups.logger_rows(creds, device_id, bucket, from_time, to_time or now)
+        except Exception as exc:  # noqa: BLE001
+            return _upstream_error(exc)
+    else:
+        rows = rollups.series_rows(account, series, bucket, start_utc=from_time, end_utc=to_time)
+    return JsonResponse({"bucket": bucket, "rollups": rows})
+
+
+def _export_format(request) -> tuple[str, JsonResponse | None]:
+    fmt = (request.GET.get("format") or "csv").lower()
+    if fmt not in export.FORMATS:
+        return fmt, JsonResponse({"error": "format must be csv, ndjson or parquet"}, status=400)
+    if not export.available(fmt):
+        return fmt, JsonResponse({"error": "Parquet export needs pyarrow installed."}, status=400)
+    return fmt, None
+
+
+def _export_response(fmt: str, body, filename: str) -> StreamingHttpResponse:
+    content_type, ext = export.FORMATS[fmt]
+    response = StreamingHttpResponse(body, content_type=content_type)
+    safe_name = re.sub(r"[^A-Za-z0-9._-]+", "_", filename).strip("._") or "export"
+    response["Content-Disposition"] = f'attachment; filename="{safe_name}.{ext}"'
+    response["Cache-Control"] = "private, no-store"
+    return response
+
+
+@require_http_methods(["GET"])
+def api_export_blu(request):
+    creds = _blu_creds(request)
+    if not creds:
+        return JsonResponse({"error": "Not authenticated"}, status=401)
+    fmt, error = _export_format(request)
+    if error:
+        return error
+    try:
+        to_time = int(request.GET.get("toTime") or datetime.now(tz=dt_timezone.utc).timestamp())
+        from_time = int(request.GET.get("fromTime") or to_time - 7 * 86400)
+    except ValueError:
+        return JsonResponse({"error": "fromTime and toTime must be unix seconds"}, status=400)
+    if from_time > to_time:
+        return JsonResponse({"error": "fromTime must be before toTime"}, status=400)
+    if to_time - from_time > settings.EXPORT_MAX_DAYS * 86400:
+        return JsonResponse({"error": f"Export at most {settings.EXPORT_MAX_DAYS} days at a time"}, status=400)
+    ids = [i.strip() for i in (request.GET.get("ids") or request.GET.get("id") or "").split(",") if i.strip()]
+    if not ids:
+        try:
+            devices = bluconsole.fetch_devices(creds["uname"], creds["upass"], children=False)
+        except Exception as exc:  # noqa: BLE001
+            return _upstream_error(exc)
+        ids = [str(d["id"]) for d in devices if d.get("id")]
+    calls = export.upstream_calls(len(ids), from_time, to_time)
+    if calls > settings.EXPORT_MAX_UPSTREAM_CALLS:
+        return JsonResponse(
+            {"error": f"Export needs {calls} BluConsole requests (max {settings.EXPORT_MAX_UPSTREAM_CALLS}); "
+                      "pick fewer loggers or a shorter range"},
+            status=400,
+        )
+    rows = export.device_rows(creds, ids, from_time, to_time)
+    body = export.stream(fmt, export.DEVICE_COLUMNS, rows, types=export.DEVICE_TYPES)
+    label = ids[0] if len(ids) == 1 else f"{len(ids)}-loggers"
+    return _export_response(fmt, body, f"logger-{label}-{from_time}-{to_time}")
+
+
+@require_http_methods(["GET"])
+def api_export_upload(request, upload_id: int):
+    fmt, error = _export_format(request)
+    if error:
+        return error
+    upload = (
+        UploadDataset.objects.filter(owner_key=_owner_key(request), id=upload_id)
+        .only("name", "headers", "row_count")
+        .first()
+    )
+    if not upload:
+        return JsonResponse({"error": "Not found"}, status=404)
+    rows = export.upload_rows(upload)
+    columns = [h for h in (upload.headers or []) if h]
+    if not columns:
+        first = next(rows, None)
+        columns = list(first) if first else []
+        rows = itertools.chain([first] if first else [], rows)
+    name = upload.name.rsplit(".", 1)[0]
+    return _export_response(fmt, export.stream(fmt, columns, rows), name)
+
+
 @require_http_methods(["POST"])
 def api_ai_chat(request):
     if not settings.OPENAI_API_KEY:
@@ -358,6 +798,7 @@ def api_ai_chat(request):
     attachment = data.get("attachment") or None
     session = _get_or_create_chat_session(request, session_id, prompt)
     user_msg = ChatMessage.objects.create(session=session, role="user", content=prompt)
+    search.index_message(user_msg, session)
     if attachment:
         ChatAttachment.objects.create(
             message=user_msg,
@@ -365,21 +806,24 @@ def api_ai_chat(request):
             mime=str(attachment.get("mime") or ""),
             summary=attachment.get("summary") or {},
         )
+    chat = ChatContext(session)
     try:
-        context = _build_ai_context(request, prompt, session)
-        answer = _openai_chat(prompt, context, session)
+        context = _build_ai_context(request, prompt, chat)
+        answer = _openai_chat(prompt, context, chat)
         if not answer:
-            answer = _fallback_attachment_answer(session) or "I can help. What specific insight do you need?"
+            answer = _fallback_attachment_answer(chat) or "I can help. What specific insight do you need?"
         if _looks_like_blind_reply(answer):
-            answer = _fallback_attachment_answer(session) or answer
-        ChatMessage.objects.create(session=session, role="assistant", content=answer)
+            answer = _fallback_attachment_answer(chat) or answer
+        search.index_message(ChatMessage.objects.create(session=session, role="assistant", content=answer), session)
         session.updated_at = timezone.now()
         session.save(update_fields=["updated_at"])
         return JsonResponse({"answer": answer, "session_id": session.id})
     except Exception as exc:  # noqa: BLE001
-        fallback = _fallback_attachment_answer(session)
+        fallback = _fallback_attachment_answer(chat)
         if fallback:
-            ChatMessage.objects.create(session=session, role="assistant", content=fallback)
+            search.index_message(
+                ChatMessage.objects.create(session=session, role="assistant", content=fallback), session
+            )
             session.updated_at = timezone.now()
             session.save(update_fields=["updated_at"])
             return JsonResponse({"answer": fallback, "session_id": session.id})
@@ -397,34 +841,60 @@ def api_ai_chat_status(request):
 
 
 @require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_owner_list_etag(ChatSession, "updated_at"))
 def api_ai_chat_sessions(request):
+    # Newest first, ?cursor= from the previous page's next_cursor for older sessions.
     owner_key = _owner_key(request)
+    messages = ChatMessage.objects.filter(session=OuterRef("pk")).order_by()
     sessions = (
         ChatSession.objects.filter(owner_key=owner_key)
-        .order_by("-updated_at")
-        .values("id", "title", "created_at", "updated_at")
+        .annotate(
+            # Correlated subqueries on chatmessage_session_idx: evaluated for
+            # the page's rows only, with no GROUP BY over the whole history.
+            message_count=Coalesce(
+                Subquery(messages.values("session").annotate(n=Count("id")).values("n")[:1]),
+                0,
+                output_field=IntegerField(),
+            ),
+            preview=Substr(Subquery(messages.order_by("-created_at", "-id").values("content")[:1]), 1, 120),
+        )
+        .values("id", "title", "created_at", "updated_at", "message_count", "preview")
     )
-    return JsonResponse({"sessions": list(sessions)})
+    try:
+        limit = _limit_param(request, default=30, maximum=100)
+        rows, next_cursor = pagination.keyset(sessions, "updated_at", limit, request.GET.get("cursor"))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse({"sessions": rows, "next_cursor": next_cursor})
 
 
 @require_http_methods(["GET"])
 def api_ai_chat_session_detail(request, session_id: int):
+    # The newest messages, oldest first; ?cursor= from next_cursor loads the page before them.
     owner_key = _owner_key(request)
     session = ChatSession.objects.filter(owner_key=owner_key, id=session_id).first()
     if not session:
         return JsonResponse({"error": "Not found"}, status=404)
-    messages = (
-        ChatMessage.objects.filter(session=session)
-        .order_by("created_at")
-        .values("id", "role", "content", "created_at")
+    messages = ChatMessage.objects.filter(session=session).values("id", "role", "content", "created_at")
+    try:
+        limit = _limit_param(request, default=50, maximum=200)
+        rows, next_cursor = pagination.keyset(messages, "created_at", limit, request.GET.get("cursor"))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return FastJsonResponse(
+        {
+            "session": {"id": session.id, "title": session.title},
+            "messages": rows[::-1],
+            "next_cursor": next_cursor,
+        }
     )
-    return JsonResponse({"session": {"id": session.id, "title": session.title}, "messages": list(messages)})
 
 
 @require_http_methods(["DELETE"])
 def api_ai_chat_sessions_clear(request):
     owner_key = _owner_key(request)
-    ChatSession.objects.filter(owner_key=owner_key).delete()
+    purge.delete_sessions(ChatSession.objects.filter(owner_key=owner_key))
     return JsonResponse({"ok": True})
 
 
@@ -443,21 +913,32 @@ def api_ai_chat_attachment(request):
             {"attachment": {"name": name, "mime": mime, "summary": {"type": "image", "name": name, "size": up.size}}}
         )
 
-    lower = name.lower()
-    if lower.endswith(".xls") and not lower.endswith(".xlsx"):
-        return JsonResponse({"error": "Please save as .xlsx for now."}, status=400)
-    if not lower.endswith(".xlsx"):
+    if not ingest.supported(name):
         return JsonResponse({"error": "Unsupported file type."}, status=400)
-    if openpyxl is None:
-        return JsonResponse({"error": "Excel parser not available."}, status=500)
+    if settings.JOBS_ENABLED:
+        job = jobs.enqueue("attachment.summarize", _owner_key(request), upload=up, payload={"name": name, "mime": mime})
+        return JsonResponse({"job": jobs.describe(job)}, status=202)
 
     try:
-        summary = _summarize_xlsx(up.read())
+        summary = ingest.summarize(name, up.read())
         return JsonResponse({"attachment": {"name": name, "mime": mime, "summary": summary}})
     except Exception as exc:  # noqa: BLE001
         return JsonResponse({"error": str(exc)}, status=400)
 
 
+@require_http_methods(["GET"])
+def metrics_view(request):
+    if not settings.PERF_METRICS_ENABLED:
+        return JsonResponse({"error": "Not found"}, status=404)
+    token = settings.PERF_METRICS_TOKEN
+    # Never public: without a token configured there is nothing to authenticate against.
+    if not token:
+        return JsonResponse({"error": "PERF_METRICS_TOKEN is not set"}, status=403)
+    if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return JsonResponse({"error": "Unauthorized"}, status=401)
+    return HttpResponse(metrics.render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 def _extract_logger_id(prompt: str) -> str | None:
     matches = re.findall(r"\b\d{3,}\b", prompt)
     return matches[0] if matches else None
@@ -471,8 +952,7 @@ def _wants_logger_status(prompt: str) -> bool:
 
 def _get_logger_status_snapshot(creds: dict) -> str:
     try:
-        xml = bluconsole.get_devices(creds["uname"], creds["upass"], children=False)
-        devices = parse_devices(xml)
+        devices = bluconsole.fetch_devices(creds["uname"], creds["upass"], children=False)
     except Exception:
         return "Logger status: unable to fetch device list right now."
 
@@ -486,14 +966,13 @@ def _get_logger_status_snapshot(creds: dict) -> str:
 
     def fetch_latest(dev):
         try:
-            xml_m = bluconsole.get_measurements(
+            points = bluconsole.fetch_measurements(
                 creds["uname"],
                 creds["upass"],
                 device_id=str(dev.get("id")),
                 from_time=from_time,
                 to_time=now,
             )
-            points = parse_measurements(xml_m, device_id=str(dev.get("id")))
             latest = None
             for p in points:
                 if not latest or (p.get("utc") or 0) > (latest.get("utc") or 0):
@@ -538,24 +1017,26 @@ def _get_logger_status_snapshot(creds: dict) -> str:
     return summary + " Recent loggers: " + "; ".join(details[:8]) + "."
 
 
+def _round(val: float | None, digits: int = 2) -> float | None:
+    return round(val, digits) if val is not None else None
+
+
 def _format_dt_from_utc(utc: int | None) -> str:
     if not utc:
         return "unknown"
     return datetime.fromtimestamp(utc, tz=dt_timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
 
 
-def _build_ai_context(request, prompt: str, session: ChatSession | None) -> str:
+def _build_ai_context(request, prompt: str, chat: ChatContext) -> str:
     owner_key = _owner_key(request)
-    profile = Profile.objects.filter(owner_key=owner_key).first()
-    notes = (
-        Note.objects.filter(owner_key=owner_key)
-        .order_by("-updated_at", "-created_at")
-        .values("title", "body", "updated_at", "created_at")[:5]
-    )
-    uploads = (
-        UploadDataset.objects.filter(owner_key=owner_key)
-        .order_by("-created_at")
-        .values("name", "row_count", "created_at")[:5]
+    session = chat.session
+    profile = Profile.objects.filter(owner_key=owner_key).only("first_name", "last_name", "email").first()
+    relevant = search.relevant(
+        owner_key,
+        prompt,
+        settings.AI_CONTEXT_TOP_K,
+        settings.AI_CONTEXT_BUDGET_CHARS,
+        exclude_session=session.id if session else None,
     )
 
     context_lines = [
@@ -565,41 +1046,63 @@ def _build_ai_context(request, prompt: str, session: ChatSession | None) -> str:
         context_lines.append(
             f"Profile: {profile.first_name} {profile.last_name} ({profile.email or 'no email'})"
         )
-    if notes:
-        context_lines.append("Recent notes:")
-        for n in notes:
-            when = n["updated_at"] or n["created_at"]
-            context_lines.append(f"- {n['title']}: {n['body']} (at {when})")
-    if uploads:
-        context_lines.append("Recent uploads:")
-        for u in uploads:
-            context_lines.append(f"- {u['name']} ({u['row_count']} rows, {u['created_at']})")
+    if relevant:
+        context_lines.append("Relevant notes, uploads and earlier chats:")
+        upload_ids = [d["id"] for d in relevant if d["kind"] == SearchDocument.KIND_UPLOAD]
+        stats = rollups.summarize(owner_key, [f"upload:{i}" for i in upload_ids]) if upload_ids else {}
+        for d in relevant:
+            if d["kind"] == SearchDocument.KIND_NOTE:
+                context_lines.append(f"- Note {d['title']}: {d['text']} (at {d['created_at']})")
+            elif d["kind"] == SearchDocument.KIND_CHAT:
+                context_lines.append(f"- Earlier chat \"{d['title']}\": {d['text']}")
+            else:
+                line = f"- Upload {d['title']} (columns: {d['text']}; {d['created_at']})"
+                st = stats.get(f"upload:{d['id']}")
+                if st:
+                    line += (
+                        f" temp min={st['min']}, max={st['max']}, avg={_round(st['mean'])}, "
+                        f"hours above limit={st['hoursAbove']}, days {st['firstDay']} to {st['lastDay']}"
+                    )
+                context_lines.append(line)
+    else:
+        # Nothing matched: name the latest items so the model can ask about them.
+        notes = Note.objects.filter(owner_key=owner_key).order_by("-updated_at", "-created_at")
+        uploads = UploadDataset.objects.filter(owner_key=owner_key).order_by("-created_at")
+        note_titles = list(notes.values_list("title", flat=True)[:3])
+        upload_names = list(uploads.values_list("name", flat=True)[:3])
+        if note_titles:
+            context_lines.append("Latest note titles: " + "; ".join(note_titles))
+        if upload_names:
+            context_lines.append("Latest uploads: " + "; ".join(upload_names))
 
     creds = _blu_creds(request)
     if creds:
         logger_id = _extract_logger_id(prompt)
         if logger_id:
             try:
-                xml = bluconsole.get_devices(creds["uname"], creds["upass"], children=False)
-                devices = parse_devices(xml)
-                device = next((d for d in devices if str(d.get("id")) == str(logger_id)), None)
+                device = registry.lookup(creds["uname"], logger_id)
+                if device is None:
+                    # Not registered yet: one device list fetch fills the registry.
+                    alerts.observe_devices(
+                        creds["uname"], bluconsole.fetch_devices(creds["uname"], creds["upass"], children=False)
+                    )
+                    device = registry.lookup(creds["uname"], logger_id)
                 if device:
                     context_lines.append(
                         "Logger info: "
-                        f"id={device.get('id')}, type={device.get('type')}, "
-                        f"label={device.get('label')}, min={device.get('min_temp')}, "
-                        f"max={device.get('max_temp')}, vrn={device.get('vrn')}"
+                        f"id={device.device_id}, type={device.device_type}, "
+                        f"label={device.label}, min={device.min_temp}, "
+                        f"max={device.max_temp}, vrn={device.vrn}"
                     )
                 now = int(datetime.now(tz=dt_timezone.utc).timestamp())
                 from_time = now - 48 * 3600
-                xml_m = bluconsole.get_measurements(
+                points = bluconsole.fetch_measurements(
                     creds["uname"],
                     creds["upass"],
                     device_id=str(logger_id),
                     from_time=from_time,
                     to_time=now,
                 )
-                points = parse_measurements(xml_m, device_id=str(logger_id))
                 latest = None
                 for p in points:
                     if not latest or (p.get("utc") or 0) > (latest.get("utc") or 0):
@@ -612,6 +1115,16 @@ def _build_ai_context(request, prompt: str, session: ChatSession | None) -> str:
                     )
                 else:
                     context_lines.append("Latest measurement: none found in last 48h.")
+                week = rollups.logger_rows(creds, str(logger_id), ReadingRollup.BUCKET_DAY, now - 7 * 86400, now)
+                if week:
+                    context_lines.append(
+                        "Daily history (7d): "
+                        + "; ".join(
+                            f"{_format_dt_from_utc(d['utc'])[:10]} min={d['min']} max={d['max']} "
+                            f"avg={_round(d['mean'])} above={round(d['secondsAbove'] / 3600, 1)}h"
+                            for d in week
+                        )
+                    )
             except Exception:
                 context_lines.append("BluConsole: unable to fetch logger data right now.")
         else:
@@ -624,21 +1137,12 @@ def _build_ai_context(request, prompt: str, session: ChatSession | None) -> str:
         context_lines.append("BluConsole: user not connected.")
 
     if session:
-        last_msgs = (
-            ChatMessage.objects.filter(session=session)
-            .order_by("-created_at")
-            .values("role", "content")[:6]
-        )
+        last_msgs = chat.history[-6:]
         if last_msgs:
             context_lines.append("Recent chat:")
-            for m in reversed(list(last_msgs)):
+            for m in last_msgs:
                 context_lines.append(f"- {m['role']}: {m['content']}")
-        last_attach = (
-            ChatAttachment.objects.filter(message__session=session)
-            .order_by("-created_at")
-            .values("name", "mime", "summary")
-            .first()
-        )
+        last_attach = chat.last_attachment
         if last_attach:
             context_lines.append(f"Latest attachment: {last_attach['name']} ({last_attach['mime']})")
             context_lines.append(f"Attachment summary: {last_attach['summary']}")
@@ -656,7 +1160,7 @@ def _build_ai_context(request, prompt: str, session: ChatSession | None) -> str:
     return "\n".join(context_lines) or "No local data found."
 
 
-def _openai_chat(prompt: str, context: str, session: ChatSession | None) -> str:
+def _openai_chat(prompt: str, context: str, chat: ChatContext) -> str:
     casual_prompt = _is_smalltalk_prompt(prompt)
     system_msg = (
         "You are the Poultry Dashboard Assistant integrated into a sensor monitoring platform for "
@@ -711,15 +1215,9 @@ def _openai_chat(prompt: str, context: str, session: ChatSession | None) -> str:
                 ),
             }
         )
-    if session:
-        history = (
-            ChatMessage.objects.filter(session=session)
-            .order_by("-created_at")
-            .values("role", "content")[:8]
-        )
-        for m in reversed(list(history)):
-            if m["role"] in ("user", "assistant"):
-                messages.append({"role": m["role"], "content": m["content"]})
+    for m in chat.history:
+        if m["role"] in ("user", "assistant"):
+            messages.append({"role": m["role"], "content": m["content"]})
     messages.append({"role": "user", "content": prompt})
 
     payload = {
@@ -737,15 +1235,20 @@ def _openai_chat(prompt: str, context: str, session: ChatSession | None) -> str:
         },
         method="POST",
     )
-    with urlrequest.urlopen(req, timeout=25) as resp:
-        body = json.loads(resp.read().decode("utf-8"))
+    ok = False
+    try:
+        with metrics.timed("openai"), urlrequest.urlopen(req, timeout=25) as resp:
+            body = json.loads(resp.read().decode("utf-8"))
+            ok = True
+    finally:
+        metrics.count_upstream("openai", ok)
     choice = body.get("choices", [{}])[0]
     message = choice.get("message", {})
     content = (message.get("content") or "").strip() or "No response from model."
     if casual_prompt:
         return content
     if _needs_structure(content):
-        return _format_structured_answer(session, prompt)
+        return _format_structured_answer(chat, prompt)
     return _normalize_structured_text(content)
 
 
@@ -760,20 +1263,49 @@ def _get_or_create_chat_session(request, session_id: Any, prompt: str) -> ChatSe
     return ChatSession.objects.create(owner_key=owner_key, title=title)
 
 
-def _fallback_attachment_answer(session: ChatSession | None) -> str | None:
-    if not session:
-        return None
-    last_attach = (
-        ChatAttachment.objects.filter(message__session=session)
-        .order_by("-created_at")
-        .values("summary", "name")
-        .first()
-    )
+class ChatContext:
+    """The chat session's recent history and latest attachment, each loaded at most once.
+
+    api_ai_chat builds one per request and hands it to the context, model and
+    fallback helpers, which would otherwise each query the same rows again.
+    """
+
+    HISTORY = 8
+
+    def __init__(self, session: ChatSession | None):
+        self.session = session
+
+    @cached_property
+    def history(self) -> list[dict]:
+        """The last HISTORY messages, oldest first."""
+        if not self.session:
+            return []
+        rows = (
+            ChatMessage.objects.filter(session=self.session)
+            .order_by("-created_at", "-id")
+            .values("role", "content")[: self.HISTORY]
+        )
+        return list(rows)[::-1]
+
+    @cached_property
+    def last_attachment(self) -> dict | None:
+        if not self.session:
+            return None
+        return (
+            ChatAttachment.objects.filter(message__session=self.session)
+            .order_by("-created_at")
+            .values("name", "mime", "summary")
+            .first()
+        )
+
+
+def _fallback_attachment_answer(chat: ChatContext) -> str | None:
+    last_attach = chat.last_attachment
     if not last_attach:
         return None
     summary = last_attach.get("summary") or {}
     if summary.get("type") != "excel":
-        return "I can see an attachment, but it is not an Excel file. Please upload a logger export (.xls/.xlsx)."
+        return "I can see an attachment, but it is not a logger export. Please upload a .xlsx, .xls, .csv or .xml export."
     time_start = summary.get("timeStart") or "unknown"
     time_end = summary.get("timeEnd") or "unknown"
     t_min = summary.get("tempMin")
@@ -850,17 +1382,10 @@ def _normalize_structured_text(text: str) -> str:
     return normalized.strip()
 
 
-def _format_structured_answer(session: ChatSession | None, prompt: str) -> str:
-    fallback = _fallback_attachment_answer(session)
-    summary = None
-    if session:
-        last_attach = (
-            ChatAttachment.objects.filter(message__session=session)
-            .order_by("-created_at")
-            .values("summary")
-            .first()
-        )
-        summary = last_attach.get("summary") if last_attach else None
+def _format_structured_answer(chat: ChatContext, prompt: str) -> str:
+    fallback = _fallback_attachment_answer(chat)
+    last_attach = chat.last_attachment
+    summary = last_attach.get("summary") if last_attach else None
 
     if not summary or summary.get("type") != "excel":
         return (
@@ -868,7 +1393,7 @@ def _format_structured_answer(session: ChatSession | None, prompt: str) -> str:
             "- I do not have a parsed Excel summary yet.\n"
             "\n"
             "2) Time vs Temperature (what happened)\n"
-            "- Please attach a .xlsx logger export so I can compute min/max/avg and time range.\n"
+            "- Please attach a logger export (.xlsx, .csv or .xml) so I can compute min/max/avg and time range.\n"
             "\n"
             "3) Temperature abuse (yes/no, why)\n"
             "- Cannot assess without data.\n"
@@ -914,163 +1439,3 @@ def _format_structured_answer(session: ChatSession | None, prompt: str) -> str:
         f"- Temperatures stayed between {t_min} and {t_max} C from {time_start} to {time_end}, "
         "which can gradually reduce shelf life if sustained."
     )
-
-
-def _summarize_xlsx(raw: bytes) -> dict:
-    wb = _load_workbook_safe(raw)
-    ws = wb.worksheets[0]
-    rows = list(ws.iter_rows(values_only=True))
-    if not rows:
-        return {"type": "excel", "rows": 0}
-    headers = [str(h).strip() if h is not None else "" for h in rows[0]]
-    body = rows[1:]
-
-    def parse_date(val):
-        if val is None:
-            return None
-        if isinstance(val, datetime):
-            return val
-        if isinstance(val, (int, float)):
-            if 20_000 < val < 60_000:
-                return datetime(1899, 12, 30, tzinfo=dt_timezone.utc) + timedelta(days=float(val))
-            if val > 1_000_000_000:
-                return datetime.fromtimestamp(val, tz=dt_timezone.utc)
-        try:
-            d = datetime.fromisoformat(str(val))
-            return d
-        except Exception:
-            return None
-
-    def to_num(val):
-        try:
-            return float(val)
-        except Exception:
-            return None
-
-    # detect time/temp columns
-    time_col = ""
-    temp_col = ""
-    best_time = -1
-    best_temp = -1
-    sample = body[:200]
-    for idx, h in enumerate(headers):
-        h_lower = h.lower()
-        score = 0
-        if re.search(r"(time|date|timestamp)", h_lower):
-            score += 2
-        for r in sample:
-            if idx < len(r) and parse_date(r[idx]):
-                score += 1
-        if score > best_time:
-            best_time = score
-            time_col = h
-    for idx, h in enumerate(headers):
-        h_lower = h.lower()
-        score = 0
-        if re.search(r"(temp|temperature|degc|celsius)", h_lower):
-            score += 2
-        ok = 0
-        tot = 0
-        for r in sample:
-            if idx < len(r):
-                if to_num(r[idx]) is not None:
-                    ok += 1
-                tot += 1
-        if tot:
-            score += (ok / tot) * 5
-        if score > best_temp:
-            best_temp = score
-            temp_col = h
-
-    time_idx = headers.index(time_col) if time_col in headers else None
-    temp_idx = headers.index(temp_col) if temp_col in headers else None
-
-    t_min = None
-    t_max = None
-    t_sum = 0.0
-    t_count = 0
-    t_start = None
-    t_end = None
-    t_first = None
-    t_last = None
-
-    for r in body:
-        tval = None
-        dval = None
-        if temp_idx is not None and temp_idx < len(r):
-            tval = to_num(r[temp_idx])
-        if time_idx is not None and time_idx < len(r):
-            dval = parse_date(r[time_idx])
-        if tval is not None:
-            t_min = tval if t_min is None else min(t_min, tval)
-            t_max = tval if t_max is None else max(t_max, tval)
-            t_sum += tval
-            t_count += 1
-        if dval:
-            if t_start is None or dval < t_start:
-                t_start = dval
-                t_first = tval
-            if t_end is None or dval > t_end:
-                t_end = dval
-                t_last = tval
-
-    return {
-        "type": "excel",
-        "rows": len(body),
-        "headers": headers,
-        "timeCol": time_col,
-        "tempCol": temp_col,
-        "tempMin": t_min,
-        "tempMax": t_max,
-        "tempAvg": (t_sum / t_count) if t_count else None,
-        "timeStart": t_start.isoformat() if t_start else None,
-        "timeEnd": t_end.isoformat() if t_end else None,
-        "tempAtStart": t_first,
-        "tempAtEnd": t_last,
-        "tempSamples": t_count,
-    }
-
-
-def _serialize_cell(val: Any):
-    if val is None:
-        return None
-    if isinstance(val, (datetime, date, time)):
-        return val.isoformat()
-    if isinstance(val, timedelta):
-        return str(val)
-    if isinstance(val, (bytes, bytearray)):
-        return val.decode("utf-8", errors="replace")
-    if isinstance(val, (str, int, float, bool)):
-        return val
-    return str(val)
-
-
-def _parse_xlsx_dataset(raw: bytes) -> dict:
-    wb = _load_workbook_safe(raw)
-    ws = wb.worksheets[0]
-    rows = list(ws.iter_rows(values_only=True))
-    if not rows:
-        return {"headers": [], "rows": []}
-    headers = [str(h).strip() if h is not None else "" for h in rows[0]]
-    body = []
-    for r in rows[1:]:
-        obj = {}
-        for i, h in enumerate(headers):
-            val = r[i] if i < len(r) else None
-            obj[h] = _serialize_cell(val)
-        body.append(obj)
-    return {"headers": headers, "rows": body}
-
-
-def _load_workbook_safe(raw: bytes):
-    try:
-        return openpyxl.load_workbook(
-            filename=BytesIO(raw),
-            data_only=True,
-            read_only=True,
-            keep_links=False,
-        )
-    except Exception as exc:  # noqa: BLE001
-        raise ValueError(
-            "Unable to read workbook. Please re-save the file as .xlsx (new copy) and try again."
-        ) from exc
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from time import perf_counter
+
+from django.core.cache import cache
+from django.db import connection
+from django.template.loader import get_template
+from django.urls import get_resolver, reverse
+
+from .utils import optional
+
+PAGES = (
+    "base.html", "home.html", "sensor_feed.html", "visualizations.html", "ai.html", "ai_chat.html",
+    "faq.html", "profile.html", "login.html", "signup.html", "contact.html",
+)
+
+
+def preload_modules() -> list[str]:
+    """Import the lazily loaded optional modules; run in the gunicorn master before forking."""
+    return [name for name in optional.HEAVY_MODULES if optional.load(name) is not None]
+
+
+def warm_worker() -> dict[str, float]:
+    """Open the database and cache connections and fill the URL and template caches.
+
+    Called from gunicorn's post_fork hook, before the worker accepts requests.
+    Returns the milliseconds spent on each step.
+    """
+    timings = {}
+
+    def step(name, fn):
+        start = perf_counter()
+        try:
+            fn()
+        finally:
+            timings[name] = round((perf_counter() - start) * 1000, 3)
+
+    step("urls", lambda: (get_resolver().url_patterns, reverse("home")))
+    step("templates", lambda: [get_template(f"dashboard/{page}") for page in PAGES])
+    step("db", connection.ensure_connection)
+    step("cache", lambda: cache.get("warmup:ping"))
+    return timings
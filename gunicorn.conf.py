@@ -0,0 +1,49 @@
+"""Gunicorn settings for the web process.
+
+The app is imported once in the master (preload_app) and shared by forked
+workers; each worker then opens its database/cache connections and fills
+the URL and template caches before it accepts a request.
+
+RELEASE_ON_BOOT=1 runs migrate and collectstatic in the master for hosts
+without a build/release phase; with a release phase leave it unset.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+preload_app = True
+
+
+def on_starting(server):
+    from django.conf import settings
+    from django.core.management import call_command
+
+    from dashboard import warmup
+    from dashboard.utils import metrics
+
+    if os.environ.get("RELEASE_ON_BOOT", "").lower() in {"1", "true", "yes", "on"}:
+        call_command("migrate", interactive=False, verbosity=1)
+        call_command("collectstatic", interactive=False, verbosity=0)
+    # Counters are cumulative per server start, not across restarts.
+    if settings.PERF_METRICS_ENABLED and settings.PERF_METRICS_DIR:
+        metrics.clear(settings.PERF_METRICS_DIR)
+    loaded = warmup.preload_modules()
+    server.log.info("Preloaded %s", ", ".join(loaded) or "no optional modules")
+
+
+def post_fork(server, worker):
+    from django.db import connections
+
+    from dashboard import warmup
+
+    # Connections opened in the master must not be shared across processes.
+    connections.close_all()
+    try:
+        timings = warmup.warm_worker()
+    except Exception as exc:  # noqa: BLE001
+        # A cold worker still serves; the first request opens what it needs.
+        server.log.warning("Worker %s warmup failed: %s", worker.pid, exc)
+        return
+    server.log.info("Worker %s warmed in %s", worker.pid, timings)
@@ -85,6 +85,80 @@ BLU_BASE = (
 PROJECT_NAME = "Poultry Dashboard"
 OPENAI_API_KEY = _env_get("OPENAI_API_KEY", "")
 OPENAI_MODEL = _env_get("OPENAI_MODEL", "gpt-4o-mini")
+# Notes, uploads and earlier chats retrieved into each AI prompt (see services/search.py):
+# at most AI_CONTEXT_TOP_K of them, within AI_CONTEXT_BUDGET_CHARS characters.
+AI_CONTEXT_TOP_K = int(_env_get("AI_CONTEXT_TOP_K", "6"))
+AI_CONTEXT_BUDGET_CHARS = int(_env_get("AI_CONTEXT_BUDGET_CHARS", "3000"))
+
+# Server-side alert rules (see dashboard/services/alerts.py)
+ALERT_STALE_MINUTES = int(_env_get("ALERT_STALE_MINUTES", "30"))
+ALERT_LOW_BATTERY = float(_env_get("ALERT_LOW_BATTERY", "20"))
+ALERT_SHELF_LIFE_REF_TEMP = float(_env_get("ALERT_SHELF_LIFE_REF_TEMP", "5.0"))
+ALERT_SHELF_LIFE_Q10 = float(_env_get("ALERT_SHELF_LIFE_Q10", "3.0"))
+ALERT_SHELF_LIFE_LOSS_DAYS = float(_env_get("ALERT_SHELF_LIFE_LOSS_DAYS", "1.0"))
+ALERT_SWEEP_SECONDS = int(_env_get("ALERT_SWEEP_SECONDS", "300"))
+# How often Home re-polls /api/alerts/ (a revalidation answered 304 when nothing changed)
+ALERT_POLL_SECONDS = int(_env_get("ALERT_POLL_SECONDS", "15"))
+
+# Temperature limit for rollup time-above-limit when a logger has no max_temp (C)
+ROLLUP_TEMP_LIMIT = float(_env_get("ROLLUP_TEMP_LIMIT", "4.0"))
+# Live loggers only roll up readings fetched after they were first seen; reads
+# backfill at most this much older history from raw measurements
+ROLLUP_BACKFILL_MAX_DAYS = int(_env_get("ROLLUP_BACKFILL_MAX_DAYS", "31"))
+
+# Logger exports fetch one window per upstream request and allow at most this span
+EXPORT_CHUNK_SECONDS = int(_env_get("EXPORT_CHUNK_SECONDS", "86400"))
+EXPORT_MAX_DAYS = int(_env_get("EXPORT_MAX_DAYS", "366"))
+# Upstream requests one export may make (loggers x windows). An export streams from a
+# sync worker, so this must finish inside the gunicorn timeout at BLU_RATE_PER_SECOND.
+EXPORT_MAX_UPSTREAM_CALLS = int(_env_get("EXPORT_MAX_UPSTREAM_CALLS", "150"))
+
+# Serialize large API payloads with orjson when installed (stdlib otherwise)
+FAST_JSON_ENABLED = _env_bool("FAST_JSON_ENABLED", default=True)
+
+# Compress /api/ responses (brotli when installed, else gzip) above this size
+API_COMPRESSION_ENABLED = _env_bool("API_COMPRESSION_ENABLED", default=True)
+API_COMPRESSION_MIN_BYTES = int(_env_get("API_COMPRESSION_MIN_BYTES", "1024"))
+API_GZIP_LEVEL = int(_env_get("API_GZIP_LEVEL", "6"))
+API_BROTLI_QUALITY = int(_env_get("API_BROTLI_QUALITY", "4"))
+
+# Database job queue: when enabled, uploads and chat attachments are parsed by
+# `manage.py run_jobs` and the API answers 202 with a job id to poll.
+JOBS_ENABLED = _env_bool("JOBS_ENABLED", default=False)
+JOB_POLL_SECONDS = float(_env_get("JOB_POLL_SECONDS", "1"))
+# A running job whose lease a worker has not renewed for this long is requeued (renewed every third of it)
+JOB_LEASE_SECONDS = int(_env_get("JOB_LEASE_SECONDS", "300"))
+JOB_RETRY_BACKOFF_SECONDS = int(_env_get("JOB_RETRY_BACKOFF_SECONDS", "10"))
+
+# Request timing: Server-Timing headers plus Prometheus text at /metrics.
+PERF_METRICS_ENABLED = _env_bool("PERF_METRICS_ENABLED", default=False)
+# Where each worker process leaves its counters for /metrics to sum (local to
+# the machine; cleared when gunicorn starts). Empty keeps them per process.
+PERF_METRICS_DIR = _env_get("PERF_METRICS_DIR", "/tmp/dashboard-metrics")
+# Bearer token required to read /metrics; unset, /metrics refuses every request
+PERF_METRICS_TOKEN = _env_get("PERF_METRICS_TOKEN", "")
+
+# Retention enforced by `manage.py apply_retention` (run it daily); 0 disables a rule.
+CHAT_RETENTION_DAYS = int(_env_get("CHAT_RETENTION_DAYS", "0"))
+CHAT_MAX_SESSIONS_PER_OWNER = int(_env_get("CHAT_MAX_SESSIONS_PER_OWNER", "0"))
+UPLOAD_RETENTION_DAYS = int(_env_get("UPLOAD_RETENTION_DAYS", "0"))
+UPLOAD_MAX_PER_OWNER = int(_env_get("UPLOAD_MAX_PER_OWNER", "0"))
+JOB_RETENTION_DAYS = int(_env_get("JOB_RETENTION_DAYS", "7"))
+PROFILE_RETENTION_DAYS = int(_env_get("PROFILE_RETENTION_DAYS", "30"))
+# Rows per delete statement for clears and retention
+PURGE_BATCH_SIZE = int(_env_get("PURGE_BATCH_SIZE", "500"))
+
+# On-demand request profiling (see dashboard.middleware.ProfilerMiddleware).
+# Requests opt in with an X-Profile-Token header (`manage.py profile_token`),
+# a staff user's ?_profile flag, or sampling of PROFILER_SAMPLE_PATHS.
+PROFILER_ENABLED = _env_bool("PROFILER_ENABLED", default=False)
+# Signing key for profile tokens; SECRET_KEY when unset
+PROFILER_SECRET = _env_get("PROFILER_SECRET", "")
+PROFILER_TOKEN_MAX_AGE_SECONDS = int(_env_get("PROFILER_TOKEN_MAX_AGE_SECONDS", "3600"))
+PROFILER_SAMPLE_RATE = float(_env_get("PROFILER_SAMPLE_RATE", "0"))
+PROFILER_SAMPLE_PATHS = _env_list("PROFILER_SAMPLE_PATHS", ["/api/ai-chat/", "/api/uploads/"])
+# Paths that also record a tracemalloc peak (costly: every allocation is traced)
+PROFILER_MEMORY_PATHS = _env_list("PROFILER_MEMORY_PATHS", ["/api/uploads/", "/api/ai-chat/attachment/"])
 
 
 # Application definition
@@ -100,6 +174,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'dashboard.middleware.PerfMiddleware',
+    'dashboard.middleware.ApiCompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -108,6 +184,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'dashboard.middleware.ProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'poultry_dashboard.urls'
@@ -142,6 +219,54 @@ DATABASES = {
 }
 
 
+# Cache and sessions
+# Sessions are read from the cache and written through to the database, so a
+# cold or per-process (LocMem) cache only costs a fallback read.
+
+REDIS_URL = _env_get("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "poultry-dashboard",
+        }
+    }
+SESSION_ENGINE = _env_get("SESSION_ENGINE", "django.contrib.sessions.backends.cached_db")
+# How long a worker may reuse resolved BluConsole credentials without touching the session
+BLU_CREDS_CACHE_SECONDS = int(_env_get("BLU_CREDS_CACHE_SECONDS", "60"))
+# Identical concurrent BluConsole calls share one upstream request. Workers
+# that lose the race wait on the cache lock for at most the lock lifetime.
+BLU_FLIGHT_LOCK_SECONDS = int(_env_get("BLU_FLIGHT_LOCK_SECONDS", "25"))
+BLU_FLIGHT_RESULT_SECONDS = int(_env_get("BLU_FLIGHT_RESULT_SECONDS", "5"))
+BLU_FLIGHT_POLL_SECONDS = float(_env_get("BLU_FLIGHT_POLL_SECONDS", "0.05"))
+# Per-account BluConsole budget shared by all workers: a token bucket on the
+# request rate plus an adaptive (AIMD) cap on requests in flight that halves
+# when responses fail or exceed the latency target. Rate 0 disables both.
+BLU_RATE_PER_SECOND = float(_env_get("BLU_RATE_PER_SECOND", "5"))
+BLU_RATE_BURST = int(_env_get("BLU_RATE_BURST", "10"))
+BLU_CONCURRENCY_INITIAL = int(_env_get("BLU_CONCURRENCY_INITIAL", "4"))
+BLU_CONCURRENCY_MIN = int(_env_get("BLU_CONCURRENCY_MIN", "1"))
+BLU_CONCURRENCY_MAX = int(_env_get("BLU_CONCURRENCY_MAX", "8"))
+BLU_LATENCY_TARGET_SECONDS = float(_env_get("BLU_LATENCY_TARGET_SECONDS", "3"))
+# A request over budget waits at most this long (it holds a sync worker meanwhile),
+# then gets 429 with Retry-After
+BLU_THROTTLE_MAX_WAIT_SECONDS = float(_env_get("BLU_THROTTLE_MAX_WAIT_SECONDS", "1"))
+# Stale-while-revalidate for /api/blu/devices/ and /api/blu/measurements/:
+# results younger than FRESH are served as is, older ones up to MAX_STALE are
+# served immediately while a background refresh runs. MAX_STALE=0 disables it.
+BLU_DEVICES_FRESH_SECONDS = int(_env_get("BLU_DEVICES_FRESH_SECONDS", "30"))
+BLU_DEVICES_MAX_STALE_SECONDS = int(_env_get("BLU_DEVICES_MAX_STALE_SECONDS", "600"))
+BLU_MEASUREMENTS_FRESH_SECONDS = int(_env_get("BLU_MEASUREMENTS_FRESH_SECONDS", "60"))
+BLU_MEASUREMENTS_MAX_STALE_SECONDS = int(_env_get("BLU_MEASUREMENTS_MAX_STALE_SECONDS", "900"))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -180,6 +305,9 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+MEDIA_URL = 'media/'
+MEDIA_ROOT = Path(_env_get("MEDIA_ROOT", str(BASE_DIR / "media")))
+
 STORAGES = {
     "default": {
         "BACKEND": "django.core.files.storage.FileSystemStorage",
@@ -202,6 +330,10 @@ if not DEBUG:
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Profile photos: decoded size limit and square thumbnail sizes (px)
+PROFILE_PHOTO_MAX_BYTES = 5 * 1024 * 1024
+PROFILE_PHOTO_SIZES = (48, 160)
+
 # Allow up to ~6 MB uploads (chat attachments max 5 MB)
 DATA_UPLOAD_MAX_MEMORY_SIZE = 6 * 1024 * 1024
 FILE_UPLOAD_MAX_MEMORY_SIZE = 6 * 1024 * 1024